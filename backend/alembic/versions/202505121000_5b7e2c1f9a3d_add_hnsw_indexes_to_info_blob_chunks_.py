@@ -0,0 +1,44 @@
+# flake8: noqa
+
+"""add hnsw indexes to info_blob_chunks
+Revision ID: 5b7e2c1f9a3d
+Revises: 1e58cb567f44
+Create Date: 2025-05-12 10:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = "5b7e2c1f9a3d"
+down_revision = "1e58cb567f44"
+branch_labels = None
+depends_on = None
+
+# Dimensions of the embedding models we ship:
+# text-embedding-3-small (512), multilingual-e5-large (1024), text-embedding-ada-002 (1536)
+DIMENSIONS = (512, 1024, 1536)
+
+
+def upgrade() -> None:
+    # Building an HNSW index on a large table takes a while, so build them
+    # concurrently (outside of the migration transaction) to not block ingestion
+    with op.get_context().autocommit_block():
+        for dimensions in DIMENSIONS:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f"ix_info_blob_chunks_embedding_hnsw_{dimensions} "
+                f"ON info_blob_chunks "
+                f"USING hnsw ((embedding::vector({dimensions})) vector_cosine_ops) "
+                f"WITH (m = 16, ef_construction = 64) "
+                f"WHERE vector_dims(embedding) = {dimensions}"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for dimensions in DIMENSIONS:
+            op.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS "
+                f"ix_info_blob_chunks_embedding_hnsw_{dimensions}"
+            )
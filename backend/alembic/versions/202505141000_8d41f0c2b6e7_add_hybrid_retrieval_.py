@@ -0,0 +1,37 @@
+# flake8: noqa
+
+"""add full-text index to info_blob_chunks and retrieval mode to assistants
+Revision ID: 8d41f0c2b6e7
+Revises: 5b7e2c1f9a3d
+Create Date: 2025-05-14 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "8d41f0c2b6e7"
+down_revision = "5b7e2c1f9a3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "assistants",
+        sa.Column("retrieval_mode", sa.String(), server_default="semantic", nullable=False),
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_info_blob_chunks_text_search "
+            "ON info_blob_chunks USING gin (to_tsvector('simple'::regconfig, text))"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_info_blob_chunks_text_search")
+
+    op.drop_column("assistants", "retrieval_mode")
@@ -0,0 +1,26 @@
+# flake8: noqa
+
+"""add content hash to info blobs
+Revision ID: 3c9a7e5d2b10
+Revises: 8d41f0c2b6e7
+Create Date: 2025-05-16 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "3c9a7e5d2b10"
+down_revision = "8d41f0c2b6e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing info blobs get their hash the next time they are replaced
+    op.add_column("info_blobs", sa.Column("content_hash", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("info_blobs", "content_hash")
@@ -0,0 +1,54 @@
+# flake8: noqa
+
+"""add staged embedding model to info_blob_chunks
+Revision ID: 6f2d8b4a1c97
+Revises: 3c9a7e5d2b10
+Create Date: 2025-05-19 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision = "6f2d8b4a1c97"
+down_revision = "3c9a7e5d2b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without a default, so existing rows are not rewritten
+    op.add_column(
+        "info_blob_chunks",
+        sa.Column("staged_embedding_model_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_info_blob_chunks_staged_embedding_model_id",
+        "info_blob_chunks",
+        "embedding_models",
+        ["staged_embedding_model_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_info_blob_chunks_staged "
+            "ON info_blob_chunks (info_blob_id, staged_embedding_model_id) "
+            "WHERE staged_embedding_model_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    # Staged chunks would otherwise be searched alongside the live ones
+    op.execute("DELETE FROM info_blob_chunks WHERE staged_embedding_model_id IS NOT NULL")
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_info_blob_chunks_staged")
+
+    op.drop_constraint(
+        "fk_info_blob_chunks_staged_embedding_model_id", "info_blob_chunks", type_="foreignkey"
+    )
+    op.drop_column("info_blob_chunks", "staged_embedding_model_id")
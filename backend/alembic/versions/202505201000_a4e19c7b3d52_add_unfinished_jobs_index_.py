@@ -0,0 +1,30 @@
+# flake8: noqa
+
+"""add index of unfinished jobs
+Revision ID: a4e19c7b3d52
+Revises: 6f2d8b4a1c97
+Create Date: 2025-05-20 10:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = "a4e19c7b3d52"
+down_revision = "6f2d8b4a1c97"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_user_id_created_at_unfinished "
+            "ON jobs (user_id, created_at) "
+            "WHERE finished_at IS NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_user_id_created_at_unfinished")
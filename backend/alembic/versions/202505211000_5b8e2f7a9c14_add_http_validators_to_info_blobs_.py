@@ -0,0 +1,28 @@
+# flake8: noqa
+
+"""add http validators to info blobs
+Revision ID: 5b8e2f7a9c14
+Revises: a4e19c7b3d52
+Create Date: 2025-05-21 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "5b8e2f7a9c14"
+down_revision = "a4e19c7b3d52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing pages get theirs the next time they are crawled
+    op.add_column("info_blobs", sa.Column("etag", sa.String(), nullable=True))
+    op.add_column("info_blobs", sa.Column("last_modified", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("info_blobs", "last_modified")
+    op.drop_column("info_blobs", "etag")
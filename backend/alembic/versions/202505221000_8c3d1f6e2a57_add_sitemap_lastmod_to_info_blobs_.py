@@ -0,0 +1,26 @@
+# flake8: noqa
+
+"""add sitemap lastmod to info blobs
+Revision ID: 8c3d1f6e2a57
+Revises: 5b8e2f7a9c14
+Create Date: 2025-05-22 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "8c3d1f6e2a57"
+down_revision = "5b8e2f7a9c14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing pages are fetched once more, the next time they are crawled
+    op.add_column("info_blobs", sa.Column("sitemap_lastmod", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("info_blobs", "sitemap_lastmod")
@@ -0,0 +1,26 @@
+# flake8: noqa
+
+"""add file checksum to info blobs
+Revision ID: 3f9a6c2d8b41
+Revises: 8c3d1f6e2a57
+Create Date: 2025-05-23 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "3f9a6c2d8b41"
+down_revision = "8c3d1f6e2a57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing files are extracted once more, the next time they are uploaded
+    op.add_column("info_blobs", sa.Column("file_checksum", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("info_blobs", "file_checksum")
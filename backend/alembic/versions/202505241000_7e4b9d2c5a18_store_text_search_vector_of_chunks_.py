@@ -0,0 +1,129 @@
+# flake8: noqa
+
+"""store the text search vector of info blob chunks
+Revision ID: 7e4b9d2c5a18
+Revises: 3f9a6c2d8b41
+Create Date: 2025-05-24 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic
+revision = "7e4b9d2c5a18"
+down_revision = "3f9a6c2d8b41"
+branch_labels = None
+depends_on = None
+
+
+WORD_TOKENS = (
+    "asciiword, word, numword, asciihword, hword, numhword, "
+    "hword_asciipart, hword_part, hword_numpart"
+)
+
+
+# Rows filled in at a time, each batch in its own transaction
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    # No stemming, like the "simple" configuration, but without the English
+    # and Swedish stop words. A word that is not an English stop word is
+    # passed on to the Swedish dictionary, which keeps everything else
+    op.execute(
+        "CREATE TEXT SEARCH DICTIONARY english_stopwords "
+        "(TEMPLATE = pg_catalog.simple, STOPWORDS = english, ACCEPT = false)"
+    )
+    op.execute(
+        "CREATE TEXT SEARCH DICTIONARY swedish_stopwords "
+        "(TEMPLATE = pg_catalog.simple, STOPWORDS = swedish)"
+    )
+    op.execute("CREATE TEXT SEARCH CONFIGURATION keyword_search (COPY = pg_catalog.simple)")
+    op.execute(
+        f"ALTER TEXT SEARCH CONFIGURATION keyword_search ALTER MAPPING FOR {WORD_TOKENS} "
+        "WITH english_stopwords, swedish_stopwords"
+    )
+
+    # A generated column would rewrite the whole table while it is locked.
+    # A nullable column is only added to the catalog, new and changed rows
+    # are filled in by a trigger, and the existing rows in batches
+    op.add_column("info_blob_chunks", sa.Column("text_search", TSVECTOR(), nullable=True))
+    op.execute(
+        """
+        CREATE FUNCTION info_blob_chunks_text_search() RETURNS trigger AS $$
+        BEGIN
+            NEW.text_search := to_tsvector('keyword_search'::regconfig, NEW.text);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER info_blob_chunks_text_search
+            BEFORE INSERT OR UPDATE OF text
+            ON info_blob_chunks
+            FOR EACH ROW
+        EXECUTE PROCEDURE info_blob_chunks_text_search();
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        last_id = "00000000-0000-0000-0000-000000000000"
+        while True:
+            ids = conn.execute(
+                sa.text(
+                    """
+                    WITH batch AS (
+                        SELECT id FROM info_blob_chunks
+                        WHERE id > CAST(:last_id AS uuid)
+                        ORDER BY id
+                        LIMIT :batch_size
+                    )
+                    UPDATE info_blob_chunks
+                    SET text_search = to_tsvector('keyword_search'::regconfig, text)
+                    FROM batch
+                    WHERE info_blob_chunks.id = batch.id
+                    RETURNING info_blob_chunks.id
+                    """
+                ),
+                {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE},
+            ).scalars().all()
+            if not ids:
+                break
+
+            last_id = str(max(ids))
+
+        # Built next to the expression index, which is only dropped once the
+        # new index can take over
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_info_blob_chunks_text_search_new")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_info_blob_chunks_text_search_new "
+            "ON info_blob_chunks USING gin (text_search)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_info_blob_chunks_text_search")
+        op.execute(
+            "ALTER INDEX ix_info_blob_chunks_text_search_new "
+            "RENAME TO ix_info_blob_chunks_text_search"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_info_blob_chunks_text_search")
+
+    op.execute("DROP TRIGGER info_blob_chunks_text_search ON info_blob_chunks")
+    op.execute("DROP FUNCTION info_blob_chunks_text_search()")
+    op.drop_column("info_blob_chunks", "text_search")
+    op.execute("DROP TEXT SEARCH CONFIGURATION keyword_search")
+    op.execute("DROP TEXT SEARCH DICTIONARY swedish_stopwords")
+    op.execute("DROP TEXT SEARCH DICTIONARY english_stopwords")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_info_blob_chunks_text_search "
+            "ON info_blob_chunks USING gin (to_tsvector('simple'::regconfig, text))"
+        )
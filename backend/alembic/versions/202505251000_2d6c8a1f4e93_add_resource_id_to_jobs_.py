@@ -0,0 +1,35 @@
+# flake8: noqa
+
+"""add resource id to jobs
+Revision ID: 2d6c8a1f4e93
+Revises: 7e4b9d2c5a18
+Create Date: 2025-05-25 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "2d6c8a1f4e93"
+down_revision = "7e4b9d2c5a18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("resource_id", sa.UUID(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_task_resource_id_unfinished "
+            "ON jobs (task, resource_id) "
+            "WHERE finished_at IS NULL AND resource_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_task_resource_id_unfinished")
+
+    op.drop_column("jobs", "resource_id")
@@ -0,0 +1,44 @@
+# flake8: noqa
+
+"""add website boilerplate
+Revision ID: 9b3e5f7a1c26
+Revises: 2d6c8a1f4e93
+Create Date: 2025-05-26 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision = "9b3e5f7a1c26"
+down_revision = "2d6c8a1f4e93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "website_boilerplate",
+        sa.Column("website_id", sa.UUID(), nullable=False),
+        sa.Column("blocks", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["website_id"], ["websites.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("website_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("website_boilerplate")
@@ -0,0 +1,40 @@
+# flake8: noqa
+
+"""require pgvector 0.8
+Revision ID: 4a7c1e9d3b52
+Revises: 9b3e5f7a1c26
+Create Date: 2025-05-27 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = "4a7c1e9d3b52"
+down_revision = "9b3e5f7a1c26"
+branch_labels = None
+depends_on = None
+
+
+# Iterative index scans, used by the vector searches, were added in 0.8.0
+MIN_PGVECTOR_VERSION = (0, 8, 0)
+
+
+def upgrade() -> None:
+    # Only checked, since updating the extension needs its owner or a superuser
+    version = op.get_bind().scalar(
+        sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    )
+    if tuple(int(part) for part in version.split(".")) < MIN_PGVECTOR_VERSION:
+        raise RuntimeError(
+            f"pgvector {version} is installed, but intric requires pgvector 0.8.0 or later. "
+            "Upgrade pgvector to 0.8 or later: install it on the database server, for "
+            "example with the pgvector/pgvector:0.8.0-pg13 image, then run "
+            "'ALTER EXTENSION vector UPDATE' as the owner of the extension or a superuser, "
+            "and run the migrations again."
+        )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,110 @@
+"""Compares single-phase and two-phase semantic search latency.
+
+The single-phase query ranks whole chunk rows (including the chunk text)
+joined with their info blobs, which is how `InfoBlobChunkRepo.semantic_search`
+used to work. The two-phase query ranks ids and distances first and fetches
+text and titles for the top K only, which is how it works now.
+
+Run against a database with a large collection or website, for example:
+
+    poetry run python benchmarks/semantic_search_benchmark.py \\
+        --website-id <uuid> --dimensions 1536 --limit 30 --runs 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import UUID
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.orm import defer
+
+from intric.database.database import sessionmanager
+from intric.database.tables.info_blob_chunk_table import InfoBlobChunks
+from intric.database.tables.info_blobs_table import InfoBlobs
+from intric.info_blobs.info_blob_chunk_repo import InfoBlobChunkRepo
+from intric.main.config import get_settings
+
+
+def _random_embedding(dimensions: int) -> list[float]:
+    embedding = np.random.default_rng().normal(size=dimensions)
+    return (embedding / np.linalg.norm(embedding)).tolist()
+
+
+async def _single_phase(session, embedding: list[float], *, sources: dict, limit: int):
+    embedding_column, dimension_filter = await InfoBlobChunkRepo(session)._prepare_vector_search(
+        dimensions=len(embedding), limit=limit
+    )
+
+    distance = embedding_column.cosine_distance(embedding)
+    stmt = (
+        sa.select(InfoBlobChunks, distance, InfoBlobs.title)
+        .join(InfoBlobs)
+        .options(defer(InfoBlobChunks.embedding))
+        .where(dimension_filter)
+        .order_by(distance)
+        .limit(limit)
+    )
+    stmt = InfoBlobChunkRepo._filter_on_sources(stmt, **sources)
+
+    return (await session.execute(stmt)).all()
+
+
+async def _two_phase(session, embedding: list[float], *, sources: dict, limit: int):
+    return await InfoBlobChunkRepo(session).semantic_search(embedding, limit=limit, **sources)
+
+
+async def _time(func, *, dimensions: int, sources: dict, limit: int, runs: int):
+    timings = []
+    for _ in range(runs):
+        async with sessionmanager.session() as session, session.begin():
+            embedding = _random_embedding(dimensions)
+
+            start = time.perf_counter()
+            await func(session, embedding, sources=sources, limit=limit)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def _report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{name:<12} median {statistics.median(timings):8.2f} ms"
+        f"  p95 {p95:8.2f} ms  max {timings[-1]:8.2f} ms"
+    )
+
+
+async def main(args):
+    sessionmanager.init(get_settings().database_url)
+
+    sources = dict(
+        group_ids=args.group_id,
+        website_ids=args.website_id,
+        integration_knowledge_ids=args.integration_knowledge_id,
+    )
+    kwargs = dict(dimensions=args.dimensions, sources=sources, limit=args.limit, runs=args.runs)
+
+    try:
+        # Warm up the caches so that neither variant pays for a cold start
+        await _time(_two_phase, **{**kwargs, "runs": 3})
+
+        _report("single-phase", await _time(_single_phase, **kwargs))
+        _report("two-phase", await _time(_two_phase, **kwargs))
+    finally:
+        await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--group-id", type=UUID, action="append", default=[])
+    parser.add_argument("--website-id", type=UUID, action="append", default=[])
+    parser.add_argument("--integration-knowledge-id", type=UUID, action="append", default=[])
+    parser.add_argument("--dimensions", type=int, required=True)
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=50)
+
+    asyncio.run(main(parser.parse_args()))
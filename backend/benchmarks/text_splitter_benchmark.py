@@ -0,0 +1,91 @@
+"""Compares the token text splitter with langchain's recursive splitter.
+
+The langchain splitter, which is how `Datastore._chunk_text` used to chunk
+text, measures every candidate split by encoding it with tiktoken. The token
+text splitter encodes the whole text once. Both use the chunk size and
+overlap of the datastore settings.
+
+Run on a large document, or on generated text, for example:
+
+    poetry run python benchmarks/text_splitter_benchmark.py --file document.txt
+    poetry run python benchmarks/text_splitter_benchmark.py --paragraphs 5000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from intric.completion_models.infrastructure.context_builder import count_tokens
+from intric.embedding_models.infrastructure.datastore import settings
+from intric.embedding_models.infrastructure.text_splitter import TokenTextSplitter
+
+WORDS = (
+    "the municipality decided that applications for building permits shall be "
+    "handled within ten weeks according to section 2023-1234 of the regulation"
+).split()
+
+
+def _generate_text(paragraphs: int) -> str:
+    rng = random.Random(0)
+
+    return "\n\n".join(
+        "\n".join(
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+            for _ in range(rng.randint(1, 6))
+        )
+        for _ in range(paragraphs)
+    )
+
+
+def _time(func, text: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        chunks = func(text)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return chunks, timings
+
+
+def main(args):
+    if args.file:
+        with open(args.file) as f:
+            text = f.read()
+    else:
+        text = _generate_text(args.paragraphs)
+
+    langchain_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        length_function=count_tokens,
+    )
+    token_splitter = TokenTextSplitter(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+    )
+
+    # Load the encoding before timing anything
+    count_tokens("warm up")
+
+    print(f"{len(text)} characters, {count_tokens(text)} tokens")
+
+    expected, langchain_timings = _time(langchain_splitter.split_text, text, args.runs)
+    chunks, token_timings = _time(token_splitter.split_text, text, args.runs)
+
+    print(f"langchain  median {statistics.median(langchain_timings):10.2f} ms")
+    print(f"token      median {statistics.median(token_timings):10.2f} ms")
+
+    identical = len(set(expected) & set(chunks))
+    print(f"{len(expected)} vs {len(chunks)} chunks, {identical} identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file")
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+
+    main(parser.parse_args())
@@ -28,3 +28,17 @@ class QuotaService:
                 raise QuotaExceededException("User quota limit exceeded.")
 
         return size_of_text
+
+    async def get_size_left(self, freed_size: int = 0) -> int:
+        """Returns how large a text can still be added, once `freed_size` has
+        been freed, for callers that need to know before the text is complete."""
+        tenant_usage = await self.info_blob_repo.get_total_size_of_tenant(
+            self.user.tenant.id
+        )
+        size_left = self.user.tenant.quota_limit - (tenant_usage - freed_size)
+
+        if self.user.quota_limit is not None:
+            user_usage = await self.info_blob_repo.get_total_size_of_user(self.user.id)
+            size_left = min(size_left, self.user.quota_limit - (user_usage - freed_size))
+
+        return size_left
@@ -1,10 +1,16 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
 
+class RetrievalMode(str, Enum):
+    SEMANTIC = "semantic"
+    HYBRID = "hybrid"
+
+
 class SemanticSearchRequest(BaseModel):
     search_string: str
     num_chunks: int = 30
@@ -108,6 +108,7 @@ class AssistantAssembler:
             type=assistant.type,
             data_retention_days=assistant.data_retention_days,
             metadata_json=assistant.metadata_json,
+            retrieval_mode=assistant.retrieval_mode,
         )
 
     def from_assistant_to_default_assistant_model(
@@ -19,6 +19,7 @@ from intric.ai_models.completion_models.completion_model import (
     CompletionModelSparse,
     ModelKwargs,
 )
+from intric.ai_models.embedding_models.datastore.datastore_models import RetrievalMode
 from intric.ai_models.embedding_models.embedding_model import EmbeddingModelLegacy
 from intric.collections.presentation.collection_models import CollectionPublic
 from intric.completion_models.infrastructure.web_search import WebSearchResult
@@ -123,6 +124,13 @@ class AssistantUpdatePublic(AssistantCreatePublic):
         default=NOT_PROVIDED,
         description="Metadata for the assistant",
     )
+    retrieval_mode: Optional[RetrievalMode] = Field(
+        default=None,
+        description=(
+            "How knowledge is retrieved for this assistant. 'hybrid' combines "
+            "full-text search with the semantic search."
+        ),
+    )
 
 
 class AssistantCreate(AssistantBase):
@@ -224,6 +232,10 @@ class AssistantPublic(InDB, ResourcePermissionsMixin):
         default=None,
         description="Metadata for the assistant",
     )
+    retrieval_mode: RetrievalMode = Field(
+        default=RetrievalMode.SEMANTIC,
+        description="How knowledge is retrieved for this assistant",
+    )
 
 
 class DefaultAssistant(AssistantPublic):
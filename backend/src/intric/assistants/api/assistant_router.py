@@ -158,6 +158,7 @@ async def update_assistant(
         insight_enabled=assistant.insight_enabled,
         data_retention_days=assistant.data_retention_days,
         metadata_json=metadata_json,
+        retrieval_mode=assistant.retrieval_mode,
     )
 
     return assembler.from_assistant_to_model(assistant, permissions=permissions)
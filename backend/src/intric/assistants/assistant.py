@@ -6,6 +6,7 @@ from intric.ai_models.completion_models.completion_model import (
     CompletionModelPublic,
     ModelKwargs,
 )
+from intric.ai_models.embedding_models.datastore.datastore_models import RetrievalMode
 from intric.assistants.api.assistant_models import AssistantType
 from intric.base.base_entity import Entity
 from intric.completion_models.domain.completion_model import CompletionModel
@@ -65,6 +66,7 @@ class Assistant(Entity):
         insight_enabled: bool = False,
         data_retention_days: Optional[int] = None,
         metadata_json: Optional[dict] = {},
+        retrieval_mode: RetrievalMode = RetrievalMode.SEMANTIC,
     ):
         super().__init__(id=id, created_at=created_at, updated_at=updated_at)
 
@@ -90,6 +92,7 @@ class Assistant(Entity):
         self.data_retention_days = data_retention_days
         self.type = AssistantType.DEFAULT_ASSISTANT if is_default else AssistantType.ASSISTANT
         self._metadata_json = metadata_json
+        self.retrieval_mode = retrieval_mode
 
     def _validate_embedding_model(self, items: _KnowledgeItemList):
         embedding_model_id_set = set([item.embedding_model.id for item in items])
@@ -222,6 +225,7 @@ class Assistant(Entity):
         insight_enabled: bool | None = None,
         data_retention_days: Union[int, None, NotProvided] = NOT_PROVIDED,
         metadata_json: Union[dict, None, NotProvided] = NOT_PROVIDED,
+        retrieval_mode: RetrievalMode | None = None,
     ):
         if name is not None:
             self.name = name
@@ -261,6 +265,9 @@ class Assistant(Entity):
         if metadata_json is not NOT_PROVIDED:
             self.metadata_json = metadata_json
 
+        if retrieval_mode is not None:
+            self.retrieval_mode = retrieval_mode
+
     def get_prompt_text(self):
         if self.prompt is not None:
             return self.prompt.text
@@ -323,6 +330,7 @@ class Assistant(Entity):
             integration_knowledge_list=self.integration_knowledge_list,
             num_chunks=num_chunks,
             version=version,
+            retrieval_mode=self.retrieval_mode,
         )
 
         response = await completion_service.get_response(
@@ -133,6 +133,7 @@ class AssistantFactory:
             is_default=assistant_in_db.is_default,
             description=assistant_in_db.description,
             insight_enabled=assistant_in_db.insight_enabled,
+            retrieval_mode=assistant_in_db.retrieval_mode,
         )
 
     def create_space_assistant_from_db(
@@ -212,4 +213,5 @@ class AssistantFactory:
             insight_enabled=assistant_in_db.insight_enabled,
             data_retention_days=assistant_in_db.data_retention_days,
             metadata_json=assistant_in_db.metadata_json,
+            retrieval_mode=assistant_in_db.retrieval_mode,
         )
@@ -337,6 +337,7 @@ class AssistantRepository:
                 insight_enabled=assistant.insight_enabled,
                 data_retention_days=assistant.data_retention_days,
                 metadata_json=assistant.metadata_json,
+                retrieval_mode=assistant.retrieval_mode,
             )
             .where(Assistants.id == assistant.id)
             .returning(Assistants)
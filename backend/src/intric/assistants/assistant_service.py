@@ -7,6 +7,7 @@ from intric.ai_models.completion_models.completion_model import (
     ModelKwargs,
     ResponseType,
 )
+from intric.ai_models.embedding_models.datastore.datastore_models import RetrievalMode
 from intric.assistants.api.assistant_models import AssistantResponse
 from intric.assistants.assistant import Assistant
 from intric.assistants.assistant_factory import AssistantFactory
@@ -278,6 +279,7 @@ class AssistantService:
         insight_enabled: Optional[bool] = None,
         data_retention_days: Union[int, None, NotProvided] = NOT_PROVIDED,
         metadata_json: Union[dict, None, NotProvided] = NOT_PROVIDED,
+        retrieval_mode: Optional[RetrievalMode] = None,
     ):
         if logging_enabled:
             validate_permission(self.user, Permission.ADMIN)
@@ -336,6 +338,7 @@ class AssistantService:
             insight_enabled=insight_enabled,
             data_retention_days=data_retention_days,
             metadata_json=metadata_json,
+            retrieval_mode=retrieval_mode,
         )
 
         self.validate_space_assistant(space=space, assistant=assistant)
@@ -1,8 +1,9 @@
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
 
+from intric.ai_models.embedding_models.datastore.datastore_models import RetrievalMode
 from intric.files.file_models import FileType
-from intric.info_blobs.info_blob import InfoBlobInDBWithScore
+from intric.info_blobs.info_blob import InfoBlobInDBNoTextWithScore
 from intric.services.service import DatastoreResult
 
 if TYPE_CHECKING:
@@ -40,6 +41,7 @@ class ReferencesService:
         integration_knowledge_list: list["IntegrationKnowledge"] = [],
         num_chunks: Optional[int] = None,
         version: int = 1,
+        retrieval_mode: RetrievalMode = RetrievalMode.SEMANTIC,
     ) -> list["InfoBlobChunkInDBWithScore"]:
         if (collections or websites or integration_knowledge_list) and input_string:
             if version == 1:
@@ -55,7 +57,12 @@ class ReferencesService:
             elif integration_knowledge_list:
                 embedding_model = integration_knowledge_list[0].embedding_model
 
-            return await self.datastore.semantic_search(
+            if retrieval_mode == RetrievalMode.HYBRID:
+                search = self.datastore.hybrid_search
+            else:
+                search = self.datastore.semantic_search
+
+            return await search(
                 input_string,
                 embedding_model=embedding_model,
                 collections=collections,
@@ -68,14 +75,19 @@ class ReferencesService:
 
     async def _get_info_blobs_from_chunks(
         self, info_blob_chunks: list["InfoBlobChunkInDBWithScore"]
-    ) -> list["InfoBlobInDBWithScore"]:
-        info_blobs = []
-        for chunk in info_blob_chunks:
-            info_blob = await self.info_blobs_repo.get(chunk.info_blob_id)
-            info_blob = InfoBlobInDBWithScore(**info_blob.model_dump(), score=chunk.score)
-            info_blobs.append(info_blob)
+    ) -> list["InfoBlobInDBNoTextWithScore"]:
+        info_blobs = await self.info_blobs_repo.get_many_without_text(
+            [chunk.info_blob_id for chunk in info_blob_chunks]
+        )
+        info_blobs_by_id = {info_blob.id: info_blob for info_blob in info_blobs}
 
-        return info_blobs
+        return [
+            InfoBlobInDBNoTextWithScore(
+                **info_blobs_by_id[chunk.info_blob_id].model_dump(), score=chunk.score
+            )
+            for chunk in info_blob_chunks
+            if chunk.info_blob_id in info_blobs_by_id
+        ]
 
     def _get_info_blob_chunks_without_duplicates(
         self, info_blob_chunks: list["InfoBlobChunkInDBWithScore"]
@@ -133,6 +145,7 @@ class ReferencesService:
         embed_method: EmbedMethod = EmbedMethod.CONCATENATE,
         num_chunks: Optional[int] = None,
         version: int = 1,
+        retrieval_mode: RetrievalMode = RetrievalMode.SEMANTIC,
     ) -> "DatastoreResult":
         if embed_method == EmbedMethod.CONCATENATE:
             input_string = self._concatenate_conversation(
@@ -148,6 +161,7 @@ class ReferencesService:
             integration_knowledge_list=integration_knowledge_list,
             num_chunks=num_chunks,
             version=version,
+            retrieval_mode=retrieval_mode,
         )
         no_duplicate_chunks = self._get_info_blob_chunks_without_duplicates(chunks)
         info_blobs = await self._get_info_blobs_from_chunks(no_duplicate_chunks)
@@ -1,5 +1,6 @@
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import cache
 from typing import TYPE_CHECKING, Optional
 
 import tiktoken
@@ -30,12 +31,16 @@ MIN_PERCENTAGE_KNOWLEDGE = (
 )
 
 
+@cache
+def get_encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding("cl100k_base")
+
+
 def count_tokens(text: str):
     # ensure we're always passing a string to the encoder
     if text is None:
         return 0
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+    return len(get_encoding().encode(text))
 
 
 def _build_files_string(files: list[File]):
@@ -1,88 +1,256 @@
 import asyncio
-import json
-import os
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import Iterable, Optional
+from tempfile import TemporaryDirectory
+from typing import AsyncIterator, Iterable, Optional
+from uuid import UUID
 
 import crochet
+import scrapy
+from scrapy import signals
 from scrapy.crawler import CrawlerRunner
+from twisted.internet import defer, threads
 
+from intric.crawler.frontier import FrontierScheduler, RedisFrontier
+from intric.crawler.middlewares import ConditionalRequestMiddleware, SharedDelayMiddleware
 from intric.crawler.parse_html import CrawledPage
 from intric.crawler.pipelines import FileNamePipeline
 from intric.crawler.spiders.crawl_spider import CrawlSpider
 from intric.crawler.spiders.sitemap_spider import SitemapSpider
 from intric.main.config import SETTINGS
 from intric.main.exceptions import CrawlerException
+from intric.main.logging import get_logger
 from intric.websites.domain.crawl_run import CrawlType
 
+logger = get_logger(__name__)
+
+# ETag and Last-Modified of pages that have been crawled before, by url
+KnownPages = dict[str, tuple[Optional[str], Optional[str]]]
+
+# Pages that the crawl can get ahead of the ones that are being processed
+PAGE_QUEUE_SIZE = 100
+
+_CRAWL_DONE = object()
+
+
+class _QueueWaits:
+    """Keeps track of how long the crawl has been held up by a full page
+    queue, which is not counted towards the time the crawl may take."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._num_waiting = 0
+        self._since: Optional[float] = None
+        self._seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._num_waiting == 0:
+                self._since = time.monotonic()
+            self._num_waiting += 1
+
+    def stop(self):
+        with self._lock:
+            self._num_waiting -= 1
+            if self._num_waiting == 0:
+                self._seconds += time.monotonic() - self._since
+                self._since = None
+
+    def seconds(self) -> float:
+        with self._lock:
+            if self._since is None:
+                return self._seconds
+            return self._seconds + time.monotonic() - self._since
+
 
 @dataclass
 class Crawl:
-    pages: Iterable[CrawledPage]
+    # Yielded as they are crawled
+    pages: AsyncIterator[CrawledPage]
+    # Only complete once every page has been yielded
     files: Optional[Iterable[Path]]
 
 
-def create_runner(filepath: str, files_dir: Optional[str] = None):
+def create_runner(files_dir: Optional[str] = None, shared: bool = False):
     settings = {
-        "FEEDS": {filepath: {"format": "jsonl", "item_classes": [CrawledPage]}},
         "CLOSESPIDER_ITEMCOUNT": SETTINGS.closespider_itemcount,
         "AUTOTHROTTLE_ENABLED": SETTINGS.autothrottle_enabled,
         "ROBOTSTXT_OBEY": SETTINGS.obey_robots,
         "DOWNLOAD_MAXSIZE": SETTINGS.upload_max_file_size,
+        "DOWNLOADER_MIDDLEWARES": {ConditionalRequestMiddleware: 560},
     }
 
     if files_dir is not None:
         settings["ITEM_PIPELINES"] = {FileNamePipeline: 300}
         settings["FILES_STORE"] = files_dir
 
+    if shared:
+        # The requests come from, and go to, the frontier of the spider
+        settings["SCHEDULER"] = FrontierScheduler
+        settings["DOWNLOADER_MIDDLEWARES"][SharedDelayMiddleware] = 550
+        # Counted by the frontier, for the crawl as a whole
+        settings["CLOSESPIDER_ITEMCOUNT"] = 0
+
     return CrawlerRunner(settings=settings)
 
 
 class Crawler:
-    @crochet.wait_for(SETTINGS.crawl_max_length)
+    @crochet.run_in_reactor
     @staticmethod
-    def _run_crawl(
-        url: str,
-        download_files: bool = False,
-        *,
-        filepath: Path,
-        files_dir: Optional[Path],
+    def _start_crawl(runner: CrawlerRunner, crawler: scrapy.crawler.Crawler, **kwargs):
+        return runner.crawl(crawler, **kwargs)
+
+    @crochet.run_in_reactor
+    @staticmethod
+    def _stop_crawl(crawler: scrapy.crawler.Crawler):
+        return crawler.stop()
+
+    @staticmethod
+    def _put_pages_in(queue: asyncio.Queue, loop: asyncio.AbstractEventLoop, waits: _QueueWaits):
+        # Called in the reactor thread. A page is only done once it is in the
+        # queue, so a full queue holds up the crawl, which stops downloading
+        # while too many pages are waiting
+        def _on_item_scraped(item):
+            from twisted.internet import reactor
+
+            if not isinstance(item, CrawledPage):
+                return None
+
+            page_put = defer.Deferred()
+
+            waiting = queue.full()
+            if waiting:
+                waits.start()
+
+            def _on_put(_: Future):
+                if waiting:
+                    waits.stop()
+                reactor.callFromThread(page_put.callback, item)
+
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).add_done_callback(_on_put)
+
+            return page_put
+
+        return _on_item_scraped
+
+    @staticmethod
+    def _put_pages_in_frontier(frontier: RedisFrontier):
+        def _on_item_scraped(item):
+            if isinstance(item, CrawledPage):
+                # The item is only done once the page is in the frontier
+                return threads.deferToThread(frontier.push_page, item)
+
+        return _on_item_scraped
+
+    @staticmethod
+    async def _wait_for_crawl(
+        crawler: scrapy.crawler.Crawler,
+        result: crochet.EventualResult,
+        queue: Optional[asyncio.Queue] = None,
+        waits: Optional[_QueueWaits] = None,
     ):
-        files_dir = files_dir if download_files else None
-        runner = create_runner(filepath=filepath, files_dir=files_dir)
-        return runner.crawl(CrawlSpider, url=url)
+        # The time the crawl is held up by pages that are still being
+        # processed does not count, so that slow processing does not time out
+        # the crawl
+        started = time.monotonic()
+
+        try:
+            while True:
+                waited = waits.seconds() if waits is not None else 0
+                time_left = SETTINGS.crawl_max_length - (time.monotonic() - started - waited)
+                if time_left <= 0:
+                    Crawler._stop_crawl(crawler)
+                    raise CrawlerException(
+                        f"Crawl took longer than {SETTINGS.crawl_max_length} seconds"
+                    )
+
+                try:
+                    await asyncio.to_thread(result.wait, time_left)
+                    break
+                except crochet.TimeoutError:
+                    continue
+        finally:
+            if queue is not None:
+                await queue.put(_CRAWL_DONE)
+
+    @staticmethod
+    async def _iter_pages(queue: asyncio.Queue, crawl_done: asyncio.Task):
+        num_pages = 0
+        while (page := await queue.get()) is not _CRAWL_DONE:
+            num_pages += 1
+            yield page
+
+        # Raises what stopped the crawl, if anything did
+        await crawl_done
+
+        # (This will fail if the expected result is no pages but some files)
+        if num_pages == 0:
+            raise CrawlerException("Crawl failed")
 
-    @crochet.wait_for(SETTINGS.crawl_max_length)
     @staticmethod
-    def _run_sitemap_crawl(sitemap_url: str, *, filepath: Path, files_dir: Optional[Path]):
-        runner = create_runner(filepath=filepath)
-        return runner.crawl(SitemapSpider, sitemap_url=sitemap_url)
+    async def _iter_shared_pages(frontier: RedisFrontier):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SETTINGS.crawl_max_length
+
+        num_pages = 0
+        while True:
+            # The fetchers have put every page in the frontier before the crawl
+            # is stopped, so once it has stopped, the pages left are the last
+            stopped = await asyncio.to_thread(frontier.is_stopped)
+            page = await asyncio.to_thread(frontier.pop_page, None if stopped else 1)
+
+            if page is not None:
+                num_pages += 1
+                yield page
+            elif stopped:
+                break
+            elif loop.time() > deadline:
+                raise CrawlerException(
+                    f"Crawl took longer than {SETTINGS.crawl_max_length} seconds"
+                )
+
+        if num_pages == 0:
+            raise CrawlerException("Crawl failed")
 
     @asynccontextmanager
-    async def _crawl(self, func, **kwargs):
-        with NamedTemporaryFile() as tmp_file:
-            with TemporaryDirectory() as tmp_dir:
-                await asyncio.to_thread(func, filepath=tmp_file.name, files_dir=tmp_dir, **kwargs)
+    async def _crawl(self, spider_cls: type[scrapy.Spider], download_files: bool, **kwargs):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=PAGE_QUEUE_SIZE)
+        waits = _QueueWaits()
 
-                # If the result file is empty
-                # (This will fail if the expected result is no pages but some files)
-                if os.stat(tmp_file.name).st_size == 0:
-                    raise CrawlerException("Crawl failed")
+        with TemporaryDirectory() as tmp_dir:
+            runner = create_runner(files_dir=tmp_dir if download_files else None)
+            crawler = runner.create_crawler(spider_cls)
+            crawler.signals.connect(
+                self._put_pages_in(queue, loop, waits), signal=signals.item_scraped, weak=False
+            )
 
-                def _iter_pages():
-                    with open(tmp_file.name) as f:
-                        for line in f:
-                            jsonl = json.loads(line)
-                            yield CrawledPage(**jsonl)
+            result = self._start_crawl(runner, crawler, **kwargs)
+            crawl_done = asyncio.create_task(self._wait_for_crawl(crawler, result, queue, waits))
 
-                def _iter_files():
-                    p = Path(tmp_dir)
-                    return p.iterdir()
+            def _iter_files():
+                p = Path(tmp_dir)
+                return p.iterdir()
 
-                yield Crawl(pages=_iter_pages(), files=_iter_files())
+            try:
+                yield Crawl(pages=self._iter_pages(queue, crawl_done), files=_iter_files())
+            finally:
+                if not crawl_done.done():
+                    # Left before every page was done, so stop the crawl, and
+                    # drop the pages that are still on their way
+                    logger.info("Stopping the crawl before it is done")
+                    self._stop_crawl(crawler)
+
+                    while await queue.get() is not _CRAWL_DONE:
+                        pass
+
+                # The exception of the crawl, if there is one, has already
+                # been raised, or something else is being raised
+                await asyncio.gather(crawl_done, return_exceptions=True)
 
     @asynccontextmanager
     async def crawl(
@@ -90,18 +258,106 @@ class Crawler:
         url: str,
         download_files: bool = False,
         crawl_type: CrawlType = CrawlType.CRAWL,
+        known_pages: Optional[KnownPages] = None,
+        sitemap_lastmods: Optional[dict[str, str]] = None,
+        boilerplate_blocks: Iterable[int] = (),
     ):
+        """Crawls the website, and yields the pages while it is crawled.
+
+        Pages in `known_pages`, a dict of (etag, last modified) by url, are
+        requested conditionally. The ones that have not changed come back as
+        pages marked as unchanged, without content.
+
+        For sitemaps, the pages in `sitemap_lastmods`, a dict of <lastmod> by
+        url, whose <lastmod> has not changed, are not requested, and come back
+        as unchanged pages too.
+
+        The blocks in `boilerplate_blocks`, found by earlier crawls of the
+        website, are left out of the pages.
+        """
+        known_pages = known_pages or {}
+
         if crawl_type == CrawlType.CRAWL:
             async with self._crawl(
-                self._run_crawl,
-                url=url,
+                CrawlSpider,
                 download_files=download_files,
+                url=url,
+                known_pages=known_pages,
+                boilerplate_blocks=boilerplate_blocks,
             ) as crawl_result:
                 yield crawl_result
 
         elif crawl_type == CrawlType.SITEMAP:
-            async with self._crawl(self._run_sitemap_crawl, sitemap_url=url) as crawl_result:
+            async with self._crawl(
+                SitemapSpider,
+                download_files=False,
+                sitemap_url=url,
+                known_pages=known_pages,
+                sitemap_lastmods=sitemap_lastmods,
+                boilerplate_blocks=boilerplate_blocks,
+            ) as crawl_result:
                 yield crawl_result
 
         else:
             raise ValueError(f"crawl_type {crawl_type} is not a CrawlType")
+
+    @asynccontextmanager
+    async def crawl_shared(
+        self,
+        url: str,
+        run_id: UUID,
+        known_pages: Optional[KnownPages] = None,
+        boilerplate_blocks: Iterable[int] = (),
+    ):
+        """Starts a crawl that is shared between worker processes, and yields
+        the pages that they crawl.
+
+        The crawl is started in the frontier in redis, for the fetchers to
+        take it from there with `fetch`. This process is one of them, so that
+        the crawl goes on even if no other fetcher gets to run. The others are
+        queued by the caller, once this has been entered. Files are not
+        downloaded.
+        """
+        known_pages = known_pages or {}
+        frontier = RedisFrontier.for_run(run_id)
+
+        await asyncio.to_thread(
+            frontier.seed,
+            [url, *(page for page in known_pages if page != url)],
+            known_pages,
+            boilerplate_blocks,
+        )
+        fetch_task = asyncio.create_task(self.fetch(url=url, run_id=run_id))
+
+        try:
+            yield Crawl(pages=self._iter_shared_pages(frontier), files=[])
+        finally:
+            # Also stops the fetchers if the crawl is left before it is done
+            await asyncio.to_thread(frontier.close)
+
+            (fetched,) = await asyncio.gather(fetch_task, return_exceptions=True)
+            if isinstance(fetched, Exception):
+                logger.error("Fetcher of the crawl job failed", exc_info=fetched)
+
+    async def fetch(self, url: str, run_id: UUID):
+        """Crawls alongside the other fetchers of a crawl that `crawl_shared`
+        has started, until there is nothing left to crawl."""
+        frontier = RedisFrontier.for_run(run_id)
+        known_pages = await asyncio.to_thread(frontier.get_known_pages)
+        boilerplate_blocks = await asyncio.to_thread(frontier.get_boilerplate_blocks)
+
+        runner = create_runner(shared=True)
+        crawler = runner.create_crawler(CrawlSpider)
+        crawler.signals.connect(
+            self._put_pages_in_frontier(frontier), signal=signals.item_scraped, weak=False
+        )
+
+        result = self._start_crawl(
+            runner,
+            crawler,
+            url=url,
+            known_pages=known_pages,
+            frontier=frontier,
+            boilerplate_blocks=boilerplate_blocks,
+        )
+        await self._wait_for_crawl(crawler, result)
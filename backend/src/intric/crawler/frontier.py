@@ -0,0 +1,369 @@
+import json
+import pickle
+from collections import deque
+from typing import Iterable, Optional
+from uuid import UUID, uuid4
+
+import redis
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.log import failure_to_exc_info
+from scrapy.utils.request import fingerprint, request_from_dict
+from twisted.internet import defer, threads
+
+from intric.crawler.parse_html import CrawledPage
+from intric.main.config import SETTINGS
+from intric.main.logging import get_logger
+
+logger = get_logger(__name__)
+
+pool = redis.ConnectionPool.from_url(f"redis://{SETTINGS.redis_host}:{SETTINGS.redis_port}")
+
+# Long enough to outlive the crawl, so that nothing is left behind if it dies
+KEY_TTL = SETTINGS.crawl_max_length + 60 * 60
+
+# Pages that the fetchers can get ahead of the ones that are being processed
+MAX_PAGES_WAITING = 100
+
+# Requests that a fetcher takes from the frontier at a time
+REQUESTS_PER_FETCH = 8
+
+# Requests are only dropped as duplicates if they are filtered
+_PUSH = """
+local added = redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if added == 0 and ARGV[3] == '0' then
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# A fetcher that takes a request is busy until it is idle again
+_POP = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return false
+end
+local request = redis.call('LPOP', KEYS[1])
+if request then
+    redis.call('SADD', KEYS[2], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+return request
+"""
+
+# The crawl is done once there is nothing left to crawl, and no fetcher is
+# busy crawling something that can lead to more
+_IDLE = """
+redis.call('SREM', KEYS[2], ARGV[1])
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return 1
+end
+if redis.call('LLEN', KEYS[1]) == 0 and redis.call('SCARD', KEYS[2]) == 0 then
+    redis.call('SET', KEYS[3], 1, 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# The time of redis is used, since the fetchers can run on machines whose
+# clocks do not agree
+_RESERVE_SLOT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local at = math.max(now, tonumber(redis.call('GET', KEYS[1]) or now))
+local delay = tonumber(ARGV[1])
+redis.call('SET', KEYS[1], at + delay, 'PX', at - now + delay + 1000)
+return at - now
+"""
+
+
+class RedisFrontier:
+    """The urls left to crawl, and the urls already seen, of a crawl that is
+    shared between worker processes. The pages that the fetchers crawl are
+    put here too, for the crawl job to process.
+
+    The methods block, and are called from a thread of their own, never from
+    the reactor thread.
+    """
+
+    def __init__(self, client: redis.Redis, run_id: UUID):
+        prefix = f"crawl:{run_id}"
+        self.client = client
+        self.queue_key = f"{prefix}:queue"
+        self.seen_key = f"{prefix}:seen"
+        self.active_key = f"{prefix}:active"
+        self.stopped_key = f"{prefix}:stopped"
+        self.pages_key = f"{prefix}:pages"
+        self.num_pages_key = f"{prefix}:num_pages"
+        self.known_pages_key = f"{prefix}:known_pages"
+        self.boilerplate_key = f"{prefix}:boilerplate"
+        self.slot_prefix = f"{prefix}:slot"
+
+        self._push = client.register_script(_PUSH)
+        self._pop = client.register_script(_POP)
+        self._idle = client.register_script(_IDLE)
+        self._reserve_slot = client.register_script(_RESERVE_SLOT)
+
+    @classmethod
+    def for_run(cls, run_id: UUID) -> "RedisFrontier":
+        return cls(redis.Redis(connection_pool=pool), run_id)
+
+    def _keys(self) -> list[str]:
+        return [
+            self.queue_key,
+            self.seen_key,
+            self.active_key,
+            self.pages_key,
+            self.num_pages_key,
+            self.known_pages_key,
+            self.boilerplate_key,
+        ]
+
+    def seed(
+        self,
+        urls: list[str],
+        known_pages: dict[str, tuple[Optional[str], Optional[str]]],
+        boilerplate_blocks: Iterable[int] = (),
+    ):
+        boilerplate_blocks = list(boilerplate_blocks)
+        if boilerplate_blocks:
+            self.client.sadd(self.boilerplate_key, *boilerplate_blocks)
+            self.client.expire(self.boilerplate_key, KEY_TTL)
+
+        if known_pages:
+            self.client.hset(
+                self.known_pages_key,
+                mapping={url: json.dumps(validators) for url, validators in known_pages.items()},
+            )
+            self.client.expire(self.known_pages_key, KEY_TTL)
+
+        for url in urls:
+            self.push(scrapy.Request(url))
+
+    def get_known_pages(self) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        return {
+            url.decode(): tuple(json.loads(validators))
+            for url, validators in self.client.hgetall(self.known_pages_key).items()
+        }
+
+    def get_boilerplate_blocks(self) -> set[int]:
+        return {int(block) for block in self.client.smembers(self.boilerplate_key)}
+
+    def push(self, request: scrapy.Request, spider: Optional[scrapy.Spider] = None) -> bool:
+        """Adds the request to the urls to crawl, unless it has been seen before.
+
+        Returns whether it was added.
+        """
+        added = self._push(
+            keys=[self.seen_key, self.queue_key],
+            args=[
+                fingerprint(request).hex(),
+                pickle.dumps(request.to_dict(spider=spider)),
+                int(request.dont_filter),
+                KEY_TTL,
+            ],
+        )
+
+        return bool(added)
+
+    def pop(
+        self, fetcher_id: str, spider: Optional[scrapy.Spider] = None
+    ) -> Optional[scrapy.Request]:
+        """Takes the next request to crawl, if there is one, and marks the
+        fetcher as busy until it is idle again."""
+        request = self._pop(
+            keys=[self.queue_key, self.active_key, self.stopped_key], args=[fetcher_id, KEY_TTL]
+        )
+        if request is None:
+            return None
+
+        return request_from_dict(pickle.loads(request), spider=spider)
+
+    def has_requests(self) -> bool:
+        return not self.is_stopped() and self.client.llen(self.queue_key) > 0
+
+    def is_done(self, fetcher_id: str) -> bool:
+        """Marks the fetcher as idle, and returns whether the crawl is done."""
+        done = self._idle(
+            keys=[self.queue_key, self.active_key, self.stopped_key],
+            args=[fetcher_id, KEY_TTL],
+        )
+
+        return bool(done)
+
+    def reserve_slot(self, domain: str, delay: float) -> float:
+        """Reserves the next time to send a request to the domain, `delay`
+        seconds after the one before it, and returns the seconds to wait."""
+        wait_ms = self._reserve_slot(
+            keys=[f"{self.slot_prefix}:{domain}"], args=[int(delay * 1000)]
+        )
+
+        return wait_ms / 1000
+
+    def push_page(self, page: CrawledPage):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(self.pages_key, pickle.dumps(page))
+        pipe.expire(self.pages_key, KEY_TTL)
+        pipe.incr(self.num_pages_key)
+        pipe.expire(self.num_pages_key, KEY_TTL)
+        _, _, num_pages, _ = pipe.execute()
+
+        # The same limit as a crawl in one process, for the crawl as a whole
+        if num_pages >= SETTINGS.closespider_itemcount:
+            self.stop()
+
+    def pop_page(self, timeout: Optional[float] = None) -> Optional[CrawledPage]:
+        """Takes the next page that has been crawled, waiting up to `timeout`
+        seconds for one. Without a timeout, it does not wait."""
+        if timeout is None:
+            page = self.client.lpop(self.pages_key)
+        else:
+            popped = self.client.blpop([self.pages_key], timeout=timeout)
+            page = popped[1] if popped is not None else None
+
+        return pickle.loads(page) if page is not None else None
+
+    def num_pages_waiting(self) -> int:
+        return self.client.llen(self.pages_key)
+
+    def is_stopped(self) -> bool:
+        return bool(self.client.exists(self.stopped_key))
+
+    def stop(self):
+        self.client.set(self.stopped_key, 1, ex=KEY_TTL)
+
+    def close(self):
+        """Stops the fetchers that are still crawling, and removes the rest."""
+        self.stop()
+        self.client.delete(*self._keys())
+
+
+class FrontierScheduler:
+    """Scheduler that takes the requests to crawl from the frontier of the
+    spider, and puts the requests that it finds there, so that the requests
+    of one crawl are shared between the processes that crawl it.
+
+    The reactor thread is shared by every crawl in the process, so the
+    frontier is only ever called from the thread pool of the reactor. The
+    requests are taken a few at a time, ahead of when they are needed.
+
+    The spider is only closed once every fetcher is idle, since until then
+    any of them can find more to crawl.
+    """
+
+    def __init__(self, crawler: scrapy.crawler.Crawler):
+        self.crawler = crawler
+        self.fetcher_id = uuid4().hex
+        self.spider: Optional[scrapy.Spider] = None
+        self.frontier: Optional[RedisFrontier] = None
+
+        self._requests: deque[scrapy.Request] = deque()
+        self._num_in_flight = 0
+        self._taking = False
+        self._checking_done = False
+        self._done = False
+
+    @classmethod
+    def from_crawler(cls, crawler: scrapy.crawler.Crawler) -> "FrontierScheduler":
+        scheduler = cls(crawler)
+        crawler.signals.connect(scheduler._on_spider_idle, signal=signals.spider_idle)
+
+        return scheduler
+
+    def open(self, spider: scrapy.Spider):
+        self.spider = spider
+        self.frontier = spider.frontier
+
+    def close(self, reason: str) -> defer.Deferred:
+        logger.info(f"Fetcher {self.fetcher_id} closed: {reason}")
+
+        # Also when the fetcher is stopped before the crawl is done, so that
+        # the others do not wait for it
+        return threads.deferToThread(self.frontier.is_done, self.fetcher_id)
+
+    def _in_thread(self, func, *args) -> defer.Deferred:
+        # Counted as pending until done, so that the spider is not idle while
+        # requests are on their way to or from the frontier
+        self._num_in_flight += 1
+
+        def _done(result):
+            self._num_in_flight -= 1
+            return result
+
+        def _log_failure(failure):
+            logger.error("Frontier call failed", exc_info=failure_to_exc_info(failure))
+
+        return threads.deferToThread(func, *args).addBoth(_done).addErrback(_log_failure)
+
+    def _wake_engine(self):
+        engine = self.crawler.engine
+        if engine is not None and engine.slot is not None:
+            engine.slot.nextcall.schedule()
+
+    def has_pending_requests(self) -> bool:
+        return bool(self._requests) or self._num_in_flight > 0
+
+    def enqueue_request(self, request: scrapy.Request) -> bool:
+        # Requests seen before are dropped by the frontier
+        self._in_thread(self.frontier.push, request, self.spider)
+        self.crawler.stats.inc_value("scheduler/enqueued/redis", spider=self.spider)
+
+        return True
+
+    def _take_requests(self) -> list[scrapy.Request]:
+        # Held up while the crawl job is behind, the same as a crawl in one process
+        if self.frontier.num_pages_waiting() >= MAX_PAGES_WAITING:
+            return []
+
+        requests = []
+        while len(requests) < REQUESTS_PER_FETCH:
+            request = self.frontier.pop(self.fetcher_id, spider=self.spider)
+            if request is None:
+                break
+            requests.append(request)
+
+        return requests
+
+    def _start_taking_requests(self):
+        if self._taking or self._done:
+            return
+
+        def _on_taken(requests: Optional[list[scrapy.Request]]):
+            self._taking = False
+            if requests:
+                self._requests.extend(requests)
+                # Otherwise it is tried again on the next heartbeat of the engine
+                self._wake_engine()
+
+        self._taking = True
+        self._in_thread(self._take_requests).addCallback(_on_taken)
+
+    def next_request(self) -> Optional[scrapy.Request]:
+        if len(self._requests) <= REQUESTS_PER_FETCH // 2:
+            self._start_taking_requests()
+
+        if not self._requests:
+            return None
+
+        self.crawler.stats.inc_value("scheduler/dequeued/redis", spider=self.spider)
+        return self._requests.popleft()
+
+    def _on_spider_idle(self, spider: scrapy.Spider):
+        if self._done:
+            return
+
+        if not self._checking_done:
+
+            def _on_checked(done: Optional[bool]):
+                self._checking_done = False
+                self._done = bool(done)
+                if self._done:
+                    self._wake_engine()
+
+            self._checking_done = True
+            self._in_thread(self.frontier.is_done, self.fetcher_id).addCallback(_on_checked)
+
+        raise DontCloseSpider()
@@ -0,0 +1,175 @@
+import re
+
+from lxml import html
+
+_WHITESPACE = re.compile(r"\s+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Stands in for the indentation of nested lists until the spaces around the
+# text are cleaned up
+_INDENT = "\x00"
+
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+_BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "body",
+    "dd",
+    "details",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "header",
+    "html",
+    "main",
+    "nav",
+    "p",
+    "section",
+    "summary",
+}
+
+_BOLD_TAGS = {"b", "strong"}
+_ITALIC_TAGS = {"em", "i"}
+
+
+def html_to_markdown(element: html.HtmlElement) -> str:
+    """Writes the text of the element as markdown, straight from the parsed
+    tree, with links as they are in it.
+
+    Covers what matters for the text of a page: headings, paragraphs, lists,
+    links, emphasis, code, quotes and tables.
+    """
+    markdown = _render(element, list_depth=0)
+
+    lines = []
+    in_code = False
+    for line in markdown.split("\n"):
+        if line.startswith("```"):
+            in_code = not in_code
+            lines.append(line)
+        elif in_code:
+            lines.append(line.rstrip())
+        else:
+            lines.append(line.strip(" ").replace(_INDENT, "  "))
+
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def _block(text: str) -> str:
+    text = text.strip()
+    return f"\n\n{text}\n\n" if text else ""
+
+
+def _text(text: str | None) -> str:
+    return _WHITESPACE.sub(" ", text) if text else ""
+
+
+def _render_children(element: html.HtmlElement, list_depth: int) -> str:
+    parts = [_text(element.text)]
+    for child in element:
+        parts.append(_render(child, list_depth))
+        parts.append(_text(child.tail))
+
+    return "".join(parts)
+
+
+def _render_inline(element: html.HtmlElement) -> str:
+    # Headings, cells and links are kept on one line
+    return _WHITESPACE.sub(" ", _render_children(element, list_depth=0)).strip()
+
+
+def _render_list(element: html.HtmlElement, list_depth: int) -> str:
+    ordered = element.tag == "ol"
+    indent = _INDENT * list_depth
+
+    items = []
+    for number, item in enumerate((child for child in element if child.tag == "li"), start=1):
+        marker = f"{number}." if ordered else "*"
+        text = _render_children(item, list_depth + 1).strip()
+        items.append(f"{indent}{marker} {text}")
+
+    text = "\n".join(items)
+
+    # Nested lists belong to the item they are in
+    return f"\n{text}\n" if list_depth > 0 else _block(text)
+
+
+def _render_table(element: html.HtmlElement) -> str:
+    rows = []
+    for row in element.iter("tr"):
+        cells = [_render_inline(cell) for cell in row if cell.tag in ("td", "th")]
+        if not cells:
+            continue
+
+        rows.append(f"| {' | '.join(cells)} |")
+        if len(rows) == 1 and all(cell.tag == "th" for cell in row if cell.tag in ("td", "th")):
+            rows.append(f"|{'---|' * len(cells)}")
+
+    return _block("\n".join(rows))
+
+
+def _render(element: html.HtmlElement, list_depth: int) -> str:
+    tag = element.tag
+
+    # Comments and processing instructions, whose tail is left to the parent
+    if not isinstance(tag, str):
+        return ""
+
+    if tag in _HEADINGS:
+        return _block(f"{'#' * _HEADINGS[tag]} {_render_inline(element)}")
+
+    if tag in ("ul", "ol"):
+        return _render_list(element, list_depth)
+
+    if tag == "table":
+        return _render_table(element)
+
+    if tag == "pre":
+        return _block(f"```\n{element.text_content().strip(chr(10))}\n```")
+
+    if tag == "blockquote":
+        text = _render_children(element, list_depth).strip()
+        return _block("\n".join(f"> {line}" for line in text.split("\n")))
+
+    if tag == "br":
+        return "\n"
+
+    if tag == "hr":
+        return _block("* * *")
+
+    if tag == "a":
+        text = _render_inline(element)
+        href = element.get("href")
+        if not text or not href or href.startswith(("#", "javascript:")):
+            return text
+        return f"[{text}]({href})"
+
+    if tag == "img":
+        alt = _text(element.get("alt")).strip()
+        src = element.get("src")
+        return f"![{alt}]({src})" if alt and src else ""
+
+    if tag in _BOLD_TAGS or tag in _ITALIC_TAGS or tag == "code":
+        text = _render_children(element, list_depth)
+        if not text.strip():
+            return text
+
+        # The marker has to touch the text, but the spaces around it are kept
+        marker = "**" if tag in _BOLD_TAGS else "_" if tag in _ITALIC_TAGS else "`"
+        lead = " " if text[0].isspace() else ""
+        trail = " " if text[-1].isspace() else ""
+        return f"{lead}{marker}{text.strip()}{marker}{trail}"
+
+    text = _render_children(element, list_depth)
+
+    if tag in _BLOCK_TAGS or tag in ("li", "tr"):
+        return _block(text)
+
+    return text
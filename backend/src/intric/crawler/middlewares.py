@@ -0,0 +1,55 @@
+from urllib.parse import urlparse
+
+import scrapy
+from twisted.internet import threads
+from twisted.internet.task import deferLater
+
+from intric.main.config import SETTINGS
+
+
+class ConditionalRequestMiddleware:
+    """Sends the ETag and Last-Modified of pages that were crawled before back
+    with the requests for them, so that the server can answer 304 Not Modified
+    instead of sending a page that has not changed.
+
+    The validators are taken from `known_pages` of the spider, a dict of
+    (etag, last modified) by url, where either can be None.
+    """
+
+    def process_request(self, request: scrapy.Request, spider: scrapy.Spider):
+        etag, last_modified = getattr(spider, "known_pages", {}).get(request.url, (None, None))
+        if etag is not None:
+            request.headers.setdefault(b"If-None-Match", etag)
+        if last_modified is not None:
+            request.headers.setdefault(b"If-Modified-Since", last_modified)
+
+        return None
+
+
+class SharedDelayMiddleware:
+    """Spaces out the requests to each domain of a crawl that is shared between
+    worker processes, since the download delay of scrapy only holds within one
+    process.
+
+    The time of the next request to a domain is reserved in the `frontier` of
+    the spider, and the request is held back until then. The frontier is
+    called from the thread pool, so that the reactor is not blocked on it.
+    """
+
+    def process_request(self, request: scrapy.Request, spider: scrapy.Spider):
+        frontier = getattr(spider, "frontier", None)
+        if frontier is None:
+            return None
+
+        def _hold_back(wait: float):
+            if wait <= 0:
+                return None
+
+            from twisted.internet import reactor
+
+            return deferLater(reactor, wait, lambda: None)
+
+        netloc = urlparse(request.url).netloc
+        return threads.deferToThread(
+            frontier.reserve_slot, netloc, SETTINGS.shared_crawl_delay
+        ).addCallback(_hold_back)
@@ -1,32 +1,191 @@
-from dataclasses import dataclass
-from urllib.parse import urljoin
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
 
-from bs4 import BeautifulSoup
-from html2text import html2text
+from lxml import etree, html
 from scrapy.http import Response
 
+from intric.crawler.html_to_markdown import html_to_markdown
 from intric.files.text import TextMimeTypes
 
+# Elements without text for the page
+_SKIPPED_TAGS = (
+    "canvas",
+    "head",
+    "iframe",
+    "noscript",
+    "object",
+    "script",
+    "style",
+    "svg",
+    "template",
+)
+
+# Elements that can be repeated on every page of a website
+_BOILERPLATE_TAGS = (
+    "aside",
+    "div",
+    "footer",
+    "form",
+    "header",
+    "nav",
+    "ol",
+    "section",
+    "table",
+    "ul",
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
 
 @dataclass
 class CrawledPage:
     url: str
     title: str
     content: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Not modified since it was last crawled, and so without content
+    unchanged: bool = False
+    # <lastmod> of the page in the sitemap it was crawled from
+    sitemap_lastmod: Optional[str] = None
+    # Fingerprints of the blocks of the page that could be boilerplate
+    blocks: list[int] = field(default_factory=list)
+
+
+def _get_header(response: Response, name: bytes) -> Optional[str]:
+    value = response.headers.get(name)
+    return value.decode("latin-1") if value is not None else None
+
+
+def _fingerprint(tag: str, text: str) -> int:
+    # Unlike hash(), the same in every process, so that it can be stored
+    digest = hashlib.blake2b(f"{tag}\0{text}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class Boilerplate:
+    """The blocks of html that are repeated on the pages of a website, like
+    navigation, headers and footers, which are left out of the pages.
+
+    Which blocks are boilerplate is found by `BoilerplateCounter` in earlier
+    crawls of the website, and does not change during a crawl. The text of a
+    page therefore only depends on the page itself, and not on which other
+    pages were crawled before it, so a page that has not changed gets the same
+    text in every crawl. A block with at least half of the text of its page is
+    never left out, so that pages that are repeated in full are kept.
+    """
+
+    def __init__(self, blocks: Iterable[int] = ()):
+        self.blocks = frozenset(blocks)
+
+    def remove_from(self, body: html.HtmlElement) -> list[int]:
+        """Leaves out the boilerplate of the page, and returns the fingerprints
+        of every block of the page that could be boilerplate."""
+        page_length = len(_WHITESPACE.sub(" ", body.text_content()).strip())
+
+        blocks: dict[int, list[html.HtmlElement]] = {}
+        for element in body.iter(*_BOILERPLATE_TAGS):
+            text = _WHITESPACE.sub(" ", element.text_content()).strip()
+            if not text or 2 * len(text) >= page_length:
+                continue
+
+            blocks.setdefault(_fingerprint(element.tag, text), []).append(element)
+
+        for block, elements in blocks.items():
+            if block in self.blocks:
+                for element in elements:
+                    element.drop_tree()
+
+        return list(blocks)
+
+
+class BoilerplateCounter:
+    """Counts the pages of a crawl that every block is on, to find the
+    boilerplate of the next crawl of the website.
+
+    A block is boilerplate once it has been on `min_pages` pages.
+    """
+
+    def __init__(self, min_pages: int = 3, max_blocks: int = 100_000):
+        self.min_pages = min_pages
+        # So that a crawl of a huge website does not hold on to every block
+        self.max_blocks = max_blocks
+        self._num_pages: dict[int, int] = {}
+
+    def add(self, blocks: list[int]):
+        """Counts the blocks of one page."""
+        for block in blocks:
+            num_pages = self._num_pages.get(block)
+            if num_pages is None and len(self._num_pages) >= self.max_blocks:
+                continue
+
+            self._num_pages[block] = (num_pages or 0) + 1
+
+    def get_blocks(self) -> set[int]:
+        return {
+            block for block, num_pages in self._num_pages.items() if num_pages >= self.min_pages
+        }
+
+
+def _parse_html(
+    response: Response, boilerplate: Optional[Boilerplate]
+) -> tuple[Optional[str], str, list[int]]:
+    try:
+        document = html.document_fromstring(
+            response.body,
+            parser=html.HTMLParser(encoding=getattr(response, "encoding", None)),
+            base_url=response.url,
+        )
+    except etree.ParserError:
+        # Nothing to parse
+        return None, "", []
+
+    title = document.findtext(".//title")
+    document.make_links_absolute(response.url, handle_failures="ignore")
+
+    for element in list(document.iter(*_SKIPPED_TAGS)):
+        element.drop_tree()
+
+    body = document.find("body")
+    if body is None:
+        body = document
+
+    blocks = boilerplate.remove_from(body) if boilerplate is not None else []
+
+    return title, html_to_markdown(body), blocks
+
 
+def parse_response(response: Response, boilerplate: Optional[Boilerplate] = None):
+    """Parses the page into its text, as markdown, in one pass over the html.
 
-def parse_response(response: Response):
-    soup = BeautifulSoup(response.body, "lxml")
+    The blocks that are `boilerplate` are left out.
+    """
+    etag = _get_header(response, b"ETag")
+    last_modified = _get_header(response, b"Last-Modified")
 
-    # Replace relative links with absolute
-    for url in soup.find_all("a", href=True):
-        url["href"] = urljoin(response.url, url["href"])
+    if response.status == 304:
+        return CrawledPage(
+            url=response.url,
+            title="",
+            content="",
+            etag=etag,
+            last_modified=last_modified,
+            unchanged=True,
+        )
 
-    content = html2text(str(soup))
-    title = response.css("title::text").get()
+    title, content, blocks = _parse_html(response, boilerplate=boilerplate)
     url = response.url
 
-    return CrawledPage(url=url, title=title, content=content)
+    return CrawledPage(
+        url=url,
+        title=title,
+        content=content,
+        etag=etag,
+        last_modified=last_modified,
+        blocks=blocks,
+    )
 
 
 def parse_file(response: Response):
@@ -1,3 +1,4 @@
+from typing import TYPE_CHECKING, Iterable, Optional
 from urllib.parse import urlparse
 
 import scrapy
@@ -5,27 +6,54 @@ from scrapy.http import Response
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import Rule
 
-from intric.crawler.parse_html import parse_file, parse_response
+from intric.crawler.parse_html import Boilerplate, parse_file, parse_response
+
+if TYPE_CHECKING:
+    from intric.crawler.frontier import RedisFrontier
 
 
 class CrawlSpider(scrapy.spiders.CrawlSpider):
     name = "crawlspider"
 
+    # Pages that have not changed since the last crawl
+    handle_httpstatus_list = [304]
+
     def __init__(
         self,
         url: str,
         *args,
+        known_pages: Optional[dict[str, tuple[Optional[str], Optional[str]]]] = None,
+        frontier: Optional["RedisFrontier"] = None,
+        boilerplate_blocks: Iterable[int] = (),
         **kwargs,
     ):
         parsed_uri = urlparse(url)
 
         self.allowed_domains = [parsed_uri.netloc]
-        self.start_urls = [url]
+
+        # Links are not followed from pages that have not changed, so every
+        # page that was crawled before is requested on its own. New pages are
+        # linked from pages that have changed, and so are still found, but
+        # known pages are crawled for as long as they are served, whether or
+        # not anything still links to them. Only used when the incremental
+        # crawl of links is turned on.
+        self.known_pages = known_pages or {}
+        self.start_urls = [url, *(page for page in self.known_pages if page != url)]
+
+        # A crawl shared between worker processes takes its requests from the
+        # frontier, which the crawl job has already started with these
+        self.frontier = frontier
+        if frontier is not None:
+            self.start_urls = []
+
+        # Found by the earlier crawls of the website
+        self.boilerplate = Boilerplate(boilerplate_blocks)
 
         self.rules = [
             Rule(
                 LinkExtractor(allow=url),
                 callback=parse_response,
+                cb_kwargs={"boilerplate": self.boilerplate},
                 follow=True,
             ),
             Rule(LinkExtractor(deny_extensions=[]), callback=parse_file),
@@ -34,4 +62,4 @@ class CrawlSpider(scrapy.spiders.CrawlSpider):
         super().__init__(*args, **kwargs)
 
     def parse_start_url(self, response: Response):
-        return parse_response(response)
+        return parse_response(response, boilerplate=self.boilerplate)
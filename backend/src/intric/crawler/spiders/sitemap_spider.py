@@ -1,16 +1,67 @@
+from typing import Iterable, Optional
+
 import scrapy
 from scrapy.http import Response
 
-from intric.crawler.parse_html import parse_response
+from intric.crawler.parse_html import Boilerplate, CrawledPage, parse_response
 
 
 class SitemapSpider(scrapy.spiders.SitemapSpider):
     name = "sitemapspider"
 
-    def __init__(self, sitemap_url: str, *args, **kwargs):
+    # Pages that have not changed since the last crawl
+    handle_httpstatus_list = [304]
+
+    def __init__(
+        self,
+        sitemap_url: str,
+        *args,
+        known_pages: Optional[dict[str, tuple[Optional[str], Optional[str]]]] = None,
+        sitemap_lastmods: Optional[dict[str, str]] = None,
+        boilerplate_blocks: Iterable[int] = (),
+        **kwargs,
+    ):
         self.sitemap_urls = [sitemap_url]
+        self.known_pages = known_pages or {}
+
+        # Pages whose <lastmod> is the same as when they were last crawled are
+        # not requested at all, but are still reported as unchanged, so that
+        # only the pages no longer in the sitemap are removed
+        self.sitemap_lastmods = sitemap_lastmods or {}
+        self._lastmods: dict[str, str] = {}
+        self._unchanged_pages: list[CrawledPage] = []
+
+        # Found by the earlier crawls of the website
+        self.boilerplate = Boilerplate(boilerplate_blocks)
 
         super().__init__(*args, **kwargs)
 
+    def sitemap_filter(self, entries):
+        for entry in entries:
+            url, lastmod = entry.get("loc"), entry.get("lastmod")
+
+            if lastmod is not None and self.sitemap_lastmods.get(url) == lastmod:
+                self._unchanged_pages.append(
+                    CrawledPage(
+                        url=url, title="", content="", unchanged=True, sitemap_lastmod=lastmod
+                    )
+                )
+                continue
+
+            if lastmod is not None:
+                self._lastmods[url] = lastmod
+
+            yield entry
+
+    def _parse_sitemap(self, response: Response):
+        yield from super()._parse_sitemap(response)
+
+        # Found while the sitemap was filtered
+        while self._unchanged_pages:
+            yield self._unchanged_pages.pop()
+
     def parse(self, response: Response):
-        return parse_response(response)
+        page = parse_response(response, boilerplate=self.boilerplate)
+        page.sitemap_lastmod = self._lastmods.get(response.url)
+
+        return page
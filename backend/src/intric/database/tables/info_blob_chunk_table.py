@@ -1,24 +1,74 @@
+from typing import Optional
 from uuid import UUID
 
+import sqlalchemy as sa
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import ForeignKey
+from sqlalchemy import FetchedValue, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
+from intric.database.tables.ai_models_table import EmbeddingModels
 from intric.database.tables.base_class import BasePublic
 from intric.database.tables.info_blobs_table import InfoBlobs
 from intric.database.tables.tenant_table import Tenants
 
+# The embedding column is shared by every embedding model and is therefore
+# untyped, which means that it can not be indexed as a whole. Instead, every
+# supported dimension gets its own partial expression index over the rows of
+# that dimension. Adding a dimension requires a migration.
+HNSW_INDEXED_DIMENSIONS = (512, 1024, 1536)
+
+# Text search configuration of the full-text index, created by a migration.
+# Like the "simple" configuration it does no stemming, which keeps it language
+# agnostic and makes it well suited for exact terms such as case numbers and
+# product codes, but it leaves out English and Swedish stop words, which would
+# otherwise match almost every chunk.
+TEXT_SEARCH_CONFIG = "keyword_search"
+
+
+def _hnsw_index(dimensions: int) -> Index:
+    return Index(
+        f"ix_info_blob_chunks_embedding_hnsw_{dimensions}",
+        sa.text(f"(embedding::vector({dimensions})) vector_cosine_ops"),
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_where=sa.text(f"vector_dims(embedding) = {dimensions}"),
+    )
+
 
 class InfoBlobChunks(BasePublic):
     text: Mapped[str] = mapped_column()
     chunk_no: Mapped[int] = mapped_column()
     size: Mapped[int] = mapped_column()
     embedding: Mapped[list[float]] = mapped_column(Vector)
+    # Stored, so that ranking the matches of a search does not have to read
+    # and parse the text of every match. Set to
+    # to_tsvector(TEXT_SEARCH_CONFIG, text) by a trigger
+    text_search: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        deferred=True,
+    )
 
     # Foreign keys
     info_blob_id: Mapped[UUID] = mapped_column(
         ForeignKey(InfoBlobs.id, ondelete="CASCADE"), index=True
     )
-    tenant_id: Mapped[UUID] = mapped_column(
-        ForeignKey(Tenants.id, ondelete="CASCADE"), index=True
+    tenant_id: Mapped[UUID] = mapped_column(ForeignKey(Tenants.id, ondelete="CASCADE"), index=True)
+    # Set on the chunks of a re-embedding that is still in progress, which are
+    # not searched until they replace the chunks of the current embedding model
+    staged_embedding_model_id: Mapped[Optional[UUID]] = mapped_column(
+        ForeignKey(EmbeddingModels.id, ondelete="CASCADE")
+    )
+
+    __table_args__ = (
+        *(_hnsw_index(dimensions) for dimensions in HNSW_INDEXED_DIMENSIONS),
+        Index("ix_info_blob_chunks_text_search", "text_search", postgresql_using="gin"),
+        Index(
+            "ix_info_blob_chunks_staged",
+            "info_blob_id",
+            "staged_embedding_model_id",
+            postgresql_where=sa.text("staged_embedding_model_id IS NOT NULL"),
+        ),
     )
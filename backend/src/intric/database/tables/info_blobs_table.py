@@ -18,6 +18,16 @@ class InfoBlobs(BasePublic):
     title: Mapped[Optional[str]] = mapped_column()
     url: Mapped[Optional[str]] = mapped_column()
     size: Mapped[int] = mapped_column()
+    # SHA-256 of the text, used to skip re-embedding unchanged content
+    content_hash: Mapped[Optional[str]] = mapped_column()
+    # SHA-256 of the file the text was extracted from, if any, used to skip
+    # extracting and embedding the same file again
+    file_checksum: Mapped[Optional[str]] = mapped_column()
+    # Response headers of a crawled page, sent back to check if it has changed
+    etag: Mapped[Optional[str]] = mapped_column()
+    last_modified: Mapped[Optional[str]] = mapped_column()
+    # <lastmod> of the page in the sitemap it was crawled from
+    sitemap_lastmod: Mapped[Optional[str]] = mapped_column()
 
     # Foreign keys
     user_id: Mapped[UUID] = mapped_column(ForeignKey(Users.id, ondelete="CASCADE"), index=True)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from intric.database.tables.base_class import BasePublic
@@ -16,3 +16,21 @@ class Jobs(BasePublic):
     result_location: Mapped[Optional[str]] = mapped_column()
     name: Mapped[Optional[str]] = mapped_column()
     finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # The resource the job works on, for jobs of which only one may run per resource
+    resource_id: Mapped[Optional[UUID]] = mapped_column()
+
+    __table_args__ = (
+        # Running jobs of a user are looked up on every poll
+        Index(
+            "ix_jobs_user_id_created_at_unfinished",
+            "user_id",
+            "created_at",
+            postgresql_where=text("finished_at IS NULL"),
+        ),
+        Index(
+            "ix_jobs_task_resource_id_unfinished",
+            "task",
+            "resource_id",
+            postgresql_where=text("finished_at IS NULL AND resource_id IS NOT NULL"),
+        ),
+    )
@@ -2,10 +2,11 @@ from typing import Optional
 from uuid import UUID
 
 from sqlalchemy import BigInteger, ForeignKey, and_, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
 from intric.database.tables.ai_models_table import EmbeddingModels
-from intric.database.tables.base_class import BasePublic
+from intric.database.tables.base_class import BaseCrossReference, BasePublic
 from intric.database.tables.collections_table import CollectionsTable
 from intric.database.tables.job_table import Jobs
 from intric.database.tables.spaces_table import Spaces
@@ -68,3 +69,11 @@ class Websites(BasePublic):
             viewonly=True,
         )
         return {"properties": {"latest_crawl": latest_crawl_relationship}}
+
+
+class WebsiteBoilerplate(BaseCrossReference):
+    website_id: Mapped[UUID] = mapped_column(
+        ForeignKey(Websites.id, ondelete="CASCADE"), primary_key=True
+    )
+    # Fingerprints of the blocks of html that are left out of the pages
+    blocks: Mapped[list[int]] = mapped_column(ARRAY(BigInteger))
@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING
+
+from intric.jobs.job_models import Task
+from intric.jobs.task_models import ReembedTask
+from intric.main.exceptions import BadRequestException, UnauthorizedException
+from intric.main.logging import get_logger
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from intric.actors.actor_manager import ActorManager
+    from intric.embedding_models.domain.embedding_model import EmbeddingModel
+    from intric.embedding_models.domain.embedding_model_repo import (
+        EmbeddingModelRepository,
+    )
+    from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+    from intric.embedding_models.infrastructure.create_embeddings_service import (
+        CreateEmbeddingsService,
+    )
+    from intric.embedding_models.infrastructure.reembedding_repo import ReembeddingRepo
+    from intric.groups_legacy.group_service import GroupService
+    from intric.info_blobs.info_blob_chunk_repo import InfoBlobChunkRepo
+    from intric.integration.domain.repositories.integration_knowledge_repo import (
+        IntegrationKnowledgeRepository,
+    )
+    from intric.jobs.job_models import JobInDb
+    from intric.jobs.job_service import JobService
+    from intric.spaces.space_service import SpaceService
+    from intric.users.user import UserInDB
+    from intric.websites.infrastructure.update_website_size_service import (
+        UpdateWebsiteSizeService,
+    )
+
+logger = get_logger(__name__)
+
+
+class ReembeddingService:
+    def __init__(
+        self,
+        user: "UserInDB",
+        space_service: "SpaceService",
+        actor_manager: "ActorManager",
+        job_service: "JobService",
+        embedding_model_repo: "EmbeddingModelRepository",
+        integration_knowledge_repo: "IntegrationKnowledgeRepository",
+        reembedding_repo: "ReembeddingRepo",
+        info_blob_chunk_repo: "InfoBlobChunkRepo",
+        create_embeddings_service: "CreateEmbeddingsService",
+        group_service: "GroupService",
+        update_website_size_service: "UpdateWebsiteSizeService",
+    ):
+        self.user = user
+        self.space_service = space_service
+        self.actor_manager = actor_manager
+        self.job_service = job_service
+        self.embedding_model_repo = embedding_model_repo
+        self.integration_knowledge_repo = integration_knowledge_repo
+        self.reembedding_repo = reembedding_repo
+        self.chunk_repo = info_blob_chunk_repo
+        self.create_embeddings_service = create_embeddings_service
+        self.group_service = group_service
+        self.update_website_size_service = update_website_size_service
+
+    async def _get_current_embedding_model(self, source: "KnowledgeSource"):
+        if source.group_id is not None:
+            space = await self.space_service.get_space_by_collection(source.group_id)
+            actor = self.actor_manager.get_space_actor_from_space(space)
+            can_edit = actor.can_edit_collections()
+            resource = space.get_collection(source.group_id)
+
+        elif source.website_id is not None:
+            space = await self.space_service.get_space_by_website(source.website_id)
+            actor = self.actor_manager.get_space_actor_from_space(space)
+            can_edit = actor.can_edit_websites()
+            resource = space.get_website(source.website_id)
+
+        else:
+            knowledge = await self.integration_knowledge_repo.one(
+                id=source.integration_knowledge_id
+            )
+            space = await self.space_service.get_space(knowledge.space_id)
+            actor = self.actor_manager.get_space_actor_from_space(space)
+            can_edit = actor.can_create_integration_knowledge_list()
+            resource = space.get_integration_knowledge(source.integration_knowledge_id)
+
+        if not can_edit:
+            raise UnauthorizedException()
+
+        return space, resource.embedding_model
+
+    async def queue_reembedding(
+        self, source: "KnowledgeSource", embedding_model_id: "UUID"
+    ) -> "JobInDb":
+        """Queues a job that moves the knowledge source to another embedding
+        model. The source keeps being searched with its current embedding
+        model until the job is done.
+
+        Queueing the job again resumes a job that was stopped.
+        """
+        space, current_embedding_model = await self._get_current_embedding_model(source)
+        embedding_model = space.get_embedding_model(embedding_model_id)
+
+        if current_embedding_model is not None and current_embedding_model.id == embedding_model.id:
+            raise BadRequestException(f"Already embedded with {embedding_model.name}.")
+
+        # Two jobs would stage chunks for the same info blobs, or discard the
+        # chunks that the other one has staged
+        if await self.job_service.has_running_job(Task.REEMBED, resource_id=source.id):
+            raise BadRequestException("Already being re-embedded.")
+
+        params = ReembedTask(
+            user_id=self.user.id, source=source, embedding_model_id=embedding_model.id
+        )
+
+        return await self.job_service.queue_job(
+            Task.REEMBED,
+            name=f"Re-embed with {embedding_model.name}",
+            task_params=params,
+            resource_id=source.id,
+        )
+
+    async def get_embedding_model(self, embedding_model_id: "UUID") -> "EmbeddingModel":
+        return await self.embedding_model_repo.one(model_id=embedding_model_id)
+
+    async def get_progress(self, source: "KnowledgeSource", embedding_model_id: "UUID"):
+        return await self.reembedding_repo.get_progress(source, embedding_model_id)
+
+    async def discard_other_reembeddings(
+        self, source: "KnowledgeSource", embedding_model_id: "UUID"
+    ):
+        await self.reembedding_repo.delete_staged_chunks_of_other_models(source, embedding_model_id)
+
+    async def reembed_next_info_blobs(
+        self, source: "KnowledgeSource", embedding_model: "EmbeddingModel", limit: int
+    ) -> int:
+        """Stages chunks of the embedding model for the next info blobs that
+        need them, and returns the number of info blobs re-embedded."""
+        info_blob_ids = await self.reembedding_repo.get_info_blob_ids_to_reembed(
+            source, embedding_model.id, limit=limit
+        )
+        if not info_blob_ids:
+            return 0
+
+        # The text of the current chunks is embedded again, so the chunks
+        # stay the same and the text does not have to be split again
+        chunks = await self.chunk_repo.get_by_info_blobs(info_blob_ids)
+
+        # Requests go through the request limiter of the embedding model,
+        # which keeps re-embedding within the limits of the provider
+        async for chunk_embedding_list in self.create_embeddings_service.iter_embeddings(
+            model=embedding_model, chunks=chunks
+        ):
+            for batch_chunks, embeddings in chunk_embedding_list.batches(1000):
+                await self.chunk_repo.copy(
+                    batch_chunks, embeddings, staged_embedding_model_id=embedding_model.id
+                )
+
+        return len(info_blob_ids)
+
+    async def switch(self, source: "KnowledgeSource", embedding_model: "EmbeddingModel") -> bool:
+        if not await self.reembedding_repo.switch_embedding_model(source, embedding_model.id):
+            logger.info(f"Info blobs are being added to {source}, not switching yet")
+            return False
+
+        if source.group_id is not None:
+            await self.group_service.update_group_size(source.group_id)
+        elif source.website_id is not None:
+            await self.update_website_size_service.update_website_size(source.website_id)
+
+        logger.info(f"Switched {source} to embedding model {embedding_model.name}")
+
+        return True
@@ -0,0 +1,28 @@
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, model_validator
+
+
+class KnowledgeSource(BaseModel):
+    """A collection, website or integration knowledge, the info blobs of
+    which are all embedded with the embedding model of the source."""
+
+    group_id: Optional[UUID] = None
+    website_id: Optional[UUID] = None
+    integration_knowledge_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def require_exactly_one_id(self) -> "KnowledgeSource":
+        ids = (self.group_id, self.website_id, self.integration_knowledge_id)
+
+        if sum(id is not None for id in ids) != 1:
+            raise ValueError(
+                "Exactly one of 'group_id', 'website_id' and 'integration_knowledge_id' is required"
+            )
+
+        return self
+
+    @property
+    def id(self) -> UUID:
+        return self.group_id or self.website_id or self.integration_knowledge_id
@@ -1,32 +1,70 @@
 import abc
 from abc import abstractmethod
+from typing import Iterator
 
+from intric.completion_models.infrastructure.context_builder import count_tokens
 from intric.embedding_models.domain.embedding_model import EmbeddingModel
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    EmbeddingRequestLimiter,
+    embedding_request_limiter,
+)
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
 from intric.info_blobs.info_blob import InfoBlobChunk
 
 
 class EmbeddingModelAdapter(abc.ABC):
-    def __init__(self, model: EmbeddingModel):
+    # Limits of a single embeddings request to the provider
+    max_batch_items: int = 2048
+    max_batch_tokens: int = 300_000
+
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        request_limiter: EmbeddingRequestLimiter = embedding_request_limiter,
+    ):
         self.model = model
+        self.request_limiter = request_limiter
+
+    def _count_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def _get_max_batch_tokens(self) -> int:
+        batch_scale = self.request_limiter.get_batch_scale(self.model.name)
+        return max(int(self.max_batch_tokens * batch_scale), 1)
+
+    def get_batches(self, chunks: list["InfoBlobChunk"]) -> Iterator[list["InfoBlobChunk"]]:
+        """Batches the chunks into requests, by token count and number of items.
+
+        The token budget is checked anew for every batch, so that batches
+        shrink and grow with the rate limits while a large ingest is running.
+        """
+        batch = []
+        batch_tokens = 0
+        max_batch_tokens = self._get_max_batch_tokens()
+        for chunk in chunks:
+            tokens = self._count_tokens(chunk.text)
+
+            if batch and (
+                batch_tokens + tokens > max_batch_tokens or len(batch) >= self.max_batch_items
+            ):
+                yield batch
 
-    def _chunk_chunks(self, chunks: list["InfoBlobChunk"]):
-        cum_len = 0
-        prev_i = 0
-        for i, chunk in enumerate(chunks):
-            cum_len += len(chunk.text)
+                batch = []
+                batch_tokens = 0
+                max_batch_tokens = self._get_max_batch_tokens()
 
-            if cum_len > self.model.max_input:
-                yield chunks[prev_i:i]
-                prev_i = i
-                cum_len = 0
+            batch.append(chunk)
+            batch_tokens += tokens
 
-        yield chunks[prev_i:]
+        if batch:
+            yield batch
 
     @abstractmethod
     async def get_embedding_for_query(self, query: str):
         raise NotImplementedError
 
     @abstractmethod
-    async def get_embeddings(self, chunks: list[InfoBlobChunk]) -> ChunkEmbeddingList:
+    async def get_embeddings_for_batch(self, chunks: list[InfoBlobChunk]) -> ChunkEmbeddingList:
+        """Embeds the chunks, a batch from `get_batches`, in a single request to
+        the provider."""
         raise NotImplementedError
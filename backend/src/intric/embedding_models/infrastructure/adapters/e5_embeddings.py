@@ -1,18 +1,31 @@
-from tenacity import retry, stop_after_attempt, wait_random_exponential
+from tenacity import (
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 from intric.embedding_models.infrastructure.adapters.base import (
     EmbeddingModelAdapter,
 )
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    parse_retry_after,
+)
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
 from intric.info_blobs.info_blob import InfoBlobChunk
 from intric.main.aiohttp_client import aiohttp_client
 from intric.main.config import get_settings
+from intric.main.exceptions import RateLimitException
 from intric.main.logging import get_logger
 
 logger = get_logger(__name__)
 
 
 class E5Adapter(EmbeddingModelAdapter):
+    # Keep the requests to the self-hosted inference server moderately sized
+    max_batch_items = 128
+    max_batch_tokens = 32_768
+
     async def get_embedding_for_query(self, query: str):
         truncated_query = query[: self.model.max_input]
         query_prepended = [f"query: {truncated_query}"]
@@ -20,24 +33,37 @@ class E5Adapter(EmbeddingModelAdapter):
         embeddings = await self._get_embeddings(query_prepended)
         return embeddings[0]
 
-    async def get_embeddings(self, chunks: list[InfoBlobChunk]):
-        chunk_embedding_list = ChunkEmbeddingList()
-        for chunked_chunks in self._chunk_chunks(chunks):
-            texts_prepended = [f"passage: {chunk.text}" for chunk in chunked_chunks]
+    async def get_embeddings_for_batch(self, chunks: list[InfoBlobChunk]):
+        texts_prepended = [f"passage: {chunk.text}" for chunk in chunks]
 
-            logger.debug(f"Embedding a chunk of {len(chunked_chunks)} chunks")
+        logger.debug(f"Embedding a chunk of {len(chunks)} chunks")
 
-            embeddings_for_chunks = await self._get_embeddings(texts_prepended)
-            chunk_embedding_list.add(chunked_chunks, embeddings_for_chunks)
+        embeddings_for_chunks = await self._get_embeddings(texts_prepended)
+        chunk_embedding_list = ChunkEmbeddingList()
+        chunk_embedding_list.add(chunks, embeddings_for_chunks)
 
         return chunk_embedding_list
 
-    @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
+    @retry(
+        wait=wait_random_exponential(min=1, max=20),
+        stop=stop_after_attempt(3),
+        # Rate limits are waited out by the request limiter instead
+        retry=retry_if_not_exception_type(RateLimitException),
+    )
     async def _get_embeddings(self, texts: list[str]) -> list[list[float]]:
         payload = {"input": texts, "model": self.model.name}
 
         url = f"{get_settings().infinity_url}/embeddings"
         async with aiohttp_client().post(url, json=payload) as resp:
+            if resp.status == 429:
+                retry_after = parse_retry_after(resp.headers)
+                self.request_limiter.on_rate_limited(self.model.name, retry_after=retry_after)
+                raise RateLimitException(
+                    "Embedding server ratelimit exception", retry_after=retry_after
+                )
+
             data = await resp.json()
 
+        self.request_limiter.on_success(self.model.name)
+
         return [embedding["embedding"] for embedding in data["data"]]
@@ -9,9 +9,19 @@ from tenacity import (
 )
 
 from intric.embedding_models.infrastructure.adapters.base import EmbeddingModelAdapter
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    EmbeddingRequestLimiter,
+    embedding_request_limiter,
+    parse_duration,
+    parse_retry_after,
+)
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
 from intric.main.config import get_settings
-from intric.main.exceptions import BadRequestException, OpenAIException
+from intric.main.exceptions import (
+    BadRequestException,
+    OpenAIException,
+    RateLimitException,
+)
 from intric.main.logging import get_logger
 
 if TYPE_CHECKING:
@@ -23,23 +33,27 @@ logger = get_logger(__name__)
 
 
 class OpenAIEmbeddingAdapter(EmbeddingModelAdapter):
+    # Limits of the embeddings endpoint, per request
+    max_batch_items = 2048
+    max_batch_tokens = 300_000
+
     def __init__(
         self,
         model: "EmbeddingModel",
         client=openai.AsyncOpenAI(api_key=get_settings().openai_api_key),
+        request_limiter: EmbeddingRequestLimiter = embedding_request_limiter,
     ):
         self.client = client
-        super().__init__(model)
+        super().__init__(model, request_limiter=request_limiter)
 
-    async def get_embeddings(self, chunks: list["InfoBlobChunk"]) -> ChunkEmbeddingList:
-        chunk_embedding_list = ChunkEmbeddingList()
-        for chunked_chunks in self._chunk_chunks(chunks):
-            texts_for_chunks = [chunk.text for chunk in chunked_chunks]
+    async def get_embeddings_for_batch(self, chunks: list["InfoBlobChunk"]) -> ChunkEmbeddingList:
+        texts_for_chunks = [chunk.text for chunk in chunks]
 
-            logger.debug(f"Embedding a chunk of {len(chunked_chunks)} chunks")
+        logger.debug(f"Embedding a chunk of {len(chunks)} chunks")
 
-            embeddings_for_chunks = await self._get_embeddings(texts=texts_for_chunks)
-            chunk_embedding_list.add(chunked_chunks, embeddings_for_chunks)
+        embeddings_for_chunks = await self._get_embeddings(texts=texts_for_chunks)
+        chunk_embedding_list = ChunkEmbeddingList()
+        chunk_embedding_list.add(chunks, embeddings_for_chunks)
 
         return chunk_embedding_list
 
@@ -51,7 +65,8 @@ class OpenAIEmbeddingAdapter(EmbeddingModelAdapter):
     @retry(
         wait=wait_random_exponential(min=1, max=20),
         stop=stop_after_attempt(3),
-        retry=retry_if_not_exception_type(BadRequestException),
+        # Rate limits are waited out by the request limiter instead
+        retry=retry_if_not_exception_type((BadRequestException, RateLimitException)),
         reraise=True,
     )
     async def _get_embeddings(self, texts: list[str]):
@@ -63,17 +78,29 @@ class OpenAIEmbeddingAdapter(EmbeddingModelAdapter):
             if self.model.dimensions is not None:
                 params["dimensions"] = self.model.dimensions
 
-            # Call the OpenAI API to get the embeddings
-            response = await self.client.embeddings.create(**params)
+            # Call the OpenAI API to get the embeddings, with the rate limit headers
+            raw_response = await self.client.embeddings.with_raw_response.create(**params)
+            response = raw_response.parse()
 
         except openai.BadRequestError as e:
             logger.exception("Bad request error:")
             raise BadRequestException("Invalid input") from e
         except openai.RateLimitError as e:
-            logger.exception("Rate limit error:")
-            raise OpenAIException("OpenAI Ratelimit exception") from e
+            retry_after = parse_retry_after(e.response.headers)
+            logger.warning(f"Rate limit error, retry after {retry_after} seconds")
+
+            self.request_limiter.on_rate_limited(self.model.name, retry_after=retry_after)
+            raise RateLimitException("OpenAI Ratelimit exception", retry_after=retry_after) from e
         except Exception as e:
             logger.exception("Unknown OpenAI exception:")
             raise OpenAIException("Unknown OpenAI exception") from e
 
+        remaining_tokens = raw_response.headers.get("x-ratelimit-remaining-tokens")
+        self.request_limiter.on_success(
+            self.model.name,
+            remaining_tokens=int(remaining_tokens) if remaining_tokens else None,
+            reset_tokens_after=parse_duration(raw_response.headers.get("x-ratelimit-reset-tokens")),
+            batch_tokens=response.usage.prompt_tokens,
+        )
+
         return [embedding.embedding for embedding in response.data]
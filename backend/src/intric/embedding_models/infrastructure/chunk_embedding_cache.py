@@ -0,0 +1,149 @@
+import hashlib
+import time
+from typing import TYPE_CHECKING, Optional
+from uuid import UUID
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from intric.embedding_models.infrastructure.query_embedding_cache import (
+    QueryEmbeddingCache,
+)
+from intric.main.config import get_settings
+from intric.main.logging import get_logger
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger(__name__)
+
+REDIS_KEY_PREFIX = "chunk_embedding"
+
+
+class ChunkEmbeddingCache(QueryEmbeddingCache):
+    """Cache for the embeddings of chunks, which lets boilerplate that is
+    repeated across pages, documents and tenants be embedded only once.
+
+    Works like the query embedding cache, but is keyed on a hash of the
+    whitespace-normalized text, looks up and stores whole batches at a time
+    and keeps the embeddings as float32 arrays in the in-process tier.
+    """
+
+    key_prefix = REDIS_KEY_PREFIX
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl: int,
+        redis: Optional["Redis"] = None,
+        max_redis_entries: int = 0,
+    ):
+        super().__init__(max_size=max_size, ttl=ttl, redis=redis)
+        self.max_redis_entries = max_redis_entries
+
+        # The keys in redis, scored by when they were last used, so that the
+        # least recently used can be evicted once there are too many
+        self.index_key = f"{self.key_prefix}:index"
+
+    def _key(self, model_id: UUID, text: str) -> str:
+        text_hash = hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+        return f"{self.key_prefix}:{model_id}:{text_hash}"
+
+    async def _get_many_redis(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        if self.redis is None or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = await self.redis.mget(keys)
+
+            hits = {key: time.time() for key, value in zip(keys, values) if value is not None}
+            if hits:
+                await self.redis.zadd(self.index_key, hits, xx=True)
+        except Exception:
+            logger.warning("Could not read chunk embeddings from redis", exc_info=True)
+            return [None] * len(keys)
+
+        return [
+            np.frombuffer(value, dtype=np.float32) if value is not None else None
+            for value in values
+        ]
+
+    async def _set_many_redis(self, entries: dict[str, np.ndarray]):
+        if self.redis is None or not entries:
+            return
+
+        now = time.time()
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, embedding in entries.items():
+                    pipe.set(key, embedding.tobytes(), ex=self.ttl)
+                pipe.zadd(self.index_key, dict.fromkeys(entries, now))
+                # Keys that have expired on their own
+                pipe.zremrangebyscore(self.index_key, "-inf", now - self.ttl)
+                pipe.zcard(self.index_key)
+
+                *_, num_entries = await pipe.execute()
+
+            if self.max_redis_entries and num_entries > self.max_redis_entries:
+                evicted = await self.redis.zpopmin(
+                    self.index_key, num_entries - self.max_redis_entries
+                )
+                await self.redis.delete(*(key for key, _ in evicted))
+        except Exception:
+            logger.warning("Could not write chunk embeddings to redis", exc_info=True)
+
+    async def get_many(self, model_id: UUID, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Returns the cached embedding of every text, in order, or None
+        where there is none."""
+        keys = [self._key(model_id, text) for text in texts]
+        embeddings = [self._get_local(key) for key in keys]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        self.stats.local_hits += len(keys) - len(missing)
+
+        redis_embeddings = await self._get_many_redis([keys[i] for i in missing])
+        for i, embedding in zip(missing, redis_embeddings):
+            if embedding is None:
+                self.stats.misses += 1
+                continue
+
+            self.stats.redis_hits += 1
+            self._set_local(keys[i], embedding)
+            embeddings[i] = embedding
+
+        return embeddings
+
+    async def set_many(self, model_id: UUID, texts: list[str], embeddings: np.ndarray):
+        entries = {
+            self._key(model_id, text): np.array(embedding, dtype=np.float32)
+            for text, embedding in zip(texts, embeddings)
+        }
+
+        for key, embedding in entries.items():
+            self._set_local(key, embedding)
+
+        await self._set_many_redis(entries)
+
+
+def _create_chunk_embedding_cache():
+    settings = get_settings()
+
+    redis = None
+    if settings.using_chunk_embedding_redis_cache:
+        # Kept apart from the job queue, where one is configured
+        if settings.chunk_embedding_redis_url is not None:
+            redis = aioredis.Redis.from_url(settings.chunk_embedding_redis_url)
+        else:
+            from intric.worker.redis import r as redis
+
+    return ChunkEmbeddingCache(
+        max_size=settings.chunk_embedding_cache_size,
+        ttl=settings.chunk_embedding_cache_ttl,
+        redis=redis,
+        max_redis_entries=settings.chunk_embedding_redis_max_entries,
+    )
+
+
+chunk_embedding_cache = _create_chunk_embedding_cache()
@@ -1,4 +1,6 @@
-from typing import TYPE_CHECKING
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Optional
 
 from intric.ai_models.model_enums import ModelFamily
 from intric.embedding_models.infrastructure.adapters.base import EmbeddingModelAdapter
@@ -6,15 +8,42 @@ from intric.embedding_models.infrastructure.adapters.e5_embeddings import E5Adap
 from intric.embedding_models.infrastructure.adapters.openai_embeddings import (
     OpenAIEmbeddingAdapter,
 )
+from intric.embedding_models.infrastructure.chunk_embedding_cache import (
+    ChunkEmbeddingCache,
+    chunk_embedding_cache,
+)
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    EmbeddingRequestLimiter,
+    embedding_request_limiter,
+)
+from intric.embedding_models.infrastructure.query_embedding_cache import (
+    QueryEmbeddingCache,
+    query_embedding_cache,
+)
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
 from intric.info_blobs.info_blob import InfoBlobChunk
+from intric.main.exceptions import RateLimitException
+from intric.main.logging import get_logger
 
 if TYPE_CHECKING:
     from intric.embedding_models.domain.embedding_model import EmbeddingModel
 
+logger = get_logger(__name__)
+
+# Attempts at a request that keeps getting rate limited, before giving up
+MAX_RATE_LIMITED_ATTEMPTS = 8
+
 
 class CreateEmbeddingsService:
-    def __init__(self):
+    def __init__(
+        self,
+        query_embedding_cache: Optional[QueryEmbeddingCache] = query_embedding_cache,
+        request_limiter: EmbeddingRequestLimiter = embedding_request_limiter,
+        chunk_embedding_cache: Optional[ChunkEmbeddingCache] = chunk_embedding_cache,
+    ):
+        self.query_embedding_cache = query_embedding_cache
+        self.chunk_embedding_cache = chunk_embedding_cache
+        self.request_limiter = request_limiter
         self._adapters = {
             ModelFamily.OPEN_AI: OpenAIEmbeddingAdapter,
             ModelFamily.E5: E5Adapter,
@@ -25,7 +54,54 @@ class CreateEmbeddingsService:
         if not adapter_class:
             raise ValueError(f"No adapter found for hosting {model.family.value}")
 
-        return adapter_class(model)
+        return adapter_class(model, request_limiter=self.request_limiter)
+
+    async def _request_embeddings(
+        self,
+        adapter: EmbeddingModelAdapter,
+        *,
+        model: "EmbeddingModel",
+        chunks: list[InfoBlobChunk],
+    ) -> ChunkEmbeddingList:
+        # Every request to the provider is retried on its own, so that a rate
+        # limited request does not send the batches that succeeded again
+        chunk_embedding_list = ChunkEmbeddingList()
+        for batch in adapter.get_batches(chunks):
+            chunk_embedding_list.extend(
+                await self._request_batch(adapter, model=model, batch=batch)
+            )
+
+        return chunk_embedding_list
+
+    async def _request_batch(
+        self,
+        adapter: EmbeddingModelAdapter,
+        *,
+        model: "EmbeddingModel",
+        batch: list[InfoBlobChunk],
+    ) -> ChunkEmbeddingList:
+        # The adapter reports rate limits to the request limiter, which holds
+        # back the retry, and every other request of the model, until the
+        # provider is ready to take requests again
+        for attempt in range(1, MAX_RATE_LIMITED_ATTEMPTS + 1):
+            try:
+                async with self.request_limiter.request(model.name):
+                    return await adapter.get_embeddings_for_batch(batch)
+            except RateLimitException:
+                if attempt == MAX_RATE_LIMITED_ATTEMPTS:
+                    raise
+
+    async def _request_embedding_for_query(
+        self, adapter: EmbeddingModelAdapter, *, model: "EmbeddingModel", query: str
+    ) -> list[float]:
+        # Queries do not queue up behind ingestion, but still wait out rate limits
+        for attempt in range(1, MAX_RATE_LIMITED_ATTEMPTS + 1):
+            try:
+                await self.request_limiter.wait(model.name)
+                return await adapter.get_embedding_for_query(query)
+            except RateLimitException:
+                if attempt == MAX_RATE_LIMITED_ATTEMPTS:
+                    raise
 
     async def get_embeddings(
         self,
@@ -33,12 +109,96 @@ class CreateEmbeddingsService:
         chunks: list[InfoBlobChunk],
     ) -> ChunkEmbeddingList:
         adapter = self._get_adapter(model)
-        return await adapter.get_embeddings(chunks)
+        return await self._get_embeddings(adapter, model=model, chunks=chunks)
+
+    async def _get_embeddings(
+        self,
+        adapter: EmbeddingModelAdapter,
+        *,
+        model: "EmbeddingModel",
+        chunks: list[InfoBlobChunk],
+    ) -> ChunkEmbeddingList:
+        if self.chunk_embedding_cache is None:
+            return await self._request_embeddings(adapter, model=model, chunks=chunks)
+
+        texts = [chunk.text for chunk in chunks]
+        embeddings = await self.chunk_embedding_cache.get_many(model.id, texts)
+
+        # Only embed the misses, and put their embeddings back in order
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            embedded = await self._request_embeddings(
+                adapter, model=model, chunks=[chunks[i] for i in misses]
+            )
+
+            for i, (_, embedding) in zip(misses, embedded):
+                embeddings[i] = embedding
+
+            await self.chunk_embedding_cache.set_many(
+                model.id, [texts[i] for i in misses], embedded.embeddings
+            )
+
+        logger.debug(
+            f"{len(chunks) - len(misses)} of {len(chunks)} chunk embeddings were cached, "
+            f"hit rate: {self.chunk_embedding_cache.stats.hit_rate:.2f}"
+        )
+
+        chunk_embedding_list = ChunkEmbeddingList()
+        chunk_embedding_list.add(chunks, embeddings)
+
+        return chunk_embedding_list
+
+    async def iter_embeddings(
+        self,
+        model: "EmbeddingModel",
+        chunks: list[InfoBlobChunk],
+    ) -> AsyncIterator[ChunkEmbeddingList]:
+        """Embeds the chunks batch by batch and yields the embeddings of every
+        batch, in order, as soon as they are ready.
+
+        Requests for the following batches are sent ahead, up to the in-flight
+        limit of the model, so that whatever the consumer does with a batch
+        (typically inserting it) overlaps with embedding the next ones.
+        """
+        adapter = self._get_adapter(model)
+        max_in_flight = self.request_limiter.get_limit(model.name)
+
+        async def _embed(batch: list[InfoBlobChunk]):
+            return await self._get_embeddings(adapter, model=model, chunks=batch)
+
+        pending: deque[asyncio.Task[ChunkEmbeddingList]] = deque()
+        try:
+            for batch in adapter.get_batches(chunks):
+                pending.append(asyncio.create_task(_embed(batch)))
+
+                if len(pending) >= max_in_flight:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def get_embedding_for_query(
         self,
         model: "EmbeddingModel",
         query: str,
     ) -> list[float]:
+        if self.query_embedding_cache is None:
+            adapter = self._get_adapter(model)
+            return await self._request_embedding_for_query(adapter, model=model, query=query)
+
+        embedding = await self.query_embedding_cache.get(model.id, query)
+        if embedding is not None:
+            logger.debug(
+                f"Query embedding cache hit, hit rate: "
+                f"{self.query_embedding_cache.stats.hit_rate:.2f}"
+            )
+            return embedding
+
         adapter = self._get_adapter(model)
-        return await adapter.get_embedding_for_query(query)
+        embedding = await self._request_embedding_for_query(adapter, model=model, query=query)
+
+        # The same as when it is found in the cache later on
+        return await self.query_embedding_cache.set(model.id, query, embedding)
@@ -1,15 +1,18 @@
+import asyncio
 import time
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, AsyncIterable, Iterable, Optional
+from uuid import UUID
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pydantic_settings import BaseSettings
 
-from intric.completion_models.infrastructure.context_builder import count_tokens
+from intric.embedding_models.infrastructure.text_splitter import (
+    StreamingTextSplitter,
+    TokenTextSplitter,
+)
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
 from intric.info_blobs.info_blob import (
     InfoBlobChunk,
     InfoBlobChunkInDBWithScore,
-    InfoBlobChunkWithEmbedding,
     InfoBlobInDB,
 )
 from intric.info_blobs.info_blob_chunk_repo import InfoBlobChunkRepo
@@ -33,6 +36,7 @@ logger = get_logger(__name__)
 class ChunkSettings(BaseSettings):
     chunk_size: int = 200
     chunk_overlap: int = 40
+    rrf_k: int = 60
 
 
 settings = ChunkSettings()
@@ -71,6 +75,25 @@ def autocut(y_values: list[float], cutoff: int = 2) -> int:
     return len(y_values)
 
 
+def reciprocal_rank_fusion(
+    result_lists: list[list[InfoBlobChunkInDBWithScore]], k: int = 60
+) -> list[tuple[InfoBlobChunkInDBWithScore, float]]:
+    """Merges ranked result lists, scoring each chunk by the sum of 1 / (k + rank)
+    over the lists it appears in. Returns the chunks with their fused scores, best
+    first. Each chunk keeps the score of the first list it appears in."""
+    scores = {}
+    chunks = {}
+
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            scores[chunk.id] = scores.get(chunk.id, 0) + 1 / (k + rank)
+            chunks.setdefault(chunk.id, chunk)
+
+    ranked_ids = sorted(scores, key=scores.get, reverse=True)
+
+    return [(chunks[id], scores[id]) for id in ranked_ids]
+
+
 class Datastore:
     def __init__(
         self,
@@ -83,45 +106,32 @@ class Datastore:
         self.chunk_repo = info_blob_chunk_repo
         self.create_embeddings_service = create_embeddings_service
 
-    def _chunk_text(self, info_blob: InfoBlobInDB):
-        splitter = RecursiveCharacterTextSplitter(
+    @staticmethod
+    def _get_splitter():
+        return TokenTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
-            length_function=count_tokens,
         )
 
-        info_blob_chunks = [
+    def _to_chunks(self, texts: Iterable[str], info_blob_id: UUID, start: int = 0):
+        return [
             InfoBlobChunk(
                 chunk_no=i,
-                text=chunk.strip(),
-                info_blob_id=info_blob.id,
+                text=text.strip(),
+                info_blob_id=info_blob_id,
                 tenant_id=self.user.tenant_id,
             )
-            for i, chunk in enumerate(splitter.split_text(info_blob.text))
-            if chunk.strip()
+            for i, text in enumerate(texts, start=start)
+            if text.strip()
         ]
 
-        return info_blob_chunks
-
-    async def _add(self, chunk_embedding_list: ChunkEmbeddingList, batch_size: int = 100):
-        chunks = []
-        for chunk, embedding in chunk_embedding_list:
-            chunks.append(
-                InfoBlobChunkWithEmbedding(
-                    **chunk.model_dump(exclude_none=True), embedding=embedding
-                )
-            )
-
-            if len(chunks) >= batch_size:
-                logger.debug(f"Adding {len(chunks)} chunks to datastore.")
-                await self.chunk_repo.add(chunks)
-
-                chunks.clear()
+    def _chunk_text(self, info_blob: InfoBlobInDB):
+        return self._to_chunks(self._get_splitter().split_text(info_blob.text), info_blob.id)
 
-        # Last batch
-        if chunks:
-            logger.debug(f"Last batch. Adding {len(chunks)} chunks to datastore.")
-            await self.chunk_repo.add(chunks)
+    async def _add(self, chunk_embedding_list: ChunkEmbeddingList, batch_size: int = 1000):
+        for chunks, embeddings in chunk_embedding_list.batches(batch_size):
+            logger.debug(f"Adding {len(chunks)} chunks to datastore.")
+            await self.chunk_repo.copy(chunks, embeddings)
 
     async def add(self, info_blob: InfoBlobInDB, embedding_model: "EmbeddingModel"):
         logger.debug("Chunking text.")
@@ -131,12 +141,72 @@ class Datastore:
             logger.warning(f"Info Blob {info_blob.id} did not yield any chunks after splitting.")
             return
 
-        logger.debug(f"Embedding {len(info_blob_chunks)} info-blob chunks.")
-        chunk_embedding_list = await self.create_embeddings_service.get_embeddings(
+        logger.debug(f"Embedding and adding {len(info_blob_chunks)} info-blob chunks.")
+        async for chunk_embedding_list in self.create_embeddings_service.iter_embeddings(
             model=embedding_model, chunks=info_blob_chunks
+        ):
+            await self._add(chunk_embedding_list)
+
+    async def add_many(self, info_blobs: list[InfoBlobInDB], embedding_model: "EmbeddingModel"):
+        """Same as `add`, for many info blobs at once. The chunks of all info
+        blobs are embedded together, so that small info blobs share requests
+        to the embedding model."""
+        info_blob_chunks = [
+            chunk for info_blob in info_blobs for chunk in self._chunk_text(info_blob)
+        ]
+
+        if not info_blob_chunks:
+            logger.warning("Info Blobs did not yield any chunks after splitting.")
+            return
+
+        logger.debug(
+            f"Embedding and adding {len(info_blob_chunks)} chunks of {len(info_blobs)} info-blobs."
         )
+        async for chunk_embedding_list in self.create_embeddings_service.iter_embeddings(
+            model=embedding_model, chunks=info_blob_chunks
+        ):
+            await self._add(chunk_embedding_list)
+
+    async def embed_stream(
+        self,
+        texts: AsyncIterable[str],
+        *,
+        info_blob_id: UUID,
+        embedding_model: "EmbeddingModel",
+    ) -> ChunkEmbeddingList:
+        """Chunks and embeds text that arrives in parts, such as the pages of a
+        document, as it arrives.
+
+        The embeddings are kept until the info blob has been added, and then
+        added with `add_embeddings`. Large lists of embeddings are backed by a
+        temporary file rather than memory.
+        """
+        splitter = StreamingTextSplitter(self._get_splitter())
+        chunk_embedding_list = ChunkEmbeddingList()
 
-        logger.debug(f"Adding {len(info_blob_chunks)} info-blob chunks to datastore.")
+        async def _embed(chunk_texts: list[str]):
+            chunks = self._to_chunks(chunk_texts, info_blob_id, start=len(chunk_embedding_list))
+            if not chunks:
+                return
+
+            async for embedded in self.create_embeddings_service.iter_embeddings(
+                model=embedding_model, chunks=chunks
+            ):
+                chunk_embedding_list.extend(embedded)
+
+        async for text in texts:
+            await _embed(splitter.add(text))
+
+        await _embed(splitter.finish())
+
+        return chunk_embedding_list
+
+    async def add_embeddings(self, chunk_embedding_list: ChunkEmbeddingList):
+        if not chunk_embedding_list:
+            logger.warning("No chunks to add after splitting.")
+            return
+
+        logger.debug(f"Adding {len(chunk_embedding_list)} embedded info-blob chunks.")
         await self._add(chunk_embedding_list)
 
     async def semantic_search(
@@ -179,3 +249,77 @@ class Datastore:
             return semantic_results[:cut_point]
 
         return semantic_results
+
+    async def hybrid_search(
+        self,
+        search_string: str,
+        embedding_model: "EmbeddingModel",
+        collections: list["Collection"] = [],
+        websites: list["Website"] = [],
+        integration_knowledge_list: list[IntegrationKnowledge] = [],
+        num_chunks: Optional[int] = 30,
+        autocut_cutoff: Optional[int] = None,
+    ) -> list[InfoBlobChunkInDBWithScore]:
+        group_ids = [group.id for group in collections]
+        website_ids = [website.id for website in websites]
+        integration_knowledge_ids = [i.id for i in integration_knowledge_list]
+
+        start = time.time()
+        # The session can only run one statement at a time, so the full-text
+        # search runs while the query is being embedded
+        search_string_embedding, keyword_results = await asyncio.gather(
+            self.create_embeddings_service.get_embedding_for_query(
+                model=embedding_model, query=search_string
+            ),
+            self.chunk_repo.keyword_search(
+                search_string,
+                group_ids=group_ids,
+                website_ids=website_ids,
+                integration_knowledge_ids=integration_knowledge_ids,
+                limit=num_chunks,
+            ),
+        )
+        step_1 = time.time()
+        semantic_results = await self.chunk_repo.semantic_search(
+            search_string_embedding,
+            group_ids=group_ids,
+            website_ids=website_ids,
+            integration_knowledge_ids=integration_knowledge_ids,
+            limit=num_chunks,
+        )
+        end = time.time()
+
+        logger.debug(
+            f"Time to get results: Embed and keyword step: {step_1 - start},"
+            f" Search step: {end - step_1}, Total: {end - start}"
+        )
+
+        fused = reciprocal_rank_fusion([semantic_results, keyword_results], k=settings.rrf_k)[
+            :num_chunks
+        ]
+
+        # The fused scores only rank the chunks. The score of a chunk stays its
+        # similarity to the query, the same as in a semantic search, so the
+        # chunks that only the keyword search found get theirs looked up
+        semantic_ids = {chunk.id for chunk in semantic_results}
+        keyword_only_ids = [chunk.id for chunk, _ in fused if chunk.id not in semantic_ids]
+        similarities = (
+            await self.chunk_repo.get_similarities(search_string_embedding, keyword_only_ids)
+            if keyword_only_ids
+            else {}
+        )
+        results = [
+            (
+                chunk
+                if chunk.id in semantic_ids
+                else chunk.model_copy(update={"score": similarities.get(chunk.id, 0.0)})
+            )
+            for chunk, _ in fused
+        ]
+
+        if autocut_cutoff is None:
+            return results
+
+        # Cut on the fused scores, since the similarities are not in order
+        cut_point = autocut([score for _, score in fused], autocut_cutoff)
+        return results[:cut_point]
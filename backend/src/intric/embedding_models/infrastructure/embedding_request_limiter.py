@@ -0,0 +1,190 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Mapping, Optional
+from weakref import WeakKeyDictionary
+
+from intric.main.config import get_settings
+from intric.main.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Used when a rate limited response does not say when to retry
+DEFAULT_RATE_LIMIT_BACKOFF = 5.0
+# Batches never shrink below this fraction of the largest batch
+MIN_BATCH_SCALE = 1 / 64
+# Fraction of the largest batch that is added back after a round of successes
+BATCH_SCALE_STEP = 1 / 8
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parses durations such as '20ms', '1.5s' and '6m0s' into seconds."""
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if headers is None:
+        return None
+
+    retry_after_ms = parse_duration(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+
+    return parse_duration(headers.get("retry-after")) or parse_duration(
+        headers.get("x-ratelimit-reset-tokens")
+    )
+
+
+class _ModelState:
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self.in_flight_limit = max_in_flight
+        self.in_flight = 0
+        self.batch_scale = 1.0
+        self.successes = 0
+        self.resume_at = 0.0
+        self.condition = asyncio.Condition()
+
+
+class EmbeddingRequestLimiter:
+    """Limits the embedding requests in flight per embedding model, shared by
+    everything that embeds in this process, and adapts to rate limits.
+
+    When a provider rate limits a request, the number of requests in flight
+    and the size of the batches are halved, and new requests wait until the
+    provider says it is time to retry. Every round of successful requests
+    then adds one request in flight and an eighth of the largest batch back,
+    up to the configured limits. Providers that report their remaining token
+    budget on every response are paused before they run out, rather than
+    after.
+    """
+
+    def __init__(self, *, default_limit: int, limits: dict[str, int]):
+        self.default_limit = default_limit
+        self.limits = limits
+
+        # Conditions are bound to the event loop they are used in
+        self._states: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, _ModelState]] = (
+            WeakKeyDictionary()
+        )
+
+    def get_limit(self, model_name: str) -> int:
+        return max(self.limits.get(model_name, self.default_limit), 1)
+
+    def _get_state(self, model_name: str) -> _ModelState:
+        states = self._states.setdefault(asyncio.get_running_loop(), {})
+
+        if model_name not in states:
+            states[model_name] = _ModelState(max_in_flight=self.get_limit(model_name))
+
+        return states[model_name]
+
+    def get_batch_scale(self, model_name: str) -> float:
+        """Fraction of the largest batch that requests should currently use."""
+        try:
+            return self._get_state(model_name).batch_scale
+        except RuntimeError:
+            # Not running in an event loop
+            return 1.0
+
+    async def _wait(self, state: _ModelState, *, needs_slot: bool):
+        async with state.condition:
+            while True:
+                delay = state.resume_at - time.monotonic()
+                if delay <= 0 and (not needs_slot or state.in_flight < state.in_flight_limit):
+                    break
+
+                try:
+                    await asyncio.wait_for(
+                        state.condition.wait(), timeout=delay if delay > 0 else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            if needs_slot:
+                state.in_flight += 1
+
+    async def wait(self, model_name: str):
+        """Waits out any rate limit pause of the model, without taking a slot."""
+        await self._wait(self._get_state(model_name), needs_slot=False)
+
+    @asynccontextmanager
+    async def request(self, model_name: str):
+        state = self._get_state(model_name)
+        await self._wait(state, needs_slot=True)
+
+        try:
+            yield
+        finally:
+            async with state.condition:
+                state.in_flight -= 1
+                state.condition.notify_all()
+
+    def on_rate_limited(self, model_name: str, retry_after: Optional[float] = None):
+        state = self._get_state(model_name)
+        now = time.monotonic()
+
+        # Requests that were already in flight when the limit was hit report
+        # it too, so only back off once per pause
+        if state.resume_at <= now:
+            state.in_flight_limit = max(state.in_flight_limit // 2, 1)
+            state.batch_scale = max(state.batch_scale / 2, MIN_BATCH_SCALE)
+            state.successes = 0
+
+            logger.warning(
+                f"Embedding model {model_name} was rate limited, lowering to "
+                f"{state.in_flight_limit} requests in flight and "
+                f"{state.batch_scale:.2f} of the batch size"
+            )
+
+        state.resume_at = max(
+            state.resume_at,
+            now + (retry_after if retry_after is not None else DEFAULT_RATE_LIMIT_BACKOFF),
+        )
+
+    def on_success(
+        self,
+        model_name: str,
+        *,
+        remaining_tokens: Optional[int] = None,
+        reset_tokens_after: Optional[float] = None,
+        batch_tokens: Optional[int] = None,
+    ):
+        state = self._get_state(model_name)
+
+        state.successes += 1
+        if state.successes >= state.in_flight_limit:
+            state.successes = 0
+            state.in_flight_limit = min(state.in_flight_limit + 1, state.max_in_flight)
+            state.batch_scale = min(state.batch_scale + BATCH_SCALE_STEP, 1.0)
+
+        # Pause before the requests in flight run out of the token budget
+        if (
+            remaining_tokens is not None
+            and reset_tokens_after is not None
+            and batch_tokens is not None
+            and remaining_tokens < batch_tokens * state.in_flight_limit
+        ):
+            state.resume_at = max(state.resume_at, time.monotonic() + reset_tokens_after)
+
+
+embedding_request_limiter = EmbeddingRequestLimiter(
+    default_limit=get_settings().embedding_max_in_flight_requests,
+    limits=get_settings().embedding_max_in_flight_requests_per_model,
+)
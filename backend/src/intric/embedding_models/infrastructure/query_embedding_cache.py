@@ -0,0 +1,158 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+from uuid import UUID
+
+import numpy as np
+
+from intric.main.config import get_settings
+from intric.main.logging import get_logger
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = get_logger(__name__)
+
+REDIS_KEY_PREFIX = "query_embedding"
+
+
+@dataclass
+class QueryEmbeddingCacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.redis_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
+
+
+class QueryEmbeddingCache:
+    """Two-tier cache for query embeddings.
+
+    The first tier is an in-process LRU, the second an optional redis tier
+    shared between processes. Entries are keyed on the embedding model id
+    and a hash of the query, and expire after `ttl` seconds in both tiers.
+
+    Both tiers store embeddings as float32, so a query gets the same embedding
+    whichever tier it is found in.
+    """
+
+    key_prefix = REDIS_KEY_PREFIX
+
+    def __init__(self, *, max_size: int, ttl: int, redis: Optional["Redis"] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+        self.stats = QueryEmbeddingCacheStats()
+
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+
+    def _key(self, model_id: UUID, query: str) -> str:
+        query_hash = hashlib.sha256(query.encode()).hexdigest()
+        return f"{self.key_prefix}:{model_id}:{query_hash}"
+
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, embedding = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _set_local(self, key: str, embedding: np.ndarray):
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, embedding)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[np.ndarray]:
+        if self.redis is None:
+            return None
+
+        try:
+            value = await self.redis.get(key)
+        except Exception:
+            logger.warning("Could not read query embedding from redis", exc_info=True)
+            return None
+
+        if value is None:
+            return None
+
+        return np.frombuffer(value, dtype=np.float32)
+
+    async def _set_redis(self, key: str, embedding: np.ndarray):
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(key, embedding.tobytes(), ex=self.ttl)
+        except Exception:
+            logger.warning("Could not write query embedding to redis", exc_info=True)
+
+    async def get(self, model_id: UUID, query: str) -> Optional[list[float]]:
+        key = self._key(model_id, query)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.stats.local_hits += 1
+            return embedding.tolist()
+
+        embedding = await self._get_redis(key)
+        if embedding is not None:
+            self.stats.redis_hits += 1
+            self._set_local(key, embedding)
+            return embedding.tolist()
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, model_id: UUID, query: str, embedding: list[float]) -> list[float]:
+        """Caches the embedding, and returns it as it is cached."""
+        key = self._key(model_id, query)
+        embedding = np.asarray(embedding, dtype=np.float32)
+
+        self._set_local(key, embedding)
+        await self._set_redis(key, embedding)
+
+        return embedding.tolist()
+
+    def clear(self):
+        self._entries.clear()
+        self.stats = QueryEmbeddingCacheStats()
+
+
+def _create_query_embedding_cache():
+    settings = get_settings()
+
+    redis = None
+    if settings.using_query_embedding_redis_cache:
+        from intric.worker.redis import r as redis
+
+    return QueryEmbeddingCache(
+        max_size=settings.query_embedding_cache_size,
+        ttl=settings.query_embedding_cache_ttl,
+        redis=redis,
+    )
+
+
+query_embedding_cache = _create_query_embedding_cache()
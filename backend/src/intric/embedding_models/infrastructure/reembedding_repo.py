@@ -0,0 +1,205 @@
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+import sqlalchemy as sa
+
+from intric.database.tables.collections_table import CollectionsTable
+from intric.database.tables.info_blob_chunk_table import InfoBlobChunks
+from intric.database.tables.info_blobs_table import InfoBlobs
+from intric.database.tables.integration_table import IntegrationKnowledge
+from intric.database.tables.websites_table import Websites
+
+if TYPE_CHECKING:
+    from intric.database.database import AsyncSession
+    from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+
+
+class ReembeddingRepo:
+    """Re-embeds the info blobs of a knowledge source with another embedding
+    model.
+
+    The chunks of the new embedding model are staged next to the current ones,
+    which keep being searched, and replace them all at once when every info
+    blob has been re-embedded.
+    """
+
+    def __init__(self, session: "AsyncSession"):
+        self.session = session
+
+    @staticmethod
+    def _of_source(source: "KnowledgeSource"):
+        if source.group_id is not None:
+            return InfoBlobs.group_id == source.group_id
+        if source.website_id is not None:
+            return InfoBlobs.website_id == source.website_id
+
+        return InfoBlobs.integration_knowledge_id == source.integration_knowledge_id
+
+    def _info_blob_ids(self, source: "KnowledgeSource"):
+        return sa.select(InfoBlobs.id).where(self._of_source(source))
+
+    @staticmethod
+    def _has_current_chunks():
+        return (
+            sa.select(InfoBlobChunks.id)
+            .where(
+                InfoBlobChunks.info_blob_id == InfoBlobs.id,
+                InfoBlobChunks.staged_embedding_model_id.is_(None),
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _has_staged_chunks(embedding_model_id: UUID):
+        return (
+            sa.select(InfoBlobChunks.id)
+            .where(
+                InfoBlobChunks.info_blob_id == InfoBlobs.id,
+                InfoBlobChunks.staged_embedding_model_id == embedding_model_id,
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _lock_key(source: "KnowledgeSource"):
+        return sa.func.hashtextextended(f"reembed:{source.id}", 0)
+
+    async def try_lock(self, source: "KnowledgeSource") -> bool:
+        """Takes the lock of re-embedding the source, unless another session
+        holds it.
+
+        The lock is held by the session, not by a transaction, so it outlives
+        the transactions of the session until `unlock` is called, or the
+        connection is closed.
+        """
+        stmt = sa.select(sa.func.pg_try_advisory_lock(self._lock_key(source)))
+
+        return await self.session.scalar(stmt)
+
+    async def unlock(self, source: "KnowledgeSource"):
+        await self.session.execute(sa.select(sa.func.pg_advisory_unlock(self._lock_key(source))))
+
+    async def get_progress(
+        self, source: "KnowledgeSource", embedding_model_id: UUID
+    ) -> tuple[int, int]:
+        """Returns how many of the info blobs with chunks that have been
+        re-embedded, and how many there are in total."""
+        stmt = sa.select(
+            sa.func.count().filter(self._has_staged_chunks(embedding_model_id)),
+            sa.func.count(),
+        ).where(self._of_source(source), self._has_current_chunks())
+
+        result = await self.session.execute(stmt)
+        done, total = result.one()
+
+        return done, total
+
+    async def get_info_blob_ids_to_reembed(
+        self, source: "KnowledgeSource", embedding_model_id: UUID, limit: int
+    ) -> list[UUID]:
+        stmt = (
+            sa.select(InfoBlobs.id)
+            .where(
+                self._of_source(source),
+                self._has_current_chunks(),
+                ~self._has_staged_chunks(embedding_model_id),
+            )
+            .order_by(InfoBlobs.id)
+            .limit(limit)
+        )
+
+        return list(await self.session.scalars(stmt))
+
+    async def delete_staged_chunks_of_other_models(
+        self, source: "KnowledgeSource", embedding_model_id: UUID
+    ):
+        """Deletes what is left of earlier re-embeddings to other models."""
+        stmt = sa.delete(InfoBlobChunks).where(
+            InfoBlobChunks.info_blob_id.in_(self._info_blob_ids(source)),
+            InfoBlobChunks.staged_embedding_model_id.is_not(None),
+            InfoBlobChunks.staged_embedding_model_id != embedding_model_id,
+        )
+
+        await self.session.execute(stmt)
+
+    @staticmethod
+    def _source_table(source: "KnowledgeSource"):
+        if source.group_id is not None:
+            return CollectionsTable, source.group_id
+        if source.website_id is not None:
+            return Websites, source.website_id
+
+        return IntegrationKnowledge, source.integration_knowledge_id
+
+    async def _try_lock_source(self, source: "KnowledgeSource") -> bool:
+        # Info blobs are added with the source locked FOR KEY SHARE, until
+        # their transaction ends, so the source is locked once none are
+        # being added
+        table, id = self._source_table(source)
+        stmt = sa.select(table.id).where(table.id == id).with_for_update(skip_locked=True)
+
+        return await self.session.scalar(stmt) is not None
+
+    async def switch_embedding_model(
+        self, source: "KnowledgeSource", embedding_model_id: UUID
+    ) -> bool:
+        """Replaces the current chunks with the staged ones, and moves the
+        source and its info blobs to the embedding model.
+
+        Runs in the transaction of the session, so searches see either the
+        old embedding model or the new one, never a mix.
+
+        Returns False, and switches nothing, while info blobs are being added
+        to the source, or if there are info blobs left to re-embed. Info blobs
+        added later see the switch, since they lock the source.
+        """
+        if not await self._try_lock_source(source):
+            return False
+
+        if await self.get_info_blob_ids_to_reembed(source, embedding_model_id, limit=1):
+            return False
+
+        info_blob_ids = self._info_blob_ids(source)
+
+        def _sum_of_chunk_sizes(staged_condition):
+            return (
+                sa.select(sa.func.coalesce(sa.func.sum(InfoBlobChunks.size), 0))
+                .where(InfoBlobChunks.info_blob_id == InfoBlobs.id, staged_condition)
+                .scalar_subquery()
+            )
+
+        # The size of an info blob includes the size of its chunks
+        await self.session.execute(
+            sa.update(InfoBlobs)
+            .values(
+                size=InfoBlobs.size
+                - _sum_of_chunk_sizes(InfoBlobChunks.staged_embedding_model_id.is_(None))
+                + _sum_of_chunk_sizes(
+                    InfoBlobChunks.staged_embedding_model_id == embedding_model_id
+                ),
+                embedding_model_id=embedding_model_id,
+            )
+            .where(self._of_source(source))
+        )
+
+        await self.session.execute(
+            sa.delete(InfoBlobChunks).where(
+                InfoBlobChunks.info_blob_id.in_(info_blob_ids),
+                InfoBlobChunks.staged_embedding_model_id.is_(None),
+            )
+        )
+        await self.session.execute(
+            sa.update(InfoBlobChunks)
+            .values(staged_embedding_model_id=None)
+            .where(
+                InfoBlobChunks.info_blob_id.in_(info_blob_ids),
+                InfoBlobChunks.staged_embedding_model_id == embedding_model_id,
+            )
+        )
+
+        table, id = self._source_table(source)
+        await self.session.execute(
+            sa.update(table).values(embedding_model_id=embedding_model_id).where(table.id == id)
+        )
+
+        return True
@@ -0,0 +1,199 @@
+import re
+from bisect import bisect_left
+from typing import Optional, Protocol
+
+from intric.completion_models.infrastructure.context_builder import get_encoding
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+# Characters of text that the streaming splitter buffers before splitting
+DEFAULT_SECTION_SIZE = 100_000
+
+
+class Encoding(Protocol):
+    def encode_ordinary(self, text: str) -> list[int]: ...
+
+    def decode_with_offsets(self, tokens: list[int]) -> tuple[str, list[int]]: ...
+
+
+class TokenTextSplitter:
+    """Splits text into chunks of at most `chunk_size` tokens, with up to
+    `chunk_overlap` tokens of overlap between consecutive chunks.
+
+    Splits the same way as langchain's `RecursiveCharacterTextSplitter` with
+    a token counting length function: the text is split on the first
+    separator it contains, splits that are too long are split again on the
+    next separator, and the splits are then merged into chunks.
+
+    The difference is that the text is encoded once, up front, and the
+    splits are measured by counting the tokens that start within them,
+    instead of encoding every candidate split over and over again.
+    """
+
+    def __init__(
+        self,
+        *,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: tuple[str, ...] = DEFAULT_SEPARATORS,
+        encoding: Optional[Encoding] = None,
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size "
+                f"({chunk_size}), should be smaller."
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators
+        self.encoding = encoding
+
+        self._patterns = {
+            separator: re.compile(re.escape(separator)) for separator in separators if separator
+        }
+
+    def split_text(self, text: str) -> list[str]:
+        encoding = self.encoding or get_encoding()
+        _, token_offsets = encoding.decode_with_offsets(encoding.encode_ordinary(text))
+
+        splitter = _Splitter(self, text=text, token_offsets=token_offsets)
+        return splitter.split(0, len(text), self.separators)
+
+
+class StreamingTextSplitter:
+    """Splits text that arrives in parts, such as the pages of a document,
+    without holding on to all of it.
+
+    The parts are buffered until there are at least `section_size` characters,
+    and the buffer is then split up to its last paragraph break (or, failing
+    that, line break or space). Chunks never span two sections, so the chunks
+    only differ from those of splitting the whole text at once around the
+    breaks between sections.
+    """
+
+    def __init__(self, splitter: TokenTextSplitter, *, section_size: int = DEFAULT_SECTION_SIZE):
+        self.splitter = splitter
+        self.section_size = section_size
+
+        self._buffer = ""
+
+    def _cut(self) -> int:
+        for separator in self.splitter.separators:
+            if not separator:
+                break
+
+            # Separators are kept, at the start of the next section
+            position = self._buffer.rfind(separator)
+            if position > 0:
+                return position
+
+        return len(self._buffer)
+
+    def add(self, text: str) -> list[str]:
+        """Adds the next part of the text, and returns the chunks that are done."""
+        self._buffer += text
+
+        if len(self._buffer) < self.section_size:
+            return []
+
+        cut = self._cut()
+        section, self._buffer = self._buffer[:cut], self._buffer[cut:]
+
+        return self.splitter.split_text(section)
+
+    def finish(self) -> list[str]:
+        """Returns the chunks of the rest of the text."""
+        section, self._buffer = self._buffer, ""
+
+        return self.splitter.split_text(section) if section else []
+
+
+class _Splitter:
+    def __init__(self, settings: TokenTextSplitter, *, text: str, token_offsets: list[int]):
+        self.settings = settings
+        self.text = text
+        self.token_offsets = token_offsets
+
+    def _length(self, start: int, end: int) -> int:
+        return bisect_left(self.token_offsets, end) - bisect_left(self.token_offsets, start)
+
+    def _split_on(self, start: int, end: int, separator: str) -> list[tuple[int, int]]:
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+
+        # Separators are kept, at the start of the split that follows them
+        boundaries = [
+            match.start()
+            for match in self.settings._patterns[separator].finditer(self.text, start, end)
+        ]
+        bounds = [start, *boundaries, end]
+
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+    def _join(self, splits: list[tuple[int, int]]) -> Optional[str]:
+        text = self.text[splits[0][0] : splits[-1][1]].strip()
+        return text or None
+
+    def _merge(self, splits: list[tuple[int, int]]) -> list[str]:
+        chunk_size, chunk_overlap = self.settings.chunk_size, self.settings.chunk_overlap
+
+        chunks = []
+        current: list[tuple[int, int]] = []
+        lengths: list[int] = []
+        total = 0
+        for split in splits:
+            length = self._length(*split)
+
+            if total + length > chunk_size and current:
+                chunk = self._join(current)
+                if chunk is not None:
+                    chunks.append(chunk)
+
+                # Keep the tail of the chunk as overlap with the next one
+                while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                    total -= lengths.pop(0)
+                    current.pop(0)
+
+            current.append(split)
+            lengths.append(length)
+            total += length
+
+        if current:
+            chunk = self._join(current)
+            if chunk is not None:
+                chunks.append(chunk)
+
+        return chunks
+
+    def split(self, start: int, end: int, separators: tuple[str, ...]) -> list[str]:
+        separator, next_separators = separators[-1], ()
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+
+            if self.settings._patterns[candidate].search(self.text, start, end):
+                separator, next_separators = candidate, separators[i + 1 :]
+                break
+
+        chunks = []
+        good_splits = []
+        for split in self._split_on(start, end, separator):
+            if self._length(*split) < self.settings.chunk_size:
+                good_splits.append(split)
+                continue
+
+            if good_splits:
+                chunks.extend(self._merge(good_splits))
+                good_splits = []
+
+            if next_separators:
+                chunks.extend(self.split(*split, next_separators))
+            else:
+                chunk = self.text[split[0] : split[1]]
+                chunks.append(chunk)
+
+        if good_splits:
+            chunks.extend(self._merge(good_splits))
+
+        return chunks
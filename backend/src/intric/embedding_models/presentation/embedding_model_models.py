@@ -70,3 +70,7 @@ class EmbeddingModelSecurityStatus(EmbeddingModelPublic):
 class EmbeddingModelUpdate(BaseModel):
     is_org_enabled: bool | NotProvided = NOT_PROVIDED
     security_classification: ModelId | None | NotProvided = NOT_PROVIDED
+
+
+class ReembedRequest(BaseModel):
+    embedding_model: ModelId
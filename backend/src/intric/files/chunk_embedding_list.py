@@ -1,17 +1,78 @@
 import tempfile
 from collections.abc import Iterator
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 
 from intric.info_blobs.info_blob import InfoBlobChunk
 from intric.main.exceptions import ChunkEmbeddingMisMatchException
 
+# Buffers larger than this are backed by a temporary file instead of memory
+MEMORY_MAP_THRESHOLD = 64 * 1024 * 1024  # 64 MiB
+MIN_CAPACITY = 64
+
 
 class ChunkEmbeddingList:
-    def __init__(self):
-        self._file = tempfile.TemporaryFile()
-        self._chunks = []
+    """Chunks together with their embeddings.
+
+    The embeddings are kept in one contiguous float32 array of shape
+    (number of chunks, dimensions), which grows as embeddings are added and is
+    memory-mapped to a temporary file once it gets large. Iterating yields
+    views into that array, so no embedding is copied on the way out.
+    """
+
+    def __init__(self, memory_map_threshold: int = MEMORY_MAP_THRESHOLD):
+        self.memory_map_threshold = memory_map_threshold
+
+        self._chunks: list[InfoBlobChunk] = []
+        self._buffer: Optional[np.ndarray] = None
+        self._file = None
+
+    def __len__(self):
+        return len(self._chunks)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        if self._buffer is None:
+            return np.empty((0, 0), dtype=np.float32)
+
+        return self._buffer[: len(self._chunks)]
+
+    def _reserve(self, size: int, dimensions: int):
+        if self._buffer is not None:
+            capacity, buffer_dimensions = self._buffer.shape
+            if buffer_dimensions != dimensions:
+                raise ChunkEmbeddingMisMatchException(
+                    f"Embedding dimensions: {dimensions}, expected: {buffer_dimensions}"
+                )
+
+            if size <= capacity:
+                return
+
+            capacity = max(size, capacity * 2)
+        else:
+            capacity = max(size, MIN_CAPACITY)
+
+        if capacity * dimensions * np.dtype(np.float32).itemsize > self.memory_map_threshold:
+            # Growing a memory map of the same file keeps what has already
+            # been written, so only the switch from memory needs a copy
+            if self._file is None:
+                self._file = tempfile.TemporaryFile()
+                previous = self._buffer
+            else:
+                previous = None
+
+            buffer = np.memmap(
+                self._file, dtype=np.float32, mode="r+", shape=(capacity, dimensions)
+            )
+        else:
+            previous = self._buffer
+            buffer = np.empty((capacity, dimensions), dtype=np.float32)
+
+        if previous is not None:
+            buffer[: len(self._chunks)] = previous[: len(self._chunks)]
+
+        self._buffer = buffer
 
     def add(self, chunks: list[InfoBlobChunk], embeddings: list[list[float]]):
         if len(chunks) != len(embeddings):
@@ -19,16 +80,26 @@ class ChunkEmbeddingList:
                 f"Number of chunks: {len(chunks)}, Number of embeddings: {len(embeddings)}"
             )
 
-        self._chunks.extend(chunks)
+        if not chunks:
+            return
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
 
-        for embedding in embeddings:
-            np.save(self._file, embedding)
+        start = len(self._chunks)
+        self._reserve(start + len(chunks), embeddings.shape[1])
+        self._buffer[start : start + len(chunks)] = embeddings
+
+        self._chunks.extend(chunks)
 
-    def __iter__(self) -> Iterator[Tuple[InfoBlobChunk, list[float]]]:
-        self._file.seek(0)
-        for chunk in self._chunks:
-            embedding = np.load(self._file)
+    def extend(self, other: "ChunkEmbeddingList"):
+        self.add(other._chunks, other.embeddings)
 
-            yield chunk, embedding
+    def batches(self, batch_size: int) -> Iterator[Tuple[list[InfoBlobChunk], np.ndarray]]:
+        """Yields the chunks in batches, each with a (batch size, dimensions)
+        view of their embeddings."""
+        embeddings = self.embeddings
+        for i in range(0, len(self._chunks), batch_size):
+            yield self._chunks[i : i + batch_size], embeddings[i : i + batch_size]
 
-        self._file.close()
+    def __iter__(self) -> Iterator[Tuple[InfoBlobChunk, np.ndarray]]:
+        yield from zip(self._chunks, self.embeddings)
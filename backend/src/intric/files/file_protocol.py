@@ -1,6 +1,5 @@
 import os
 from pathlib import Path
-from typing import Callable
 
 from fastapi import UploadFile
 
@@ -10,12 +9,15 @@ from intric.files.file_size_service import FileSizeService
 from intric.files.image import ImageExtractor, ImageMimeTypes
 from intric.files.text import TextExtractor
 from intric.main.config import get_settings
-from intric.main.exceptions import FileTooLargeException
 
 
-def bytes_extractor(filepath: Path, _: str):
-    with open(filepath, "rb") as file:
-        return file.read()
+def text_size(text: str) -> int:
+    """Size of the text in bytes, encoded as UTF-8."""
+    # ASCII is one byte per character, which saves encoding a copy of the text
+    if text.isascii():
+        return len(text)
+
+    return len(text.encode("utf-8"))
 
 
 class FileProtocol:
@@ -29,33 +31,29 @@ class FileProtocol:
         self.text_extractor = text_extractor
         self.image_extractor = image_extractor
 
-    async def _get_content(
-        self,
-        upload_file: UploadFile,
-        file_type: FileType,
-        max_size: int,
-        extractor: Callable[[Path, str], str | bytes],
-    ):
-        if self.file_size_service.is_too_large(upload_file.file, max_size=max_size):
-            raise FileTooLargeException()
-
-        filepath = await self.file_size_service.save_file_to_disk(upload_file.file)
-        filepath = Path(filepath)
+    async def _get_text_content(self, upload_file: UploadFile, max_size: int):
+        # The text is extracted from a file on disk, in another process, so
+        # the upload is written to disk, and measured and checksummed on the way
+        saved_file = await self.file_size_service.save_file_to_disk(
+            upload_file.file, max_size=max_size
+        )
 
         try:
-            content = extractor(filepath, upload_file.content_type)
-            checksum = self.file_size_service.get_file_checksum(filepath)
-
-            if isinstance(content, str):
-                size = len(content.encode("utf-8"))
-            else:
-                size = len(content)
-
-            return self._create_file_base(
-                upload_file, file_type, content, checksum, size
+            text = await self.text_extractor.extract_async(
+                Path(saved_file.filepath), upload_file.content_type
             )
         finally:
-            os.remove(filepath)
+            os.remove(saved_file.filepath)
+
+        return self._create_file_base(
+            upload_file, FileType.TEXT, text, saved_file.checksum, text_size(text)
+        )
+
+    async def _get_blob_content(self, upload_file: UploadFile, file_type: FileType, max_size: int):
+        # The file is stored as it is, so it is read straight into memory
+        blob, checksum = await self.file_size_service.read_file(upload_file.file, max_size=max_size)
+
+        return self._create_file_base(upload_file, file_type, blob, checksum, len(blob))
 
     def _create_file_base(
         self,
@@ -81,27 +79,25 @@ class FileProtocol:
         return FileBaseWithContent(**file_base_kwargs)
 
     async def text_to_domain(self, upload_file: UploadFile):
-        return await self._get_content(
+        return await self._get_text_content(
             upload_file,
-            file_type=FileType.TEXT,
             max_size=get_settings().upload_file_to_session_max_size,
-            extractor=self.text_extractor.extract,
         )
 
     async def image_to_domain(self, upload_file: UploadFile):
-        return await self._get_content(
+        self.image_extractor.validate(upload_file.content_type)
+
+        return await self._get_blob_content(
             upload_file,
             file_type=FileType.IMAGE,
             max_size=get_settings().upload_image_to_session_max_size,
-            extractor=self.image_extractor.extract,
         )
 
     async def audio_to_domain(self, upload_file: UploadFile):
-        return await self._get_content(
+        return await self._get_blob_content(
             upload_file,
             file_type=FileType.AUDIO,
             max_size=get_settings().transcription_max_file_size,
-            extractor=bytes_extractor,
         )
 
     async def to_domain(self, upload_file: UploadFile):
@@ -1,52 +1,75 @@
 import asyncio
 import hashlib
 import os
-import shutil
 import uuid
 from pathlib import Path
 from tempfile import SpooledTemporaryFile
-from typing import IO
+from typing import IO, NamedTuple
+
+from intric.main.exceptions import FileTooLargeException
 
 TMP_DIR = "/tmp/"
 
+# Size of the pieces that uploaded files are read in
+CHUNK_SIZE = 1024 * 1024
+
+
+class SavedFile(NamedTuple):
+    filepath: str
+    size: int
+    checksum: str
+
 
 class FileSizeService:
     @staticmethod
-    async def save_file_to_disk(file: SpooledTemporaryFile):
-        destination = os.path.join(TMP_DIR, uuid.uuid4().hex)
-        destination_path = Path(destination)
+    def _copy_to_disk(file: IO, destination: Path, max_size: int | None) -> SavedFile:
+        size = 0
+        h = hashlib.sha256()
 
-        try:
-            with destination_path.open("wb") as buffer:
-                await asyncio.to_thread(shutil.copyfileobj, file, buffer)
-        finally:
-            file.close()
+        with destination.open("wb") as buffer:
+            while chunk := file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise FileTooLargeException("File too large.")
 
-        return destination
+                h.update(chunk)
+                buffer.write(chunk)
 
-    @staticmethod
-    def is_too_large(file: IO, max_size: int):
-        real_file_size = 0
-        for chunk in file:
-            real_file_size += len(chunk)
-            if real_file_size > max_size:
-                return True
+        return SavedFile(filepath=str(destination), size=size, checksum=h.hexdigest())
 
-        # return the pointer back to the starting point so that
-        # the next read starts from the starting point
-        file.seek(0)
+    @staticmethod
+    async def save_file_to_disk(
+        file: SpooledTemporaryFile, max_size: int | None = None
+    ) -> SavedFile:
+        """Copies the file to disk, and measures and checksums it on the way, so
+        that the file is only read once. Stops as soon as the file turns out to
+        be larger than `max_size`."""
+        destination_path = Path(os.path.join(TMP_DIR, uuid.uuid4().hex))
 
-        return False
+        try:
+            return await asyncio.to_thread(
+                FileSizeService._copy_to_disk, file, destination_path, max_size
+            )
+        except BaseException:
+            destination_path.unlink(missing_ok=True)
+            raise
+        finally:
+            file.close()
 
     @staticmethod
-    def get_file_checksum(filepath: Path):
-        """Taken from https://stackoverflow.com/a/44873382"""
-        h = hashlib.sha256()
-        b = bytearray(128 * 1024)
-        mv = memoryview(b)
+    def _read(file: IO, max_size: int) -> tuple[bytes, str]:
+        # Reading one byte more than allowed is enough to tell if it is too large
+        content = file.read(max_size + 1)
+        if len(content) > max_size:
+            raise FileTooLargeException("File too large.")
 
-        with open(filepath, "rb", buffering=0) as f:
-            while n := f.readinto(mv):
-                h.update(mv[:n])
+        return content, hashlib.sha256(content).hexdigest()
 
-        return h.hexdigest()
+    @staticmethod
+    async def read_file(file: SpooledTemporaryFile, max_size: int) -> tuple[bytes, str]:
+        """Reads the file into memory in one go, for files that are stored as
+        they are, and returns the content with its checksum."""
+        try:
+            return await asyncio.to_thread(FileSizeService._read, file, max_size)
+        finally:
+            file.close()
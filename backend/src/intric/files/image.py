@@ -15,8 +15,12 @@ class ImageExtractor:
         with open(filepath, "rb") as image_file:
             return image_file.read()
 
+    @staticmethod
+    def validate(mimetype: str):
+        if not ImageMimeTypes.has_value(mimetype):
+            raise FileNotSupportedException(f"{mimetype} files is not supported")
+
     def extract(self, filepath: Path, mimetype: str) -> bytes:
-        if ImageMimeTypes.has_value(mimetype):
-            return self.extract_from_image(filepath)
+        self.validate(mimetype)
 
-        raise FileNotSupportedException(f"{mimetype} files is not supported")
+        return self.extract_from_image(filepath)
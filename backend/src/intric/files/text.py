@@ -1,11 +1,24 @@
+import asyncio
+import functools
+import time
 from enum import Enum
 from pathlib import Path
+from typing import AsyncIterator, Iterator
 
 import magic
 import pptx
 from docx2python import docx2python
 from pypdf import PdfReader
 
+from intric.files.text_extraction_pool import text_extraction_pool
+from intric.main.exceptions import FileExtractionTimeoutException
+
+# Pages of a PDF that are extracted per task in the text extraction pool
+PDF_PAGES_PER_TASK = 10
+
+# PDFs that each worker of the text extraction pool keeps parsed
+PDF_READERS_PER_WORKER = 2
+
 
 class MimeTypesBase(str, Enum):
     @classmethod
@@ -35,6 +48,42 @@ class TextSanitizer:
         return text
 
 
+# These run in the worker processes of the text extraction pool
+
+
+def _extract(filepath: Path, mimetype: str | None) -> str:
+    return TextExtractor().extract(filepath, mimetype)
+
+
+@functools.lru_cache(maxsize=PDF_READERS_PER_WORKER)
+def _open_pdf(filepath: Path, mtime_ns: int, size: int) -> PdfReader:
+    # The modification time and size are part of the key, so that a file that
+    # is written again at the same path is parsed again
+    return PdfReader(filepath)
+
+
+def _get_pdf_reader(filepath: Path) -> PdfReader:
+    # The pages of a PDF are extracted by many tasks, so it is only parsed
+    # once per worker, instead of once per task
+    stat = filepath.stat()
+    return _open_pdf(filepath, stat.st_mtime_ns, stat.st_size)
+
+
+def _count_pdf_pages(filepath: Path) -> tuple[int, float]:
+    started = time.monotonic()
+    num_pages = len(_get_pdf_reader(filepath).pages)
+
+    return num_pages, time.monotonic() - started
+
+
+def _extract_pdf_pages(filepath: Path, start: int, stop: int) -> tuple[list[str], float]:
+    """Returns the pages, and how many seconds it took to extract them."""
+    started = time.monotonic()
+    pages = list(TextExtractor.iter_pages_of_pdf(_get_pdf_reader(filepath), start, stop))
+
+    return pages, time.monotonic() - started
+
+
 class TextExtractor:
     @staticmethod
     def extract_from_plain_text(filepath: Path) -> str:
@@ -55,12 +104,20 @@ class TextExtractor:
             f"{encodings_to_try}. Errors: {error_details}"
         )
 
+    @staticmethod
+    def iter_pages_of_pdf(
+        reader: PdfReader, start: int = 0, stop: int | None = None
+    ) -> Iterator[str]:
+        for page in reader.pages[start:stop]:
+            yield TextSanitizer.sanitize(page.extract_text())
+
+    @staticmethod
+    def iter_pdf_pages(filepath: Path, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        return TextExtractor.iter_pages_of_pdf(PdfReader(filepath), start, stop)
+
     @staticmethod
     def extract_from_pdf(filepath: Path) -> str:
-        reader = PdfReader(filepath)
-        extracted_text = " ".join([page.extract_text() for page in reader.pages])
-        sanitized_text = TextSanitizer.sanitize(extracted_text)
-        return sanitized_text
+        return " ".join(TextExtractor.iter_pdf_pages(filepath))
 
     @staticmethod
     def extract_from_docx(filepath: Path) -> str:
@@ -104,3 +161,70 @@ class TextExtractor:
                 extracted_text = self.extract_from_plain_text(filepath)
 
         return extracted_text.strip()
+
+    async def extract_async(self, filepath: Path, mimetype: str | None = None) -> str:
+        """Same as `extract`, but runs in the text extraction process pool."""
+        return await text_extraction_pool.run(_extract, filepath, mimetype)
+
+    async def iter_extract(self, filepath: Path, mimetype: str | None = None) -> AsyncIterator[str]:
+        """Extracts the text in parts, in the text extraction process pool.
+
+        PDFs are extracted a few pages at a time, and the next pages are
+        extracted while the caller works on the current ones. Other files are
+        extracted in one part. The parts add up to the text that `extract`
+        returns, before it is stripped.
+
+        The timeout of the text extraction pool is for the whole file, so a
+        PDF fails once its pages have taken that long to extract in total.
+        """
+        mimetype = mimetype or magic.from_file(filepath, mime=True)
+
+        if mimetype != TextMimeTypes.PDF:
+            yield await self.extract_async(filepath, mimetype)
+            return
+
+        # Only the time spent extracting counts, not the time the caller takes
+        time_left = text_extraction_pool.timeout
+
+        def _spend(seconds: float):
+            nonlocal time_left
+            time_left -= seconds
+            if time_left <= 0:
+                raise FileExtractionTimeoutException(
+                    "Extracting the text of the file took more than "
+                    f"{text_extraction_pool.timeout} seconds"
+                )
+
+        num_pages, seconds = await text_extraction_pool.run(
+            _count_pdf_pages, filepath, timeout=time_left
+        )
+        _spend(seconds)
+
+        def _extract_pages(start: int) -> asyncio.Task[tuple[list[str], float]]:
+            return asyncio.create_task(
+                text_extraction_pool.run(
+                    _extract_pdf_pages,
+                    filepath,
+                    start,
+                    start + PDF_PAGES_PER_TASK,
+                    timeout=time_left,
+                )
+            )
+
+        next_pages = _extract_pages(0) if num_pages else None
+        try:
+            for start in range(0, num_pages, PDF_PAGES_PER_TASK):
+                pages, seconds = await next_pages
+                _spend(seconds)
+                next_pages = (
+                    _extract_pages(start + PDF_PAGES_PER_TASK)
+                    if start + PDF_PAGES_PER_TASK < num_pages
+                    else None
+                )
+
+                for i, page in enumerate(pages, start=start):
+                    # Pages are joined with a space, as in `extract_from_pdf`
+                    yield page if i == 0 else " " + page
+        finally:
+            if next_pages is not None:
+                next_pages.cancel()
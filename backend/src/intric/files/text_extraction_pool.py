@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+from weakref import WeakKeyDictionary
+
+from intric.main.config import get_settings
+from intric.main.exceptions import FileExtractionTimeoutException
+from intric.main.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class TextExtractionPool:
+    """Runs CPU-heavy text extraction in a bounded pool of worker processes,
+    so that it does not block the event loop.
+
+    A file that takes longer than `timeout` seconds fails, and the pool is
+    restarted to get rid of the worker that is stuck on it. Extractions that
+    were running in other workers of that pool are retried once on the new
+    pool.
+    """
+
+    def __init__(self, *, max_workers: int, timeout: float):
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Only submit as many tasks as there are workers, so that the timeout
+        # of a task does not start running while it is waiting in the queue
+        self._semaphores: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            WeakKeyDictionary()
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        return self._semaphores.setdefault(
+            asyncio.get_running_loop(), asyncio.Semaphore(self.max_workers)
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        if self._executor is not executor:
+            # Already restarted by someone else
+            return
+
+        self._executor = None
+
+        # The executor has no way of stopping a running task, so stop the workers
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., T], *args, timeout: Optional[float] = None) -> T:
+        """Runs `func` in a worker. `timeout`, if given, replaces the timeout
+        of the pool for this call."""
+        async with self._get_semaphore():
+            return await self._run(
+                func, *args, timeout=self.timeout if timeout is None else timeout
+            )
+
+    async def _run(self, func: Callable[..., T], *args, timeout: float) -> T:
+        for attempt in range(2):
+            executor = self._get_executor()
+            future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+            try:
+                return await asyncio.wait_for(future, timeout=timeout)
+            except asyncio.TimeoutError as e:
+                logger.warning(f"Text extraction timed out after {timeout} seconds")
+                self._restart(executor)
+
+                raise FileExtractionTimeoutException(
+                    f"Extracting the text of the file took more than {self.timeout} seconds"
+                ) from e
+            except BrokenProcessPool:
+                self._restart(executor)
+
+                if attempt > 0:
+                    raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+text_extraction_pool = TextExtractionPool(
+    max_workers=get_settings().text_extraction_max_workers,
+    timeout=get_settings().text_extraction_timeout,
+)
@@ -11,6 +11,8 @@ from intric.collections.presentation.collection_models import (
     CollectionPublic,
     CollectionUpdate,
 )
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.embedding_models.presentation.embedding_model_models import ReembedRequest
 from intric.groups_legacy.api import group_protocol
 from intric.groups_legacy.api.group_models import (
     CreateGroupRequest,
@@ -193,6 +195,48 @@ async def upload_file(
     )
 
 
+@router.post(
+    "/{id}/info-blobs/upload/batch/",
+    response_model=JobPublic,
+    status_code=202,
+    responses=responses.get_responses([400, 403, 404, 413, 415]),
+)
+async def upload_files(
+    id: UUID,
+    files: list[UploadFile],
+    container: Container = Depends(get_container(with_user=True)),
+):
+    """Starts one job that uploads all the files, use the job operations to keep
+    track of this job. The status of every file is published on the
+    `upload_updates` channel while the job runs. Only text files are supported."""
+
+    group_service = container.group_service()
+
+    return await group_service.add_files_to_group(group_id=id, files=files)
+
+
+@router.post(
+    "/{id}/embedding-model/",
+    response_model=JobPublic,
+    status_code=202,
+    responses=responses.get_responses([400, 403, 404]),
+)
+async def reembed_group(
+    id: UUID,
+    reembed_req: ReembedRequest,
+    container: Container = Depends(get_container(with_user=True)),
+):
+    """Moves the collection to another embedding model. Starts a job, use the
+    job operations to keep track of this job. The collection is searched with
+    its current embedding model until the job is done."""
+
+    service = container.reembedding_service()
+
+    return await service.queue_reembedding(
+        KnowledgeSource(group_id=id), embedding_model_id=reembed_req.embedding_model.id
+    )
+
+
 @router.post(
     "/{id}/searches/",
     response_model=PaginatedResponse[SemanticSearchResponse],
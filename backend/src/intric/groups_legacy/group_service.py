@@ -21,6 +21,8 @@ from intric.users.user import UserInDB
 if TYPE_CHECKING:
     from tempfile import SpooledTemporaryFile
 
+    from fastapi import UploadFile
+
     from intric.actors import ActorManager
     from intric.jobs.task_service import TaskService
     from intric.spaces.space_repo import SpaceRepository
@@ -154,9 +156,7 @@ class GroupService:
     async def update_group_size(self, group_id: UUID):
         return await self.repo.update_group_size(group_id=group_id)
 
-    async def add_file_to_group(
-        self, group_id: UUID, file: "SpooledTemporaryFile", mimetype: str, filename: str
-    ):
+    async def _get_space_to_add_files_to(self, group_id: UUID):
         space = await self.space_repo.get_space_by_collection(collection_id=group_id)
         group = space.get_collection(collection_id=group_id)
         actor = self.actor_manager.get_space_actor_from_space(space)
@@ -170,6 +170,13 @@ class GroupService:
                 f"Space does not have embedding model {group.embedding_model.name} enabled."
             )
 
+        return space
+
+    async def add_file_to_group(
+        self, group_id: UUID, file: "SpooledTemporaryFile", mimetype: str, filename: str
+    ):
+        space = await self._get_space_to_add_files_to(group_id)
+
         return await self.task_service.queue_upload_file(
             group_id=group_id,
             space_id=space.id,
@@ -178,6 +185,13 @@ class GroupService:
             filename=filename,
         )
 
+    async def add_files_to_group(self, group_id: UUID, files: list["UploadFile"]):
+        space = await self._get_space_to_add_files_to(group_id)
+
+        return await self.task_service.queue_upload_files(
+            group_id=group_id, space_id=space.id, files=files
+        )
+
     async def delete_group(self, group_id: UUID):
         space = await self.space_repo.get_space_by_collection(collection_id=group_id)
         group = space.get_collection(collection_id=group_id)
@@ -1,3 +1,4 @@
+import hashlib
 from typing import Optional
 from uuid import UUID
 
@@ -23,12 +24,18 @@ class InfoBlobMetadata(InfoBlobMetadataUpsertPublic):
 
 
 class InfoBlobAdd(InfoBlobBase, InfoBlobMetadataUpsertPublic):
+    # Set when the id is needed before the info blob is added
+    id: Optional[UUID] = None
     size: Optional[int] = None
     user_id: UUID
     group_id: Optional[UUID] = None
     website_id: Optional[UUID] = None
     tenant_id: UUID
     integration_knowledge_id: Optional[UUID] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sitemap_lastmod: Optional[str] = None
+    file_checksum: Optional[str] = None
 
     @model_validator(mode="after")
     def require_one_of_group_id_and_website_id(self) -> "InfoBlobAdd":
@@ -43,6 +50,11 @@ class InfoBlobAdd(InfoBlobBase, InfoBlobMetadataUpsertPublic):
 
         return self
 
+    @computed_field
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
 
 class InfoBlobAddToDB(InfoBlobAdd):
     embedding_model_id: UUID
@@ -64,6 +76,11 @@ class InfoBlobInDBNoText(InDB):
     user_id: UUID
     tenant_id: UUID
     size: int
+    content_hash: Optional[str] = None
+    file_checksum: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sitemap_lastmod: Optional[str] = None
 
     group_id: Optional[UUID] = None
     website_id: Optional[UUID] = None
@@ -77,7 +94,7 @@ class InfoBlobInDB(InfoBlobInDBNoText):
     text: str
 
 
-class InfoBlobInDBWithScore(InfoBlobInDB):
+class InfoBlobInDBNoTextWithScore(InfoBlobInDBNoText):
     score: float
 
 
@@ -1,19 +1,113 @@
-from typing import Optional
+import struct
+from typing import AsyncIterator, Iterator, Optional
 from uuid import UUID
 
+import numpy as np
 import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import TSQUERY
 from sqlalchemy.orm import defer
 
 from intric.database.database import AsyncSession
 from intric.database.repositories.base import BaseRepositoryDelegate
-from intric.database.tables.info_blob_chunk_table import InfoBlobChunks
+from intric.database.tables.info_blob_chunk_table import (
+    HNSW_INDEXED_DIMENSIONS,
+    TEXT_SEARCH_CONFIG,
+    InfoBlobChunks,
+)
 from intric.database.tables.info_blobs_table import InfoBlobs
 from intric.info_blobs.info_blob import (
+    InfoBlobChunk,
     InfoBlobChunkInDB,
     InfoBlobChunkInDBWithScore,
     InfoBlobChunkWithEmbedding,
 )
 
+# Bounds for the size of the dynamic candidate list of the HNSW index scan
+HNSW_MIN_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+
+# Deferred columns, which are never loaded with the chunks
+CHUNK_COLUMNS_NOT_LOADED = ["embedding", "text_search"]
+
+# Columns written by a bulk copy, the rest get their server defaults
+COPY_COLUMNS = (
+    "text",
+    "chunk_no",
+    "size",
+    "embedding",
+    "info_blob_id",
+    "tenant_id",
+    "staged_embedding_model_id",
+)
+COPY_NULL = struct.pack("!i", -1)
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+# Rows are handed to the connection in buffers of about this many bytes
+COPY_BUFFER_SIZE = 512 * 1024
+
+
+def _encode_copy_rows(
+    chunks: list[InfoBlobChunk],
+    embeddings: np.ndarray,
+    staged_embedding_model_id: Optional[UUID] = None,
+) -> Iterator[bytes]:
+    """Encodes the chunks as rows of a binary COPY stream.
+
+    Every field is prefixed with its length (-1 for null), and vectors are
+    encoded the way pgvector receives them: dimensions, an unused flag and
+    big-endian floats.
+    """
+    _, dimensions = embeddings.shape
+    vector_header = struct.pack("!hh", dimensions, 0)
+    vectors = embeddings.astype(">f4", copy=False)
+    staged = (
+        COPY_NULL
+        if staged_embedding_model_id is None
+        else struct.pack("!i", 16) + staged_embedding_model_id.bytes
+    )
+
+    yield COPY_SIGNATURE
+
+    for chunk, vector in zip(chunks, vectors):
+        text = chunk.text.encode()
+        embedding = vector_header + vector.tobytes()
+
+        yield b"".join(
+            (
+                struct.pack("!h", len(COPY_COLUMNS)),
+                struct.pack("!i", len(text)),
+                text,
+                struct.pack("!ii", 4, chunk.chunk_no),
+                # Same estimate as InfoBlobChunkWithEmbedding.size
+                struct.pack("!ii", 4, len(text) + dimensions * 4),
+                struct.pack("!i", len(embedding)),
+                embedding,
+                struct.pack("!i", 16),
+                chunk.info_blob_id.bytes,
+                struct.pack("!i", 16),
+                chunk.tenant_id.bytes,
+                staged,
+            )
+        )
+
+    yield COPY_TRAILER
+
+
+async def _copy_source(rows: Iterator[bytes]) -> AsyncIterator[bytes]:
+    # asyncpg copies from paths, file-like objects, async iterables and
+    # buffers, but not from plain iterators
+    buffer = bytearray()
+    for row in rows:
+        buffer += row
+        if len(buffer) >= COPY_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
 
 class InfoBlobChunkRepo:
     def __init__(self, session: AsyncSession):
@@ -34,12 +128,12 @@ class InfoBlobChunkRepo:
                 InfoBlobs.group_id.in_(group_ids),
                 InfoBlobs.website_id.in_(website_ids),
                 InfoBlobs.integration_knowledge_id.in_(integration_knowledge_ids),
-            )
+            ),
+            # Staged chunks are searched once they replace the current ones
+            InfoBlobChunks.staged_embedding_model_id.is_(None),
         )
 
-    async def add(
-        self, chunks: list[InfoBlobChunkWithEmbedding]
-    ) -> list[InfoBlobChunkInDB]:
+    async def add(self, chunks: list[InfoBlobChunkWithEmbedding]) -> list[InfoBlobChunkInDB]:
         stmt = (
             sa.insert(InfoBlobChunks)
             .values([chunk.model_dump() for chunk in chunks])
@@ -48,6 +142,57 @@ class InfoBlobChunkRepo:
 
         return await self.delegate.get_models_from_query(stmt)
 
+    async def copy(
+        self,
+        chunks: list[InfoBlobChunk],
+        embeddings: np.ndarray,
+        *,
+        staged_embedding_model_id: Optional[UUID] = None,
+    ):
+        """Bulk loads the chunks, with the embeddings in the same order, using
+        a binary COPY in the transaction of the session.
+
+        Unlike `add`, nothing is returned, which makes this the path to use
+        when ingesting. Chunks of a re-embedding are staged for their
+        embedding model with `staged_embedding_model_id`.
+        """
+        if not chunks:
+            return
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        await raw_connection.driver_connection.copy_to_table(
+            InfoBlobChunks.__tablename__,
+            source=_copy_source(
+                _encode_copy_rows(
+                    chunks, embeddings, staged_embedding_model_id=staged_embedding_model_id
+                )
+            ),
+            columns=COPY_COLUMNS,
+            format="binary",
+        )
+
+    async def get_by_info_blobs(self, info_blob_ids: list[UUID]) -> list[InfoBlobChunk]:
+        """Returns the current chunks of the info blobs, without embeddings."""
+        stmt = (
+            sa.select(
+                InfoBlobChunks.text,
+                InfoBlobChunks.chunk_no,
+                InfoBlobChunks.info_blob_id,
+                InfoBlobChunks.tenant_id,
+            )
+            .where(
+                InfoBlobChunks.info_blob_id.in_(info_blob_ids),
+                InfoBlobChunks.staged_embedding_model_id.is_(None),
+            )
+            .order_by(InfoBlobChunks.info_blob_id, InfoBlobChunks.chunk_no)
+        )
+
+        result = await self.session.execute(stmt)
+
+        return [InfoBlobChunk.model_validate(row, from_attributes=True) for row in result]
+
     async def delete_by_info_blob(self, info_blob_id: UUID):
         stmt = (
             sa.delete(InfoBlobChunks)
@@ -57,6 +202,41 @@ class InfoBlobChunkRepo:
 
         return await self.delegate.get_models_from_query(stmt)
 
+    async def _prepare_vector_search(self, dimensions: int, limit: int):
+        if dimensions in HNSW_INDEXED_DIMENSIONS:
+            # Route the search to the HNSW index of this dimension. Both the
+            # expression and the predicate have to match the partial index
+            # verbatim (with the dimension inlined, not bound) for the planner
+            # to be able to use it.
+            embedding_column = sa.cast(InfoBlobChunks.embedding, Vector(dimensions))
+            dimension_filter = sa.func.vector_dims(InfoBlobChunks.embedding) == sa.literal_column(
+                str(dimensions)
+            )
+
+            # The filter on sources is applied after the index scan, so keep
+            # scanning the index until we have enough rows that pass the filter
+            ef_search = min(max(limit, HNSW_MIN_EF_SEARCH), HNSW_MAX_EF_SEARCH)
+            await self.session.execute(sa.text(f"SET LOCAL hnsw.ef_search = {ef_search};"))
+            # Needs pgvector 0.8.0 or later, which the migrations check for
+            await self.session.execute(sa.text("SET LOCAL hnsw.iterative_scan = strict_order;"))
+
+        else:
+            # Dimensions without an index of their own can not use an ANN index,
+            # so fall back to an exact search over the untyped column.
+            #
+            # Postgres will sometimes think that a sequential scan of the whole table is
+            # preferable to an index scan, when it is not. This is because this particular
+            # table has a lot of data in TOAST tables, which postgres apparently fails
+            # to account for when planning the query.
+            #
+            # Reference: https://github.com/pgvector/pgvector/issues/662
+            embedding_column = InfoBlobChunks.embedding
+            dimension_filter = sa.true()
+
+            await self.session.execute(sa.text("SET LOCAL enable_seqscan = off;"))
+
+        return embedding_column, dimension_filter
+
     async def semantic_search(
         self,
         embedding: list[float],
@@ -66,46 +246,47 @@ class InfoBlobChunkRepo:
         integration_knowledge_ids: Optional[list[UUID]] = [],
         limit: int = 30,
     ) -> list[InfoBlobChunkInDBWithScore]:
-        # Postgres will sometimes think that a sequential scan of the whole table is
-        # preferable to an index scan, when it is not. This is because this particular
-        # table has a lot of data in TOAST tables, which postgres apparently fails
-        # to account for when planning the query.
-        #
-        # The solution below is a crude one, and we should revisit this at some point
-        # in the future. This should also be the first place we look at if something
-        # is slow. Note the "LOCAL", ensuring that we only punish sequential scans for
-        # this particular session. This might make all future queries in this transaction
-        # not be able to run sequential, but we will see if that is an issue.
-        #
-        # Reference: https://github.com/pgvector/pgvector/issues/662
-        # TODO: Solve this issue in a more elegant way.
-
-        await self.session.execute(sa.text("SET LOCAL enable_seqscan = off;"))
+        embedding_column, dimension_filter = await self._prepare_vector_search(
+            dimensions=len(embedding), limit=limit
+        )
+        distance = embedding_column.cosine_distance(embedding)
 
-        stmt = (
-            sa.select(
-                InfoBlobChunks,
-                InfoBlobChunks.embedding.cosine_distance(embedding),
-                InfoBlobs.title,
-            )
+        # Retrieval is done in two phases. The first phase ranks the candidates
+        # on ids and distances only, so that the (often TOASTed) chunk text is
+        # never read for rows that do not make it into the top K. The second
+        # phase fetches the text and titles of only those K rows.
+        ranked = (
+            sa.select(InfoBlobChunks.id, distance.label("distance"))
             .join(InfoBlobs)
-            .options(defer(InfoBlobChunks.embedding))
-            .order_by(InfoBlobChunks.embedding.cosine_distance(embedding))
+            .where(dimension_filter)
+            .order_by(distance)
             .limit(limit)
         )
 
-        stmt = self._filter_on_sources(
-            stmt,
+        ranked = self._filter_on_sources(
+            ranked,
             group_ids,
             website_ids,
             integration_knowledge_ids=integration_knowledge_ids,
+        ).subquery("ranked")
+
+        stmt = (
+            sa.select(
+                InfoBlobChunks,
+                ranked.c.distance,
+                InfoBlobs.title,
+            )
+            .join(ranked, InfoBlobChunks.id == ranked.c.id)
+            .join(InfoBlobs, InfoBlobChunks.info_blob_id == InfoBlobs.id)
+            .options(defer(InfoBlobChunks.embedding))
+            .order_by(ranked.c.distance)
         )
 
         chunks_in_db = await self.session.execute(stmt)
 
         chunks_with_score = [
             InfoBlobChunkInDBWithScore(
-                **chunk[0].to_dict(exclude="embedding"),
+                **chunk[0].to_dict(exclude=CHUNK_COLUMNS_NOT_LOADED),
                 score=1 - chunk[1],
                 info_blob_title=chunk[2],
             )
@@ -114,20 +295,79 @@ class InfoBlobChunkRepo:
 
         return chunks_with_score
 
+    async def get_similarities(
+        self, embedding: list[float], chunk_ids: list[UUID]
+    ) -> dict[UUID, float]:
+        """Returns the cosine similarity of each of the chunks to the embedding."""
+        distance = InfoBlobChunks.embedding.cosine_distance(embedding)
+        stmt = sa.select(InfoBlobChunks.id, distance).where(InfoBlobChunks.id.in_(chunk_ids))
+
+        result = await self.session.execute(stmt)
+
+        return {id: 1 - distance for id, distance in result}
+
     async def keyword_search(
         self,
         search_string: str,
         *,
-        group_ids: Optional[list[UUID]] = None,
+        group_ids: Optional[list[UUID]] = [],
+        website_ids: Optional[list[UUID]] = [],
+        integration_knowledge_ids: Optional[list[UUID]] = [],
         limit: int = 30,
-    ):
-        stmt = (
-            sa.select(InfoBlobChunks)
-            .filter(InfoBlobChunks.text.match(search_string))
+    ) -> list[InfoBlobChunkInDBWithScore]:
+        config = sa.literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+
+        # Match chunks containing any of the terms, and let the ranking favour
+        # the chunks that contain the most of them. The terms are the lexemes
+        # of the search string, quoted, so that none of them is read as an
+        # operator of the query
+        lexeme = sa.func.unnest(
+            sa.func.tsvector_to_array(sa.func.to_tsvector(config, search_string))
+        ).column_valued("lexeme")
+        quoted_lexeme = sa.func.concat(
+            "'",
+            sa.func.replace(sa.func.replace(lexeme, "\\", "\\\\"), "'", "''"),
+            "'",
+        )
+        query = sa.cast(
+            sa.select(sa.func.string_agg(quoted_lexeme, " | ")).scalar_subquery(), TSQUERY
+        )
+
+        # Retrieval is done in two phases, like in `semantic_search`. Every
+        # match is ranked, so that a chunk with a rare term is not lost among
+        # the matches of a common one, but on its stored search vector, so
+        # that the text is not read. Only the top K rows have their text
+        # fetched.
+        rank = sa.func.ts_rank_cd(InfoBlobChunks.text_search, query)
+        ranked = (
+            sa.select(InfoBlobChunks.id, rank.label("rank"))
+            .join(InfoBlobs)
+            .where(InfoBlobChunks.text_search.op("@@")(query))
+            .order_by(rank.desc())
             .limit(limit)
         )
+        ranked = self._filter_on_sources(
+            ranked,
+            group_ids,
+            website_ids,
+            integration_knowledge_ids=integration_knowledge_ids,
+        ).subquery("ranked")
+
+        stmt = (
+            sa.select(InfoBlobChunks, ranked.c.rank, InfoBlobs.title)
+            .join(ranked, InfoBlobChunks.id == ranked.c.id)
+            .join(InfoBlobs, InfoBlobChunks.info_blob_id == InfoBlobs.id)
+            .options(defer(InfoBlobChunks.embedding))
+            .order_by(ranked.c.rank.desc())
+        )
 
-        if group_ids is not None:
-            stmt = self._filter_on_sources(stmt, group_ids)
+        chunks_in_db = await self.session.execute(stmt)
 
-        return await self.delegate.get_models_from_query(stmt)
+        return [
+            InfoBlobChunkInDBWithScore(
+                **chunk[0].to_dict(exclude=CHUNK_COLUMNS_NOT_LOADED),
+                score=chunk[1],
+                info_blob_title=chunk[2],
+            )
+            for chunk in chunks_in_db
+        ]
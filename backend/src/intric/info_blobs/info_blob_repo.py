@@ -1,7 +1,9 @@
+from typing import Any, Optional
 from uuid import UUID
 
 import sqlalchemy as sa
-from sqlalchemy.orm import defer, selectinload
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import InstrumentedAttribute, defer, joinedload, selectinload
 
 from intric.database.database import AsyncSession
 from intric.database.repositories.base import BaseRepositoryDelegate
@@ -18,6 +20,7 @@ from intric.info_blobs.info_blob import (
     InfoBlobInDBNoText,
     InfoBlobUpdate,
 )
+from intric.main.exceptions import BadRequestException
 
 
 class InfoBlobRepository:
@@ -35,42 +38,43 @@ class InfoBlobRepository:
         )
         self.session = session
 
-    async def _get_group(self, group_id: UUID):
-        stmt = sa.select(CollectionsTable).where(CollectionsTable.id == group_id)
-        group = await self.session.scalar(stmt)
-
-        return group
-
-    async def _get_website(self, website_id: UUID):
-        stmt = sa.select(Websites).where(Websites.id == website_id)
-        website = await self.session.scalar(stmt)
-
-        return website
+    async def _lock_source(self, info_blob: InfoBlobAdd):
+        # The source is locked until the transaction ends, so that it is not
+        # moved to another embedding model while the info blob is added. Only
+        # FOR KEY SHARE, which other uploads to the source do not wait for
+        if info_blob.group_id is not None:
+            table, id = CollectionsTable, info_blob.group_id
+        elif info_blob.website_id is not None:
+            table, id = Websites, info_blob.website_id
+        else:
+            table, id = IntegrationKnowledge, info_blob.integration_knowledge_id
 
-    async def _get_integration_knowledge(self, knowledge_id: UUID):
-        stmt = sa.select(IntegrationKnowledge).where(IntegrationKnowledge.id == knowledge_id)
-        knowledge = await self.session.scalar(stmt)
+        stmt = (
+            sa.select(table.embedding_model_id)
+            .where(table.id == id)
+            .with_for_update(read=True, key_share=True)
+        )
 
-        return knowledge
+        return await self.session.scalar(stmt)
 
-    async def add(self, info_blob: InfoBlobAdd):
-        if info_blob.group_id is not None:
-            group = await self._get_group(info_blob.group_id)
-            embedding_model_id = group.embedding_model_id
+    async def add(self, info_blob: InfoBlobAdd, embedding_model_id: Optional[UUID] = None):
+        """Adds the info blob with the embedding model of its source.
 
-        elif info_blob.website_id is not None:
-            website = await self._get_website(info_blob.website_id)
-            embedding_model_id = website.embedding_model_id
+        `embedding_model_id` is the embedding model that the text is, or will
+        be, embedded with. Raises if the source has been moved to another
+        embedding model since.
+        """
+        source_embedding_model_id = await self._lock_source(info_blob)
 
-        elif info_blob.integration_knowledge_id is not None:
-            integration_knowledge = await self._get_integration_knowledge(
-                knowledge_id=info_blob.integration_knowledge_id
+        if embedding_model_id is not None and embedding_model_id != source_embedding_model_id:
+            raise BadRequestException(
+                f"'{info_blob.title}' was embedded with another embedding model than the "
+                "one its knowledge is now using. Add it again."
             )
-            embedding_model_id = integration_knowledge.embedding_model_id
 
         info_blob_to_db = InfoBlobAddToDB(
             **info_blob.model_dump(),
-            embedding_model_id=embedding_model_id,
+            embedding_model_id=source_embedding_model_id,
         )
 
         return await self.delegate.add(info_blob_to_db)
@@ -81,7 +85,10 @@ class InfoBlobRepository:
     async def update_size(self, info_blob_id: UUID) -> InfoBlobInDB:
         chunks_size_subquery = (
             sa.select(sa.func.coalesce(sa.func.sum(InfoBlobChunks.size), 0))
-            .where(InfoBlobChunks.info_blob_id == info_blob_id)
+            .where(
+                InfoBlobChunks.info_blob_id == info_blob_id,
+                InfoBlobChunks.staged_embedding_model_id.is_(None),
+            )
             .scalar_subquery()
         )
 
@@ -118,11 +125,98 @@ class InfoBlobRepository:
     async def get(self, id: UUID) -> InfoBlobInDB:
         return await self.delegate.get(id)
 
+    async def get_many_without_text(self, ids: list[UUID]) -> list[InfoBlobInDBNoText]:
+        stmt = (
+            sa.select(InfoBlobs)
+            .where(InfoBlobs.id.in_(ids))
+            .options(defer(InfoBlobs.text))
+            .options(joinedload(InfoBlobs.group))
+            .options(joinedload(InfoBlobs.website))
+        )
+        records = await self.session.scalars(stmt)
+
+        return [InfoBlobInDBNoText.model_validate(record) for record in records]
+
     async def get_by_title_and_group(self, title: str, group_id: UUID):
         return await self.delegate.get_by(
             conditions={InfoBlobs.title: title, InfoBlobs.group_id: group_id}
         )
 
+    async def _get_by_without_text(
+        self, conditions: dict[InstrumentedAttribute, Any]
+    ) -> Optional[InfoBlobInDBNoText]:
+        # Only the id and the validators of the info blob are needed, so the
+        # text, which can be large, is not read
+        stmt = (
+            sa.select(InfoBlobs)
+            .where(*(column == value for column, value in conditions.items()))
+            .order_by(InfoBlobs.created_at)
+            .options(defer(InfoBlobs.text))
+            .options(joinedload(InfoBlobs.group))
+            .options(joinedload(InfoBlobs.website))
+        )
+        record = await self.session.scalar(stmt)
+
+        if record is None:
+            return None
+
+        return InfoBlobInDBNoText.model_validate(record)
+
+    async def get_by_content_hash(
+        self,
+        *,
+        title: str,
+        content_hash: str,
+        url: Optional[str],
+        embedding_model_id: UUID,
+        group_id: Optional[UUID] = None,
+        website_id: Optional[UUID] = None,
+    ) -> Optional[InfoBlobInDBNoText]:
+        return await self._get_by_without_text(
+            conditions={
+                InfoBlobs.title: title,
+                InfoBlobs.content_hash: content_hash,
+                InfoBlobs.url: url,
+                InfoBlobs.embedding_model_id: embedding_model_id,
+                InfoBlobs.group_id: group_id,
+                InfoBlobs.website_id: website_id,
+            }
+        )
+
+    async def get_by_file_checksum(
+        self,
+        *,
+        title: str,
+        file_checksum: str,
+        embedding_model_id: UUID,
+        group_id: Optional[UUID] = None,
+        website_id: Optional[UUID] = None,
+    ) -> Optional[InfoBlobInDBNoText]:
+        return await self._get_by_without_text(
+            conditions={
+                InfoBlobs.title: title,
+                InfoBlobs.file_checksum: file_checksum,
+                InfoBlobs.embedding_model_id: embedding_model_id,
+                InfoBlobs.group_id: group_id,
+                InfoBlobs.website_id: website_id,
+            }
+        )
+
+    async def get_by_title_without_text(
+        self,
+        *,
+        title: str,
+        group_id: Optional[UUID] = None,
+        website_id: Optional[UUID] = None,
+    ) -> Optional[InfoBlobInDBNoText]:
+        return await self._get_by_without_text(
+            conditions={
+                InfoBlobs.title: title,
+                InfoBlobs.group_id: group_id,
+                InfoBlobs.website_id: website_id,
+            }
+        )
+
     async def delete_by_title_and_group(self, title: str, group_id: UUID) -> InfoBlobInDB:
         return await self.delegate.delete_by(
             conditions={InfoBlobs.title: title, InfoBlobs.group_id: group_id}
@@ -133,6 +227,21 @@ class InfoBlobRepository:
             conditions={InfoBlobs.title: title, InfoBlobs.website_id: website_id}
         )
 
+    async def delete_by_titles_and_website(self, titles: list[str], website_id: UUID) -> int:
+        """Deletes the info blobs of the website with any of the titles, in one
+        statement, and returns how many were deleted."""
+        if not titles:
+            return 0
+
+        # One array parameter, rather than one parameter per title
+        stmt = sa.delete(InfoBlobs).where(
+            InfoBlobs.website_id == website_id,
+            InfoBlobs.title == sa.any_(sa.bindparam("titles", titles, type_=ARRAY(sa.String))),
+        )
+        result = await self.session.execute(stmt)
+
+        return result.rowcount
+
     async def delete_by_website(self, website_id: UUID):
         await self.delegate.delete_by(conditions={InfoBlobs.website_id: website_id})
 
@@ -203,3 +312,52 @@ class InfoBlobRepository:
         stmt = sa.select(InfoBlobs.title).where(InfoBlobs.website_id == website_id)
         result = await self.session.scalars(stmt)
         return list(result)
+
+    async def get_http_validators_of_website(
+        self, website_id: UUID
+    ) -> dict[str, tuple[Optional[str], Optional[str]]]:
+        """Returns the ETag and Last-Modified of every page of the website, by
+        url. Either can be None, if the server did not send it."""
+        stmt = sa.select(InfoBlobs.url, InfoBlobs.etag, InfoBlobs.last_modified).where(
+            InfoBlobs.website_id == website_id,
+            InfoBlobs.url.is_not(None),
+        )
+        result = await self.session.execute(stmt)
+
+        return {url: (etag, last_modified) for url, etag, last_modified in result}
+
+    async def update_http_validators(
+        self, id: UUID, etag: Optional[str], last_modified: Optional[str]
+    ):
+        stmt = (
+            sa.update(InfoBlobs)
+            .values(etag=etag, last_modified=last_modified)
+            .where(InfoBlobs.id == id)
+        )
+        await self.session.execute(stmt)
+
+    async def update_file_checksum(self, id: UUID, file_checksum: Optional[str]):
+        stmt = sa.update(InfoBlobs).values(file_checksum=file_checksum).where(InfoBlobs.id == id)
+        await self.session.execute(stmt)
+
+    async def get_sitemap_lastmods_of_website(self, website_id: UUID) -> dict[str, str]:
+        """Returns the sitemap <lastmod> of every page of the website that has
+        one, by url."""
+        stmt = sa.select(InfoBlobs.url, InfoBlobs.sitemap_lastmod).where(
+            InfoBlobs.website_id == website_id,
+            InfoBlobs.url.is_not(None),
+            InfoBlobs.sitemap_lastmod.is_not(None),
+        )
+        result = await self.session.execute(stmt)
+
+        return {url: sitemap_lastmod for url, sitemap_lastmod in result}
+
+    async def update_sitemap_lastmod(
+        self, website_id: UUID, url: str, sitemap_lastmod: Optional[str]
+    ):
+        stmt = (
+            sa.update(InfoBlobs)
+            .values(sitemap_lastmod=sitemap_lastmod)
+            .where(InfoBlobs.website_id == website_id, InfoBlobs.url == url)
+        )
+        await self.session.execute(stmt)
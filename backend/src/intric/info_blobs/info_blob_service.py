@@ -7,6 +7,7 @@ from intric.groups_legacy.group_service import GroupService
 from intric.info_blobs.info_blob import (
     InfoBlobAdd,
     InfoBlobInDB,
+    InfoBlobInDBNoText,
     InfoBlobMetadataFilter,
     InfoBlobMetadataFilterPublic,
     InfoBlobUpdate,
@@ -124,11 +125,69 @@ class InfoBlobService:
                         f"({info_blob.website_id}) was replaced"
                     )
 
-    async def add_info_blob_without_validation(self, info_blob: InfoBlobAdd):
+    async def get_unchanged_info_blob(
+        self, info_blob: InfoBlobAdd, embedding_model_id: UUID
+    ) -> Optional[InfoBlobInDBNoText]:
+        """Returns the info blob that `info_blob` would replace, if it has the
+        same content and was embedded with the same embedding model."""
+        if not info_blob.title or (info_blob.group_id is None and info_blob.website_id is None):
+            return None
+
+        return await self.repo.get_by_content_hash(
+            title=info_blob.title,
+            content_hash=info_blob.content_hash,
+            url=info_blob.url,
+            embedding_model_id=embedding_model_id,
+            group_id=info_blob.group_id,
+            website_id=info_blob.website_id,
+        )
+
+    async def get_info_blob_of_same_file(
+        self,
+        *,
+        title: str,
+        file_checksum: str,
+        embedding_model_id: UUID,
+        group_id: Optional[UUID] = None,
+        website_id: Optional[UUID] = None,
+    ) -> Optional[InfoBlobInDBNoText]:
+        """Returns the info blob that a file with `title` would replace, if it
+        was extracted from the same file, and embedded with the same embedding
+        model."""
+        if group_id is None and website_id is None:
+            return None
+
+        return await self.repo.get_by_file_checksum(
+            title=title,
+            file_checksum=file_checksum,
+            embedding_model_id=embedding_model_id,
+            group_id=group_id,
+            website_id=website_id,
+        )
+
+    async def get_size_left(
+        self,
+        *,
+        title: str,
+        group_id: Optional[UUID] = None,
+        website_id: Optional[UUID] = None,
+    ) -> int:
+        """Returns how large the text of an info blob with `title` can be, when
+        the info blob with the same title, that it replaces, counts as freed."""
+        replaced_info_blob = await self.repo.get_by_title_without_text(
+            title=title, group_id=group_id, website_id=website_id
+        )
+        freed_size = replaced_info_blob.size if replaced_info_blob is not None else 0
+
+        return await self.quota_service.get_size_left(freed_size=freed_size)
+
+    async def add_info_blob_without_validation(
+        self, info_blob: InfoBlobAdd, embedding_model_id: Optional[UUID] = None
+    ):
         await self._delete_if_same_title(info_blob)
         size_of_text = await self.quota_service.add_text(info_blob.text)
         info_blob.size = size_of_text
-        info_blob_in_db = await self.repo.add(info_blob)
+        info_blob_in_db = await self.repo.add(info_blob, embedding_model_id=embedding_model_id)
 
         return info_blob_in_db
 
@@ -163,9 +222,18 @@ class InfoBlobService:
 
         return info_blob_updated
 
-    async def update_info_blob_size(self, info_blob_id: UUID):
+    async def update_info_blob_size(self, info_blob_id: UUID, update_source_size: bool = True):
+        """Adds the size of the chunks of the info blob to its size.
+
+        The size of its group or website is updated too, unless
+        `update_source_size` is False, for callers that add many info blobs and
+        update it once they are done.
+        """
         updated_info_blob = await self.repo.update_size(info_blob_id=info_blob_id)
 
+        if not update_source_size:
+            return updated_info_blob
+
         if updated_info_blob.group_id is not None:
             await self.group_service.update_group_size(updated_info_blob.group_id)
         if updated_info_blob.website_id is not None:
@@ -173,6 +241,53 @@ class InfoBlobService:
 
         return updated_info_blob
 
+    async def update_info_blob_sizes(self, info_blob_ids: list[UUID]):
+        """Same as `update_info_blob_size`, for many info blobs, but updates the
+        size of every group and website they are in only once."""
+        updated_info_blobs = [
+            await self.repo.update_size(info_blob_id=info_blob_id) for info_blob_id in info_blob_ids
+        ]
+
+        group_ids = {blob.group_id for blob in updated_info_blobs if blob.group_id is not None}
+        website_ids = {
+            blob.website_id for blob in updated_info_blobs if blob.website_id is not None
+        }
+
+        for group_id in group_ids:
+            await self.group_service.update_group_size(group_id)
+        for website_id in website_ids:
+            await self.update_website_size_service.update_website_size(website_id)
+
+        return updated_info_blobs
+
+    async def update_http_validators(
+        self, info_blob: InfoBlobInDBNoText, etag: Optional[str], last_modified: Optional[str]
+    ):
+        if (info_blob.etag, info_blob.last_modified) == (etag, last_modified):
+            return
+
+        await self.repo.update_http_validators(info_blob.id, etag=etag, last_modified=last_modified)
+
+    async def update_file_checksum(
+        self, info_blob: InfoBlobInDBNoText, file_checksum: Optional[str]
+    ):
+        """Records the file that the unchanged text of `info_blob` was extracted
+        from this time, so that the same file is not extracted again."""
+        if file_checksum is None or info_blob.file_checksum == file_checksum:
+            return
+
+        await self.repo.update_file_checksum(info_blob.id, file_checksum=file_checksum)
+
+    async def update_sitemap_lastmod(
+        self, info_blob: InfoBlobInDBNoText, sitemap_lastmod: Optional[str]
+    ):
+        if info_blob.website_id is None or info_blob.sitemap_lastmod == sitemap_lastmod:
+            return
+
+        await self.repo.update_sitemap_lastmod(
+            info_blob.website_id, url=info_blob.url, sitemap_lastmod=sitemap_lastmod
+        )
+
     async def get_by_id(self, id: str):
         blob = await self.repo.get(id)
 
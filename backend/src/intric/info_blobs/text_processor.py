@@ -1,15 +1,37 @@
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import TYPE_CHECKING
-from uuid import UUID
+from typing import TYPE_CHECKING, AsyncIterator
+from uuid import UUID, uuid4
 
 from intric.embedding_models.infrastructure.datastore import Datastore
 from intric.files.text import TextExtractor
-from intric.info_blobs.info_blob import InfoBlobAdd
+from intric.info_blobs.info_blob import InfoBlobAdd, InfoBlobInDB
 from intric.info_blobs.info_blob_service import InfoBlobService
+from intric.main.exceptions import QuotaExceededException
 from intric.users.user import UserInDB
 
 if TYPE_CHECKING:
+    from intric.database.database import AsyncSession
     from intric.embedding_models.domain.embedding_model import EmbeddingModel
+    from intric.jobs.task_models import UploadedFile
+
+# Files that are extracted at the same time, and embedded together
+FILES_PER_BATCH = 10
+
+
+def _file_checksum(filepath: Path) -> str:
+    with filepath.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+async def _get_file_checksum(filepath: Path, file_checksum: str | None) -> str:
+    # Uploaded files are checksummed while they are saved. Files downloaded
+    # by a crawl, and uploads queued before they were, are read again
+    if file_checksum is not None:
+        return file_checksum
+
+    return await asyncio.to_thread(_file_checksum, filepath)
 
 
 class TextProcessor:
@@ -19,11 +41,13 @@ class TextProcessor:
         extractor: TextExtractor,
         datastore: Datastore,
         info_blob_service: InfoBlobService,
+        session: "AsyncSession",
     ):
         self.user = user
         self.extractor = extractor
         self.datastore = datastore
         self.info_blob_service = info_blob_service
+        self.session = session
 
     async def process_file(
         self,
@@ -34,16 +58,227 @@ class TextProcessor:
         mimetype: str | None = None,
         group_id: UUID | None = None,
         website_id: UUID | None = None,
+        update_source_size: bool = True,
+        file_checksum: str | None = None,
     ):
-        text = self.extractor.extract(filepath, mimetype)
+        # The same file is already extracted, chunked and embedded, and its
+        # size counted. Checked before anything is extracted or embedded
+        file_checksum = await _get_file_checksum(filepath, file_checksum)
+        unchanged_info_blob = await self.info_blob_service.get_info_blob_of_same_file(
+            title=filename,
+            file_checksum=file_checksum,
+            embedding_model_id=embedding_model.id,
+            group_id=group_id,
+            website_id=website_id,
+        )
+        if unchanged_info_blob is not None:
+            return unchanged_info_blob
 
-        return await self.process_text(
-            text=text,
+        # The quota is checked again when the info blob is added, but by then
+        # the whole file is embedded, so a file that does not fit is stopped
+        # as soon as its text grows too large
+        size_left = await self.info_blob_service.get_size_left(
+            title=filename, group_id=group_id, website_id=website_id
+        )
+
+        # The text is chunked and embedded while the rest of the file is still
+        # being extracted, so the id of the info blob is decided up front. The
+        # parts are only kept to be stored as the text of the info blob
+        info_blob_id = uuid4()
+        parts = []
+
+        async def _iter_text():
+            size = 0
+            async for part in self.extractor.iter_extract(filepath, mimetype):
+                size += len(part.encode("utf-8"))
+                if size > size_left:
+                    raise QuotaExceededException("Quota limit exceeded.")
+
+                parts.append(part)
+                yield part
+
+        chunk_embedding_list = await self.datastore.embed_stream(
+            _iter_text(), info_blob_id=info_blob_id, embedding_model=embedding_model
+        )
+
+        info_blob_add = InfoBlobAdd(
+            id=info_blob_id,
             title=filename,
-            embedding_model=embedding_model,
+            user_id=self.user.id,
+            text="".join(parts).strip(),
             group_id=group_id,
             website_id=website_id,
+            tenant_id=self.user.tenant_id,
+            file_checksum=file_checksum,
+        )
+        parts.clear()
+
+        # A different file with the same text, like a PDF that was saved again,
+        # or a file uploaded before files were checksummed. Its embeddings are
+        # thrown away, rather than the same chunks stored again
+        unchanged_info_blob = await self.info_blob_service.get_unchanged_info_blob(
+            info_blob_add, embedding_model_id=embedding_model.id
+        )
+        if unchanged_info_blob is not None:
+            await self.info_blob_service.update_file_checksum(
+                unchanged_info_blob, file_checksum=file_checksum
+            )
+            return unchanged_info_blob
+
+        info_blob = await self.info_blob_service.add_info_blob_without_validation(
+            info_blob_add, embedding_model_id=embedding_model.id
         )
+        await self.datastore.add_embeddings(chunk_embedding_list)
+
+        return await self.info_blob_service.update_info_blob_size(
+            info_blob.id, update_source_size=update_source_size
+        )
+
+    async def iter_process_files(
+        self,
+        *,
+        files: list["UploadedFile"],
+        embedding_model: "EmbeddingModel",
+        group_id: UUID | None = None,
+        website_id: UUID | None = None,
+    ) -> AsyncIterator[tuple["UploadedFile", InfoBlobInDB | Exception]]:
+        """Processes the files a batch at a time, and yields every file with its
+        info blob, or with the exception that stopped it from being processed,
+        as soon as its batch is done.
+
+        Like `process_file`, a file that is the same as the one its info blob
+        was extracted from is not extracted again. The chunks of all files in a
+        batch are embedded together, and if that fails, every file added in the
+        batch is rolled back and fails with it. The sizes of the info blobs, and
+        of their group or website, are updated once the files are processed,
+        also when processing them stops partway.
+        """
+        added_info_blob_ids = []
+
+        try:
+            async for result in self._iter_process_batches(
+                files=files,
+                embedding_model=embedding_model,
+                group_id=group_id,
+                website_id=website_id,
+                added_info_blob_ids=added_info_blob_ids,
+            ):
+                yield result
+        finally:
+            await self.info_blob_service.update_info_blob_sizes(added_info_blob_ids)
+
+    async def _iter_process_batches(
+        self,
+        *,
+        files: list["UploadedFile"],
+        embedding_model: "EmbeddingModel",
+        group_id: UUID | None,
+        website_id: UUID | None,
+        added_info_blob_ids: list[UUID],
+    ) -> AsyncIterator[tuple["UploadedFile", InfoBlobInDB | Exception]]:
+        for start in range(0, len(files), FILES_PER_BATCH):
+            batch = files[start : start + FILES_PER_BATCH]
+
+            file_checksums = [
+                await _get_file_checksum(Path(file.filepath), file.checksum) for file in batch
+            ]
+            same_file_info_blobs = [
+                await self.info_blob_service.get_info_blob_of_same_file(
+                    title=file.filename,
+                    file_checksum=file_checksum,
+                    embedding_model_id=embedding_model.id,
+                    group_id=group_id,
+                    website_id=website_id,
+                )
+                for file, file_checksum in zip(batch, file_checksums)
+            ]
+
+            texts = iter(
+                await asyncio.gather(
+                    *(
+                        self.extractor.extract_async(Path(file.filepath), file.mimetype)
+                        for file, info_blob in zip(batch, same_file_info_blobs)
+                        if info_blob is None
+                    ),
+                    return_exceptions=True,
+                )
+            )
+
+            results = []
+            added_info_blobs = []
+            added_indices = []
+            try:
+                async with self.session.begin_nested():
+                    for file, file_checksum, same_file_info_blob in zip(
+                        batch, file_checksums, same_file_info_blobs
+                    ):
+                        if same_file_info_blob is not None:
+                            results.append((file, same_file_info_blob))
+                            continue
+
+                        text = next(texts)
+                        if isinstance(text, Exception):
+                            results.append((file, text))
+                            continue
+
+                        info_blob_add = InfoBlobAdd(
+                            title=file.filename,
+                            user_id=self.user.id,
+                            text=text,
+                            group_id=group_id,
+                            website_id=website_id,
+                            tenant_id=self.user.tenant_id,
+                            file_checksum=file_checksum,
+                        )
+
+                        # A file over the quota fails on its own, and the info
+                        # blob it would have replaced is kept
+                        try:
+                            async with self.session.begin_nested():
+                                info_blob, added = await self._add_text_of_file(
+                                    info_blob_add, embedding_model=embedding_model
+                                )
+                        except Exception as e:
+                            results.append((file, e))
+                            continue
+
+                        if added:
+                            added_indices.append(len(results))
+                            added_info_blobs.append(info_blob)
+                        results.append((file, info_blob))
+
+                    await self.datastore.add_many(
+                        added_info_blobs, embedding_model=embedding_model
+                    )
+            except Exception as e:
+                # Rolled back, along with the info blobs they replaced, so that
+                # no info blob is left without its chunks
+                for i in added_indices:
+                    results[i] = (results[i][0], e)
+                added_info_blobs = []
+
+            added_info_blob_ids.extend(info_blob.id for info_blob in added_info_blobs)
+
+            for result in results:
+                yield result
+
+    async def _add_text_of_file(
+        self, info_blob_add: InfoBlobAdd, embedding_model: "EmbeddingModel"
+    ) -> tuple[InfoBlobInDB, bool]:
+        # Unchanged content is already chunked and embedded, and its size counted
+        info_blob = await self.info_blob_service.get_unchanged_info_blob(
+            info_blob_add, embedding_model_id=embedding_model.id
+        )
+        if info_blob is not None:
+            await self.info_blob_service.update_file_checksum(
+                info_blob, file_checksum=info_blob_add.file_checksum
+            )
+            return info_blob, False
+
+        info_blob = await self.info_blob_service.add_info_blob_without_validation(
+            info_blob_add, embedding_model_id=embedding_model.id
+        )
+        return info_blob, True
 
     async def process_text(
         self,
@@ -54,6 +289,10 @@ class TextProcessor:
         group_id: UUID | None = None,
         website_id: UUID | None = None,
         url: str | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        sitemap_lastmod: str | None = None,
+        update_source_size: bool = True,
     ):
         info_blob_add = InfoBlobAdd(
             title=title,
@@ -63,10 +302,31 @@ class TextProcessor:
             url=url,
             website_id=website_id,
             tenant_id=self.user.tenant_id,
+            etag=etag,
+            last_modified=last_modified,
+            sitemap_lastmod=sitemap_lastmod,
         )
 
-        info_blob = await self.info_blob_service.add_info_blob_without_validation(info_blob_add)
+        # Unchanged content is already chunked and embedded, and its size counted
+        unchanged_info_blob = await self.info_blob_service.get_unchanged_info_blob(
+            info_blob_add, embedding_model_id=embedding_model.id
+        )
+        if unchanged_info_blob is not None:
+            # Some servers change the ETag of content that has not changed
+            await self.info_blob_service.update_http_validators(
+                unchanged_info_blob, etag=etag, last_modified=last_modified
+            )
+            await self.info_blob_service.update_sitemap_lastmod(
+                unchanged_info_blob, sitemap_lastmod=sitemap_lastmod
+            )
+            return unchanged_info_blob
+
+        info_blob = await self.info_blob_service.add_info_blob_without_validation(
+            info_blob_add, embedding_model_id=embedding_model.id
+        )
         await self.datastore.add(info_blob=info_blob, embedding_model=embedding_model)
-        info_blob_updated = await self.info_blob_service.update_info_blob_size(info_blob.id)
+        info_blob_updated = await self.info_blob_service.update_info_blob_size(
+            info_blob.id, update_source_size=update_source_size
+        )
 
         return info_blob_updated
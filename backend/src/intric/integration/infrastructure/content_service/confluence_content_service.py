@@ -110,7 +110,9 @@ class ConfluenceContentService:
                 integration_knowledge_id=integration_knowledge_id,
             )
 
-            info_blob = await self.info_blob_service.add_info_blob_without_validation(info_blob_add)
+            info_blob = await self.info_blob_service.add_info_blob_without_validation(
+                info_blob_add, embedding_model_id=integration_knowledge.embedding_model.id
+            )
             await self.datastore.add(
                 info_blob=info_blob, embedding_model=integration_knowledge.embedding_model
             )
@@ -192,7 +192,9 @@ class SharePointContentService:
             integration_knowledge_id=integration_knowledge.id,
         )
 
-        info_blob = await self.info_blob_service.add_info_blob_without_validation(info_blob_add)
+        info_blob = await self.info_blob_service.add_info_blob_without_validation(
+            info_blob_add, embedding_model_id=integration_knowledge.embedding_model.id
+        )
         await self.datastore.add(
             info_blob=info_blob, embedding_model=integration_knowledge.embedding_model
         )
@@ -286,7 +288,7 @@ class SharePointContentService:
                     )
 
                     info_blob = await self.info_blob_service.add_info_blob_without_validation(
-                        info_blob_add
+                        info_blob_add, embedding_model_id=integration_knowledge.embedding_model.id
                     )
                     await self.datastore.add(
                         info_blob=info_blob, embedding_model=integration_knowledge.embedding_model
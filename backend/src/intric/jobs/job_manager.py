@@ -2,7 +2,9 @@ from uuid import UUID
 
 from arq import create_pool
 from arq.connections import ArqRedis, RedisSettings
-from arq.jobs import Job
+from arq.constants import default_queue_name, in_progress_key_prefix, result_key_prefix
+from arq.jobs import Job, JobStatus
+from arq.utils import timestamp_ms
 
 from intric.jobs.job_models import Task
 from intric.jobs.task_models import TaskParams
@@ -46,5 +48,35 @@ class JobManager:
 
         return await job.status()
 
+    async def get_job_statuses(self, job_ids: list[UUID]) -> dict[UUID, JobStatus]:
+        """Same as `get_job_status`, for many jobs, in one round trip to redis."""
+        if not job_ids:
+            return {}
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.exists(result_key_prefix + str(job_id))
+                pipe.exists(in_progress_key_prefix + str(job_id))
+                pipe.zscore(default_queue_name, str(job_id))
+
+            results = await pipe.execute()
+
+        now = timestamp_ms()
+        statuses = {}
+        for i, job_id in enumerate(job_ids):
+            # Decided in the same order as arq does for a single job
+            is_complete, is_in_progress, score = results[3 * i : 3 * i + 3]
+
+            if is_complete:
+                statuses[job_id] = JobStatus.complete
+            elif is_in_progress:
+                statuses[job_id] = JobStatus.in_progress
+            elif score:
+                statuses[job_id] = JobStatus.deferred if score > now else JobStatus.queued
+            else:
+                statuses[job_id] = JobStatus.not_found
+
+        return statuses
+
 
 job_manager = JobManager()
@@ -10,13 +10,16 @@ from intric.main.models import InDB, Status
 
 class Task(str, Enum):
     UPLOAD_FILE = "upload_info_blob"
+    UPLOAD_FILES = "upload_info_blobs"
     TRANSCRIPTION = "transcription"
     CRAWL = "crawl"
+    CRAWL_FETCH = "crawl_fetch"
     EMBED_GROUP = "embed_group"
     CRAWL_ALL_WEBSITES = "crawl_all_websites"
     RUN_APP = "run_app"
     PULL_CONFLUENCE_CONTENT = "pull_confluence_content"
     PULL_SHAREPOINT_CONTENT = "pull_sharepoint_content"
+    REEMBED = "reembed"
 
 
 class JobBase(BaseModel):
@@ -29,6 +32,7 @@ class JobBase(BaseModel):
 
 class Job(JobBase):
     user_id: UUID
+    resource_id: Optional[UUID] = None
 
 
 class JobUpdate(BaseModel):
@@ -8,7 +8,7 @@ from intric.database.database import AsyncSession
 from intric.database.repositories.base import BaseRepositoryDelegate
 from intric.database.tables.job_table import Jobs
 from intric.jobs.job_manager import job_manager
-from intric.jobs.job_models import Job, JobInDb, JobUpdate
+from intric.jobs.job_models import Job, JobInDb, JobUpdate, Task
 
 
 class JobRepository:
@@ -39,20 +39,38 @@ class JobRepository:
     async def get_running_jobs(self, user_id: UUID):
         one_week_ago = datetime.now(timezone.utc) - timedelta(weeks=1)
 
+        # Jobs get a finish time when they complete or fail, so finished jobs
+        # are never loaded
         stmt = (
             sa.select(Jobs)
             .where(Jobs.user_id == user_id)
             .where(Jobs.created_at >= one_week_ago)
+            .where(Jobs.finished_at.is_(None))
             .order_by(Jobs.created_at)
         )
 
+        return await self._get_running(stmt)
+
+    async def get_running_jobs_of_resource(self, task: Task, resource_id: UUID):
+        stmt = sa.select(Jobs).where(
+            Jobs.task == task,
+            Jobs.resource_id == resource_id,
+            Jobs.finished_at.is_(None),
+        )
+
+        return await self._get_running(stmt)
+
+    async def _get_running(self, stmt: sa.Select) -> list[JobInDb]:
         jobs_db = await self.delegate.get_models_from_query(stmt)
 
+        # A job that was stopped, without being marked as finished, is no
+        # longer known to the queue
+        statuses = await self._job_manager.get_job_statuses([job.id for job in jobs_db])
+
         running_jobs = [
             job
             for job in jobs_db
-            if await self._job_manager.get_job_status(job.id)
-            not in [JobStatus.not_found, JobStatus.complete]
+            if statuses[job.id] not in [JobStatus.not_found, JobStatus.complete]
         ]
 
         return running_jobs
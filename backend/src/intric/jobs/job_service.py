@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from intric.jobs.job_manager import job_manager
 from intric.jobs.job_models import Job, JobInDb, JobUpdate, Task
@@ -20,15 +20,33 @@ class JobService:
         self.job_repo = job_repo
 
     async def queue_job(
-        self, task: Task, *, name: str, task_params: TaskParams
+        self,
+        task: Task,
+        *,
+        name: str,
+        task_params: TaskParams,
+        resource_id: UUID | None = None,
     ) -> JobInDb:
-        job = Job(task=task, name=name, status=Status.QUEUED, user_id=self.user.id)
+        job = Job(
+            task=task,
+            name=name,
+            status=Status.QUEUED,
+            user_id=self.user.id,
+            resource_id=resource_id,
+        )
         job_in_db = await self.job_repo.add_job(job=job)
 
         await job_manager.enqueue(task, job_in_db.id, task_params)
 
         return job_in_db
 
+    async def queue_untracked_job(self, task: Task, *, task_params: TaskParams) -> UUID:
+        """Queues a job that is part of another job, and so is not tracked."""
+        job_id = uuid4()
+        await job_manager.enqueue(task, job_id, task_params)
+
+        return job_id
+
     async def set_status(self, job_id: UUID, status: Status):
         job_update = JobUpdate(status=status)
 
@@ -53,6 +71,12 @@ class JobService:
     async def get_running_jobs(self):
         return await self.job_repo.get_running_jobs(self.user.id)
 
+    async def has_running_job(self, task: Task, resource_id: UUID) -> bool:
+        """Whether a job of the task, queued with `resource_id`, is queued or
+        running, by any user."""
+        jobs = await self.job_repo.get_running_jobs_of_resource(task, resource_id)
+        return bool(jobs)
+
     async def get_job(self, job_id: UUID):
         job = await self.job_repo.get_job(job_id)
 
@@ -3,6 +3,8 @@ from uuid import UUID
 
 from pydantic import BaseModel
 
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+
 
 class TaskParams(BaseModel):
     user_id: UUID
@@ -29,8 +31,25 @@ class UploadTask(InfoBlobTask):
 
 
 class UploadInfoBlob(UploadTask):
-    pass
+    # Of the file as it was saved, unless it was queued before it was
+    checksum: Optional[str] = None
 
 
 class Transcription(UploadTask):
     pass
+
+
+class UploadedFile(BaseModel):
+    filepath: str
+    filename: str
+    mimetype: str
+    checksum: Optional[str] = None
+
+
+class UploadInfoBlobs(InfoBlobTask):
+    files: list[UploadedFile]
+
+
+class ReembedTask(TaskParams):
+    source: KnowledgeSource
+    embedding_model_id: UUID
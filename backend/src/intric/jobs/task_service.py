@@ -1,5 +1,7 @@
-import asyncio
+import contextlib
+import os
 from tempfile import SpooledTemporaryFile
+from typing import TYPE_CHECKING
 from uuid import UUID
 
 from intric.files.audio import AudioMimeTypes
@@ -7,13 +9,21 @@ from intric.files.file_size_service import FileSizeService
 from intric.files.text import TextMimeTypes
 from intric.jobs.job_models import JobInDb, Task
 from intric.jobs.job_service import JobService
-from intric.jobs.task_models import Transcription, UploadInfoBlob
+from intric.jobs.task_models import (
+    Transcription,
+    UploadedFile,
+    UploadInfoBlob,
+    UploadInfoBlobs,
+)
 from intric.main.config import get_settings
-from intric.main.exceptions import FileNotSupportedException, FileTooLargeException
+from intric.main.exceptions import BadRequestException, FileNotSupportedException
 from intric.users.user import UserInDB
-from intric.websites.crawl_dependencies.crawl_models import CrawlTask
+from intric.websites.crawl_dependencies.crawl_models import CrawlFetchTask, CrawlTask
 from intric.websites.domain.crawl_run import CrawlType
 
+if TYPE_CHECKING:
+    from fastapi import UploadFile
+
 
 class TaskService:
     def __init__(
@@ -45,12 +55,6 @@ class TaskService:
             case _:
                 return 0
 
-    async def validate_file_size(self, file: SpooledTemporaryFile, task: Task):
-        max_size = self.get_max_size(task)
-
-        if await asyncio.to_thread(self.file_size_service.is_too_large, file, max_size):
-            raise FileTooLargeException("File too large.")
-
     async def queue_upload_file(
         self,
         group_id: UUID,
@@ -61,9 +65,10 @@ class TaskService:
     ):
         task_type = self.get_task_type(mimetype)
 
-        await self.validate_file_size(file, task_type)
-
-        filepath = await self.file_size_service.save_file_to_disk(file)
+        saved_file = await self.file_size_service.save_file_to_disk(
+            file, max_size=self.get_max_size(task_type)
+        )
+        filepath = saved_file.filepath
 
         if task_type == Task.UPLOAD_FILE:
             params = UploadInfoBlob(
@@ -73,6 +78,7 @@ class TaskService:
                 group_id=group_id,
                 space_id=space_id,
                 mimetype=mimetype,
+                checksum=saved_file.checksum,
             )
         elif task_type == Task.TRANSCRIPTION:
             params = Transcription(
@@ -89,6 +95,63 @@ class TaskService:
 
         return job
 
+    async def queue_upload_files(
+        self,
+        group_id: UUID,
+        space_id: UUID,
+        files: list["UploadFile"],
+    ):
+        """Queues one job that uploads all the files. Unlike `queue_upload_file`,
+        only text files are supported."""
+        max_files = get_settings().upload_max_files_per_batch
+        if not files:
+            raise BadRequestException("No files to upload.")
+        if len(files) > max_files:
+            raise BadRequestException(f"At most {max_files} files can be uploaded at a time.")
+
+        # A file replaces the info blob with the same title, so a second file
+        # with the same name would replace the first one while it is uploaded
+        filenames = [file.filename for file in files]
+        if len(set(filenames)) < len(filenames):
+            raise BadRequestException("Files uploaded together must have different names.")
+
+        for file in files:
+            if self.get_task_type(file.content_type) != Task.UPLOAD_FILE:
+                raise FileNotSupportedException(
+                    f"{file.content_type} not supported when uploading several files."
+                )
+
+        uploaded_files = []
+        try:
+            for file in files:
+                saved_file = await self.file_size_service.save_file_to_disk(
+                    file.file, max_size=self.get_max_size(Task.UPLOAD_FILE)
+                )
+                uploaded_files.append(
+                    UploadedFile(
+                        filepath=saved_file.filepath,
+                        filename=file.filename,
+                        mimetype=file.content_type,
+                        checksum=saved_file.checksum,
+                    )
+                )
+        except Exception:
+            for uploaded_file in uploaded_files:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(uploaded_file.filepath)
+            raise
+
+        params = UploadInfoBlobs(
+            user_id=self.user.id,
+            group_id=group_id,
+            space_id=space_id,
+            files=uploaded_files,
+        )
+
+        return await self.job_service.queue_job(
+            Task.UPLOAD_FILES, name=f"{len(files)} files", task_params=params
+        )
+
     async def queue_crawl(
         self,
         name: str,
@@ -108,3 +171,9 @@ class TaskService:
         )
 
         return await self.job_service.queue_job(Task.CRAWL, name=name, task_params=params)
+
+    async def queue_crawl_fetchers(self, run_id: UUID, url: str, num_fetchers: int):
+        params = CrawlFetchTask(user_id=self.user.id, run_id=run_id, url=url)
+
+        for _ in range(num_fetchers):
+            await self.job_service.queue_untracked_job(Task.CRAWL_FETCH, task_params=params)
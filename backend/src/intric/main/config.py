@@ -65,6 +65,11 @@ class Settings(BaseSettings):
     upload_max_file_size: int
     transcription_max_file_size: int
     max_in_question: int
+    upload_max_files_per_batch: int = 100
+
+    # Text extraction
+    text_extraction_max_workers: int = 2
+    text_extraction_timeout: int = 60 * 5  # 5 minutes per file
 
     # Azure models
     using_azure_models: bool = False
@@ -98,8 +103,41 @@ class Settings(BaseSettings):
     closespider_itemcount: int = 20000
     obey_robots: bool = True
     autothrottle_enabled: bool = True
+    # Recrawl pages conditionally, and skip the ones that have not changed
+    incremental_crawl: bool = True
+    # Also for crawls that follow links, and not only for sitemaps. Pages that
+    # have not changed have no links to follow, so every page crawled before
+    # is requested on its own, and is kept for as long as it is served, even
+    # once nothing links to it any more
+    incremental_link_crawl: bool = False
+    # Worker jobs that share the crawl of a website through redis with the
+    # crawl job, which also processes the pages. 0 crawls in the crawl job alone
+    crawl_fetchers: int = 0
+    # Seconds between requests to a domain, across the jobs of a shared crawl
+    shared_crawl_delay: float = 0.25
+    # Periodic crawls are started spread out over this many seconds, with at
+    # most this many crawls running at once, in all and per tenant
+    crawl_schedule_window: int = 60 * 60 * 4
+    max_concurrent_crawls: int = 5
+    max_concurrent_crawls_per_tenant: int = 2
     using_crawl: bool = True
 
+    # Embeddings
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_ttl: int = 60 * 60 * 24  # 1 day
+    using_query_embedding_redis_cache: bool = False
+    chunk_embedding_cache_size: int = 10000
+    chunk_embedding_cache_ttl: int = 60 * 60 * 24 * 30  # 30 days
+    using_chunk_embedding_redis_cache: bool = False
+    # Redis of the chunk embeddings, if not the one of the worker. Best one of
+    # its own, with a maxmemory and an LRU eviction policy
+    chunk_embedding_redis_url: Optional[str] = None
+    # Chunk embeddings kept in redis, the least recently used going first
+    chunk_embedding_redis_max_entries: int = 100000
+    embedding_max_in_flight_requests: int = 4
+    # Overrides of the above, per embedding model name
+    embedding_max_in_flight_requests_per_model: dict[str, int] = {}
+
     # integration callback
     oauth_callback_url: Optional[str] = None
 
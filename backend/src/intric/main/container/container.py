@@ -48,11 +48,13 @@ from intric.database.database import AsyncSession
 from intric.embedding_models.application.embedding_model_crud_service import (
     EmbeddingModelCRUDService,
 )
+from intric.embedding_models.application.reembedding_service import ReembeddingService
 from intric.embedding_models.domain.embedding_model_repo import EmbeddingModelRepository
 from intric.embedding_models.infrastructure.create_embeddings_service import (
     CreateEmbeddingsService,
 )
 from intric.embedding_models.infrastructure.datastore import Datastore
+from intric.embedding_models.infrastructure.reembedding_repo import ReembeddingRepo
 from intric.files.file_protocol import FileProtocol
 from intric.files.file_repo import FileRepository
 from intric.files.file_service import FileService
@@ -374,6 +376,7 @@ class Container(containers.DeclarativeContainer):
     )
 
     info_blob_chunk_repo = providers.Factory(InfoBlobChunkRepo, session=session)
+    reembedding_repo = providers.Factory(ReembeddingRepo, session=session)
 
     step_repo = providers.Factory(StepRepository, session=session)
     user_groups_repo = providers.Factory(UserGroupsRepository, session=session)
@@ -575,6 +578,20 @@ class Container(containers.DeclarativeContainer):
         UpdateWebsiteSizeService,
         session=session,
     )
+    reembedding_service = providers.Factory(
+        ReembeddingService,
+        user=user,
+        space_service=space_service,
+        actor_manager=actor_manager,
+        job_service=job_service,
+        embedding_model_repo=embedding_model_repo2,
+        integration_knowledge_repo=integration_knowledge_repo,
+        reembedding_repo=reembedding_repo,
+        info_blob_chunk_repo=info_blob_chunk_repo,
+        create_embeddings_service=create_embeddings_service,
+        group_service=group_service,
+        update_website_size_service=update_website_size_service,
+    )
     website_cleaner_service = providers.Factory(
         WebsiteCleanerService,
         session=session,
@@ -844,6 +861,7 @@ class Container(containers.DeclarativeContainer):
         extractor=text_extractor,
         datastore=datastore,
         info_blob_service=info_blob_service,
+        session=session,
     )
     transcriber = providers.Factory(
         Transcriber,
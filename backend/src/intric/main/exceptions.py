@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 
 
 class ErrorCodes(int, Enum):
@@ -28,6 +29,8 @@ class ErrorCodes(int, Enum):
     INTERNAL_HTTP_ERROR = 9023
     INTERNAL_SERVER_ERROR = 9024
     TENANT_SUSPENDED = 9025
+    RATE_LIMITED = 9026
+    FILE_EXTRACTION_TIMEOUT = 9027
 
 
 class NotFoundException(Exception):
@@ -94,6 +97,10 @@ class FileTooLargeException(Exception):
     pass
 
 
+class FileExtractionTimeoutException(Exception):
+    pass
+
+
 class ChunkEmbeddingMisMatchException(Exception):
     pass
 
@@ -142,6 +149,12 @@ class TenantSuspendedException(Exception):
     pass
 
 
+class RateLimitException(Exception):
+    def __init__(self, *args, retry_after: Optional[float] = None):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
 # Map exceptions to response codes
 # Set message to None to use the internal message
 # Set error codes in the range 9000 - 9999
@@ -166,6 +179,7 @@ EXCEPTION_MAP = {
     PydanticParseError: (500, None, ErrorCodes.PYDANTIC_PARSE_ERROR),
     FileNotSupportedException: (415, None, ErrorCodes.FILE_NOT_SUPPORTED),
     FileTooLargeException: (413, None, ErrorCodes.FILE_TOO_LARGE),
+    FileExtractionTimeoutException: (422, None, ErrorCodes.FILE_EXTRACTION_TIMEOUT),
     ChunkEmbeddingMisMatchException: (
         500,
         "Something went wrong.",
@@ -188,4 +202,5 @@ EXCEPTION_MAP = {
         ErrorCodes.INTERNAL_SERVER_ERROR,
     ),
     TenantSuspendedException: (403, "Tenant is suspended", ErrorCodes.TENANT_SUSPENDED),
+    RateLimitException: (429, None, ErrorCodes.RATE_LIMITED),
 }
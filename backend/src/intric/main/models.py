@@ -149,6 +149,8 @@ class ChannelType(str, Enum):
     CRAWL_RUN_UPDATES = "crawl_run_updates"
     PULL_CONFLUENCE_CONTENT = "pull_confluence_content"
     PULL_SHAREPOINT_CONTENT = "pull_sharepoint_content"
+    REEMBEDDING_UPDATES = "reembedding_updates"
+    UPLOAD_UPDATES = "upload_updates"
 
 
 class Status(str, Enum):
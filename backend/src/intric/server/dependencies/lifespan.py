@@ -3,6 +3,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from intric.database.database import sessionmanager
+from intric.files.text_extraction_pool import text_extraction_pool
 from intric.jobs.job_manager import job_manager
 from intric.main.aiohttp_client import aiohttp_client
 from intric.main.config import SETTINGS
@@ -39,3 +40,4 @@ async def shutdown():
     await aiohttp_client.stop()
     await job_manager.close()
     await websocket_manager.shutdown()
+    text_extraction_pool.shutdown()
@@ -5,7 +5,10 @@ from fastapi import APIRouter, Depends
 from intric.apps.apps.api.app_models import AppPublic
 from intric.assistants.api.assistant_models import AssistantPublic
 from intric.collections.presentation.collection_models import CollectionPublic
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.embedding_models.presentation.embedding_model_models import ReembedRequest
 from intric.group_chat.presentation.models import GroupChatCreate, GroupChatPublic
+from intric.jobs.job_models import JobPublic
 from intric.main.container.container import Container
 from intric.main.models import NOT_PROVIDED, ModelId, PaginatedResponse
 from intric.server import protocol
@@ -363,6 +366,30 @@ async def delete_space_integration_knowledge(
     await service.remove_knowledge(space_id=id, integration_knowledge_id=integration_knowledge_id)
 
 
+@router.post(
+    "/{id}/knowledge/{integration_knowledge_id}/embedding-model/",
+    response_model=JobPublic,
+    status_code=202,
+    responses=responses.get_responses([400, 403, 404]),
+)
+async def reembed_space_integration_knowledge(
+    id: UUID,
+    integration_knowledge_id: UUID,
+    reembed_req: ReembedRequest,
+    container: Container = Depends(get_container(with_user=True)),
+):
+    """Moves the integration knowledge to another embedding model. Starts a
+    job, use the job operations to keep track of this job. The knowledge is
+    searched with its current embedding model until the job is done."""
+
+    service = container.reembedding_service()
+
+    return await service.queue_reembedding(
+        KnowledgeSource(integration_knowledge_id=integration_knowledge_id),
+        embedding_model_id=reembed_req.embedding_model.id,
+    )
+
+
 @router.post(
     "/{id}/members/",
     response_model=SpaceMember,
@@ -17,6 +17,11 @@ class CrawlTask(TaskParams):
     crawl_type: CrawlType = CrawlType.CRAWL
 
 
+class CrawlFetchTask(TaskParams):
+    run_id: UUID
+    url: str
+
+
 class CrawlRunBase(BaseModel):
     pages_crawled: Optional[int] = None
     files_downloaded: Optional[int] = None
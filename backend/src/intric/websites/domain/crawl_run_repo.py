@@ -1,10 +1,15 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from typing import TYPE_CHECKING
 from uuid import UUID
 
 import sqlalchemy as sa
+from arq.jobs import JobStatus
 from sqlalchemy.orm import selectinload
 
+from intric.database.tables.job_table import Jobs
 from intric.database.tables.websites_table import CrawlRuns as CrawlRunsTable
+from intric.jobs.job_manager import job_manager
 from intric.main.exceptions import NotFoundException
 from intric.websites.domain.crawl_run import CrawlRun
 
@@ -15,6 +20,7 @@ if TYPE_CHECKING:
 class CrawlRunRepository:
     def __init__(self, session: "AsyncSession"):
         self.session = session
+        self._job_manager = job_manager
 
     async def one(self, id: UUID) -> CrawlRun:
         crawl_run = await self.one_or_none(id)
@@ -80,3 +86,27 @@ class CrawlRunRepository:
         )
         records = await self.session.scalars(stmt)
         return [CrawlRun.to_domain(record=record) for record in records]
+
+    async def get_num_running_by_tenant(self) -> dict[UUID, int]:
+        """Returns the number of crawls that have not finished, by tenant.
+
+        A crawl is counted for as long as its job is queued or running, however
+        long that takes. A crawl whose worker died without finishing it stops
+        being counted once its job is no longer known to the queue.
+        """
+        one_week_ago = datetime.now(timezone.utc) - timedelta(weeks=1)
+
+        stmt = (
+            sa.select(CrawlRunsTable.tenant_id, Jobs.id)
+            .join(Jobs, Jobs.id == CrawlRunsTable.job_id)
+            .where(Jobs.finished_at.is_(None), Jobs.created_at >= one_week_ago)
+        )
+        unfinished = (await self.session.execute(stmt)).all()
+
+        statuses = await self._job_manager.get_job_statuses([job_id for _, job_id in unfinished])
+
+        return Counter(
+            tenant_id
+            for tenant_id, job_id in unfinished
+            if statuses[job_id] not in [JobStatus.not_found, JobStatus.complete]
+        )
@@ -1,11 +1,17 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 
+from intric.database.tables.websites_table import CrawlRuns as CrawlRunsTable
+from intric.database.tables.websites_table import WebsiteBoilerplate as WebsiteBoilerplateTable
 from intric.database.tables.websites_table import Websites as WebsitesTable
 from intric.websites.domain.website import UpdateInterval, WebsiteSparse
 
 if TYPE_CHECKING:
+    from datetime import datetime
+    from uuid import UUID
+
     from intric.database.database import AsyncSession
 
 
@@ -21,6 +27,24 @@ class WebsiteSparseRepository:
         websites_db = await self.session.scalars(stmt)
 
         return [WebsiteSparse.to_domain(website_db) for website_db in websites_db]
+
+    async def get_websites_with_last_crawl(
+        self, ids: list["UUID"]
+    ) -> list[tuple[WebsiteSparse, Optional["datetime"]]]:
+        """Returns the websites, with when they were last crawled, if ever."""
+        last_crawled_at = (
+            sa.select(sa.func.max(CrawlRunsTable.created_at))
+            .where(CrawlRunsTable.website_id == WebsitesTable.id)
+            .correlate(WebsitesTable)
+            .scalar_subquery()
+        )
+        stmt = sa.select(WebsitesTable, last_crawled_at).where(WebsitesTable.id.in_(ids))
+
+        result = await self.session.execute(stmt)
+
+        return [
+            (WebsiteSparse.to_domain(website_db), crawled_at) for website_db, crawled_at in result
+        ]
     
     async def get_websites_by_interval(self, interval: UpdateInterval) -> list[WebsiteSparse]:
         stmt = sa.select(WebsitesTable).where(
@@ -30,3 +54,22 @@ class WebsiteSparseRepository:
         websites_db = await self.session.scalars(stmt)
 
         return [WebsiteSparse.to_domain(website_db) for website_db in websites_db]
+
+    async def get_boilerplate_blocks(self, website_id: "UUID") -> set[int]:
+        """Returns the blocks that earlier crawls found to be boilerplate."""
+        stmt = sa.select(WebsiteBoilerplateTable.blocks).where(
+            WebsiteBoilerplateTable.website_id == website_id
+        )
+
+        blocks = await self.session.scalar(stmt)
+
+        return set(blocks or [])
+
+    async def set_boilerplate_blocks(self, website_id: "UUID", blocks: set[int]):
+        stmt = insert(WebsiteBoilerplateTable).values(website_id=website_id, blocks=list(blocks))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WebsiteBoilerplateTable.website_id],
+            set_={"blocks": stmt.excluded.blocks, "updated_at": sa.func.now()},
+        )
+
+        await self.session.execute(stmt)
@@ -2,8 +2,11 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.embedding_models.presentation.embedding_model_models import ReembedRequest
 from intric.info_blobs import info_blob_protocol
 from intric.info_blobs.info_blob import InfoBlobPublicNoText
+from intric.jobs.job_models import JobPublic
 from intric.main.container.container import Container
 from intric.main.models import PaginatedResponse
 from intric.server import protocol
@@ -94,6 +97,28 @@ async def get_crawl_runs(id: UUID, container: Container = Depends(get_container(
     )
 
 
+@router.post(
+    "/{id}/embedding-model/",
+    response_model=JobPublic,
+    status_code=202,
+    responses=responses.get_responses([400, 403, 404]),
+)
+async def reembed_website(
+    id: UUID,
+    reembed_req: ReembedRequest,
+    container: Container = Depends(get_container(with_user=True)),
+):
+    """Moves the website to another embedding model. Starts a job, use the job
+    operations to keep track of this job. The website is searched with its
+    current embedding model until the job is done."""
+
+    service = container.reembedding_service()
+
+    return await service.queue_reembedding(
+        KnowledgeSource(website_id=id), embedding_model_id=reembed_req.embedding_model.id
+    )
+
+
 @router.post("/{id}/transfer/", status_code=204)
 async def transfer_website_to_space(
     id: UUID,
@@ -1,25 +1,128 @@
+import math
+import time
+from datetime import datetime, timezone
+from typing import Optional
 from uuid import UUID
 
 from dependency_injector import providers
 
+from intric.crawler.parse_html import BoilerplateCounter
+from intric.main.config import get_settings
 from intric.main.container.container import Container
 from intric.main.logging import get_logger
 from intric.websites.crawl_dependencies.crawl_models import (
+    CrawlFetchTask,
     CrawlTask,
 )
-from intric.websites.domain.website import UpdateInterval
+from intric.websites.domain.crawl_run import CrawlType
+from intric.websites.domain.website import UpdateInterval, WebsiteSparse
+from intric.worker.redis import r as redis
 
 logger = get_logger(__name__)
 
+# Websites whose periodic crawl is due, but has not been started yet
+DUE_CRAWLS_KEY = "crawl_schedule:due"
+# When every crawl that is due should have been started
+WINDOW_END_KEY = "crawl_schedule:window_end"
+
+# Seconds between the dispatches of due crawls
+DISPATCH_INTERVAL = 5 * 60
+
 
 async def queue_website_crawls(container: Container, interval: UpdateInterval = UpdateInterval.WEEKLY):
-    user_repo = container.user_repo()
+    """Marks the websites that are updated at `interval` as due to be crawled.
+
+    The crawls are started by `dispatch_website_crawls`, spread out over the
+    crawl schedule window, rather than all at once.
+    """
     website_sparse_repo = container.website_sparse_repo()
 
     async with container.session().begin():
         websites = await website_sparse_repo.get_websites_by_interval(interval)
 
-        for website in websites:
+    if websites:
+        await redis.sadd(DUE_CRAWLS_KEY, *(str(website.id) for website in websites))
+
+    # The window only ever grows, so that the crawls still due from before are
+    # not squeezed into a shorter one
+    window_end = time.time() + get_settings().crawl_schedule_window
+    current_window_end = await redis.get(WINDOW_END_KEY)
+    if current_window_end is None or float(current_window_end) < window_end:
+        await redis.set(WINDOW_END_KEY, window_end)
+
+    return True
+
+
+def pick_crawls_to_start(
+    websites: list[tuple[WebsiteSparse, Optional[datetime]]],
+    num_running_by_tenant: dict[UUID, int],
+    max_to_start: int,
+    now: Optional[datetime] = None,
+) -> list[WebsiteSparse]:
+    """Picks the websites to crawl next, out of `websites`, the websites due to
+    be crawled, with when they were last crawled.
+
+    The websites that have never been crawled go first, then the ones that have
+    gone the most days without a crawl, and, of the ones that have gone as many
+    days, the smallest.
+    """
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    num_running_by_tenant = dict(num_running_by_tenant)
+    num_running = sum(num_running_by_tenant.values())
+
+    def _priority(website: tuple[WebsiteSparse, Optional[datetime]]):
+        website_sparse, last_crawled_at = website
+        if last_crawled_at is None:
+            return (0, 0, website_sparse.size)
+
+        # Crawls dispatched over a window of hours are as stale as each other
+        return (1, -(now - last_crawled_at).days, website_sparse.size)
+
+    by_priority = sorted(websites, key=_priority)
+
+    picked = []
+    for website, _ in by_priority:
+        if len(picked) >= max_to_start or num_running >= settings.max_concurrent_crawls:
+            break
+
+        num_running_of_tenant = num_running_by_tenant.get(website.tenant_id, 0)
+        if num_running_of_tenant >= settings.max_concurrent_crawls_per_tenant:
+            continue
+
+        picked.append(website)
+        num_running += 1
+        num_running_by_tenant[website.tenant_id] = num_running_of_tenant + 1
+
+    return picked
+
+
+async def dispatch_website_crawls(container: Container):
+    """Starts the crawls that are due, as many as it takes to have started them
+    all by the end of the window, within the limits of concurrent crawls."""
+    due_ids = [UUID(id.decode()) for id in await redis.smembers(DUE_CRAWLS_KEY)]
+    if not due_ids:
+        return True
+
+    window_end = float(await redis.get(WINDOW_END_KEY) or 0)
+    dispatches_left = max(1, math.ceil((window_end - time.time()) / DISPATCH_INTERVAL))
+    max_to_start = math.ceil(len(due_ids) / dispatches_left)
+
+    user_repo = container.user_repo()
+    website_sparse_repo = container.website_sparse_repo()
+    crawl_run_repo = container.crawl_run_repo()
+
+    async with container.session().begin():
+        websites = await website_sparse_repo.get_websites_with_last_crawl(due_ids)
+        num_running_by_tenant = await crawl_run_repo.get_num_running_by_tenant()
+
+        # Websites that have been deleted since they were due
+        done_ids = set(due_ids) - {website.id for website, _ in websites}
+
+        for website in pick_crawls_to_start(
+            websites, num_running_by_tenant=num_running_by_tenant, max_to_start=max_to_start
+        ):
+            done_ids.add(website.id)
             try:
                 # Get user
                 user = await user_repo.get_user_by_id(website.user_id)
@@ -33,9 +136,32 @@ async def queue_website_crawls(container: Container, interval: UpdateInterval =
                 # If a website fails to queue, try the next one
                 logger.error(f"Error when queueing up website {website.url}: {e}")
 
+    if done_ids:
+        await redis.srem(DUE_CRAWLS_KEY, *(str(id) for id in done_ids))
+
+    logger.info(f"Dispatched website crawls, {len(due_ids) - len(done_ids)} still due")
+
     return True
 
 
+def _is_shared_crawl(params: CrawlTask) -> bool:
+    # Files are downloaded to the disk of the process that crawls them, and
+    # sitemaps are not crawled link by link
+    return (
+        get_settings().crawl_fetchers > 0
+        and params.crawl_type == CrawlType.CRAWL
+        and not params.download_files
+    )
+
+
+def _is_incremental_crawl(params: CrawlTask) -> bool:
+    settings = get_settings()
+    if params.crawl_type == CrawlType.SITEMAP:
+        return settings.incremental_crawl
+
+    return settings.incremental_crawl and settings.incremental_link_crawl
+
+
 async def crawl_task(*, job_id: UUID, params: CrawlTask, container: Container):
     task_manager = container.task_manager(job_id=job_id)
     async with task_manager.set_status_on_exception():
@@ -45,6 +171,7 @@ async def crawl_task(*, job_id: UUID, params: CrawlTask, container: Container):
         crawl_run_repo = container.crawl_run_repo()
 
         info_blob_repo = container.info_blob_repo()
+        website_sparse_repo = container.website_sparse_repo()
         update_website_size_service = container.update_website_size_service()
         website_service = container.website_crud_service()
         website = await website_service.get_website(params.website_id)
@@ -55,79 +182,162 @@ async def crawl_task(*, job_id: UUID, params: CrawlTask, container: Container):
         num_files = 0
         num_failed_pages = 0
         num_failed_files = 0
-        num_deleted_blobs = 0
+        num_unchanged_pages = 0
 
         # Unfortunately, in this type of background task we still need to care about the session atm
         session = container.session()
 
         existing_titles = await info_blob_repo.get_titles_of_website(params.website_id)
 
-        crawled_titles = []
+        known_pages = (
+            await info_blob_repo.get_http_validators_of_website(params.website_id)
+            if _is_incremental_crawl(params)
+            else {}
+        )
+        sitemap_lastmods = (
+            await info_blob_repo.get_sitemap_lastmods_of_website(params.website_id)
+            if get_settings().incremental_crawl and params.crawl_type == CrawlType.SITEMAP
+            else {}
+        )
 
-        async with crawler.crawl(
-            url=params.url,
-            download_files=params.download_files,
-            crawl_type=params.crawl_type,
-        ) as crawl:
-            for page in crawl.pages:
-                num_pages += 1
-                try:
-                    title = page.url
-                    async with session.begin_nested():
-                        await uploader.process_text(
-                            text=page.content,
-                            title=title,
-                            website_id=params.website_id,
-                            url=page.url,
-                            embedding_model=website.embedding_model,
-                        )
-                    crawled_titles.append(title)
-
-                except Exception:
-                    logger.exception("Exception while uploading page")
-                    num_failed_pages += 1
-
-            for file in crawl.files:
-                num_files += 1
-                try:
-                    filename = file.stem
-                    async with session.begin_nested():
-                        await uploader.process_file(
-                            filepath=file,
-                            filename=filename,
-                            website_id=params.website_id,
-                            embedding_model=website.embedding_model,
-                        )
-
-                    crawled_titles.append(filename)
-                except Exception:
-                    logger.exception("Exception while uploading file")
-                    num_failed_files += 1
-
-            for title in existing_titles:
-                if title not in crawled_titles:
-                    num_deleted_blobs += 1
-                    await info_blob_repo.delete_by_title_and_website(
-                        title=title, website_id=params.website_id
-                    )
+        # Left out of the pages, the same in every crawl until a crawl has
+        # finished, so that the text of a page that has not changed stays the same
+        boilerplate_blocks = await website_sparse_repo.get_boilerplate_blocks(params.website_id)
+        boilerplate_counter = BoilerplateCounter()
 
-            await update_website_size_service.update_website_size(website_id=website.id)
+        crawled_titles = set()
 
-            logger.info(
-                f"Crawler finished. {num_pages} pages, {num_failed_pages} failed. "
-                f"{num_files} files, {num_failed_files} failed. "
-                f"{num_deleted_blobs} blobs deleted."
+        shared_crawl = _is_shared_crawl(params)
+        if shared_crawl:
+            crawl_context = crawler.crawl_shared(
+                url=params.url,
+                run_id=params.run_id,
+                known_pages=known_pages,
+                boilerplate_blocks=boilerplate_blocks,
             )
-
-            crawl_run = await crawl_run_repo.one(params.run_id)
-            crawl_run.update(
-                pages_crawled=num_pages,
-                files_downloaded=num_files,
-                pages_failed=num_failed_pages,
-                files_failed=num_failed_files,
+        else:
+            crawl_context = crawler.crawl(
+                url=params.url,
+                download_files=params.download_files,
+                crawl_type=params.crawl_type,
+                known_pages=known_pages,
+                sitemap_lastmods=sitemap_lastmods,
+                boilerplate_blocks=boilerplate_blocks,
             )
-            await crawl_run_repo.update(crawl_run)
+
+        try:
+            async with crawl_context as crawl:
+                # The pages are crawled by other worker jobs, and processed here,
+                # so that the crawl run is counted and reconciled in one place
+                if shared_crawl:
+                    await container.task_service().queue_crawl_fetchers(
+                        run_id=params.run_id,
+                        url=params.url,
+                        num_fetchers=get_settings().crawl_fetchers,
+                    )
+
+                async for page in crawl.pages:
+                    num_pages += 1
+                    title = page.url
+
+                    # Not modified since the last crawl, so already embedded
+                    if page.unchanged:
+                        num_unchanged_pages += 1
+                        crawled_titles.add(title)
+
+                        # Requested since its <lastmod> changed, but its content did not
+                        if (
+                            page.sitemap_lastmod is not None
+                            and sitemap_lastmods.get(page.url) != page.sitemap_lastmod
+                        ):
+                            await info_blob_repo.update_sitemap_lastmod(
+                                params.website_id,
+                                url=page.url,
+                                sitemap_lastmod=page.sitemap_lastmod,
+                            )
+                        continue
+
+                    boilerplate_counter.add(page.blocks)
+
+                    try:
+                        async with session.begin_nested():
+                            await uploader.process_text(
+                                text=page.content,
+                                title=title,
+                                website_id=params.website_id,
+                                url=page.url,
+                                embedding_model=website.embedding_model,
+                                etag=page.etag,
+                                last_modified=page.last_modified,
+                                sitemap_lastmod=page.sitemap_lastmod,
+                                update_source_size=False,
+                            )
+                        crawled_titles.add(title)
+
+                    except Exception:
+                        logger.exception("Exception while uploading page")
+                        num_failed_pages += 1
+
+                for file in crawl.files:
+                    num_files += 1
+                    try:
+                        filename = file.stem
+                        async with session.begin_nested():
+                            await uploader.process_file(
+                                filepath=file,
+                                filename=filename,
+                                website_id=params.website_id,
+                                embedding_model=website.embedding_model,
+                                update_source_size=False,
+                            )
+
+                        crawled_titles.add(filename)
+                    except Exception:
+                        logger.exception("Exception while uploading file")
+                        num_failed_files += 1
+
+                # An incremental crawl only sees the pages that have changed,
+                # so it adds to the boilerplate of the earlier crawls
+                found_blocks = boilerplate_counter.get_blocks()
+                if _is_incremental_crawl(params):
+                    found_blocks |= boilerplate_blocks
+                await website_sparse_repo.set_boilerplate_blocks(params.website_id, found_blocks)
+
+                stale_titles = list(set(existing_titles) - crawled_titles)
+                num_deleted_blobs = await info_blob_repo.delete_by_titles_and_website(
+                    titles=stale_titles, website_id=params.website_id
+                )
+
+                logger.info(
+                    f"Crawler finished. {num_pages} pages, {num_failed_pages} failed, "
+                    f"{num_unchanged_pages} unchanged. "
+                    f"{num_files} files, {num_failed_files} failed. "
+                    f"{num_deleted_blobs} blobs deleted."
+                )
+
+                crawl_run = await crawl_run_repo.one(params.run_id)
+                crawl_run.update(
+                    pages_crawled=num_pages,
+                    files_downloaded=num_files,
+                    pages_failed=num_failed_pages,
+                    files_failed=num_failed_files,
+                )
+                await crawl_run_repo.update(crawl_run)
+        finally:
+            # Once for the whole crawl, rather than once for every page. Also
+            # when the crawl fails partway, since the pages processed until
+            # then are kept
+            await update_website_size_service.update_website_size(website_id=website.id)
 
         task_manager.result_location = f"/api/v1/websites/{params.website_id}/info-blobs/"
 
     return task_manager.successful()
+
+
+async def crawl_fetch_task(*, job_id: UUID, params: CrawlFetchTask, container: Container):
+    crawler = container.crawler()
+
+    logger.info(f"Fetching for crawl run {params.run_id}")
+    await crawler.fetch(url=params.url, run_id=params.run_id)
+
+    return True
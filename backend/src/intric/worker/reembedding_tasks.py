@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from uuid import UUID
+
+from dependency_injector import providers
+
+from intric.database.database import sessionmanager
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.jobs.task_models import ReembedTask
+from intric.main.container.container import Container
+from intric.main.container.container_overrides import override_user
+from intric.main.exceptions import BadRequestException
+from intric.main.logging import get_logger
+from intric.main.models import ChannelType, Status
+from intric.users.user import UserInDB
+from intric.worker.task_manager import TaskManager
+
+logger = get_logger(__name__)
+
+# Info blobs that are re-embedded, and committed, at a time
+INFO_BLOBS_PER_CHECKPOINT = 20
+
+# Seconds to wait before trying to switch again, while info blobs are added
+SWITCH_RETRY_INTERVAL = 5
+
+
+@asynccontextmanager
+async def _checkpoint(user: UserInDB) -> AsyncIterator[Container]:
+    # Work done in a checkpoint is committed when it ends, unlike the rest of
+    # the job, so that a job that is stopped can be queued again and resume
+    async with sessionmanager.session() as session, session.begin():
+        container = Container(session=providers.Object(session))
+        yield override_user(container=container, user=user)
+
+
+@asynccontextmanager
+async def _autocommit(user: UserInDB) -> AsyncIterator[Container]:
+    # Every statement is committed as soon as it is run. The status of the job
+    # is set here, since the job session only commits once the job is done,
+    # and holds the row of the job locked until then
+    async with sessionmanager.session() as session, session.begin():
+        await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        container = Container(session=providers.Object(session))
+        yield override_user(container=container, user=user)
+
+
+@asynccontextmanager
+async def _source_lock(container: Container, source: KnowledgeSource) -> AsyncIterator[None]:
+    # Only one job re-embeds a source at a time. The lock is taken in the
+    # autocommit session, which is open for the whole job without holding a
+    # transaction open, and is let go if the worker dies with the connection
+    reembedding_repo = container.reembedding_repo()
+    if not await reembedding_repo.try_lock(source):
+        raise BadRequestException(f"{source} is already being re-embedded.")
+
+    try:
+        yield
+    finally:
+        await reembedding_repo.unlock(source)
+
+
+async def _report_progress(task_manager: TaskManager, done: int, total: int):
+    task_manager.additional_data = {"info_blobs_done": done, "info_blobs_total": max(done, total)}
+    await task_manager.set_status(Status.IN_PROGRESS)
+
+
+async def reembed_task(*, job_id: UUID, params: ReembedTask, container: Container):
+    user = container.user()
+
+    async with _autocommit(user) as status_container:
+        task_manager = status_container.task_manager(
+            job_id=job_id,
+            resource_id=params.source.id,
+            channel_type=ChannelType.REEMBEDDING_UPDATES,
+        )
+        async with task_manager.set_status_on_exception(), _source_lock(
+            status_container, params.source
+        ):
+            async with _checkpoint(user) as checkpoint:
+                reembedding_service = checkpoint.reembedding_service()
+                embedding_model = await reembedding_service.get_embedding_model(
+                    params.embedding_model_id
+                )
+
+                await reembedding_service.discard_other_reembeddings(
+                    params.source, embedding_model.id
+                )
+                done, total = await reembedding_service.get_progress(
+                    params.source, embedding_model.id
+                )
+
+            logger.info(
+                f"Re-embedding {params.source} with {embedding_model.name}, "
+                f"{done} of {total} info blobs already done"
+            )
+
+            while True:
+                await _report_progress(task_manager, done, total)
+
+                async with _checkpoint(user) as checkpoint:
+                    reembedding_service = checkpoint.reembedding_service()
+                    reembedded = await reembedding_service.reembed_next_info_blobs(
+                        params.source, embedding_model, limit=INFO_BLOBS_PER_CHECKPOINT
+                    )
+
+                    # Info blobs added while re-embedding are picked up by the
+                    # batches, so the switch happens once there are none left
+                    switched = not reembedded and await reembedding_service.switch(
+                        params.source, embedding_model
+                    )
+
+                if switched:
+                    break
+
+                if not reembedded:
+                    # Uploads to the source are still running, or added info
+                    # blobs that the next batches re-embed
+                    await asyncio.sleep(SWITCH_RETRY_INTERVAL)
+
+                done += reembedded
+
+    return task_manager.successful()
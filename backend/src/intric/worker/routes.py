@@ -1,9 +1,25 @@
-from intric.jobs.task_models import Transcription, UploadInfoBlob
+from intric.jobs.task_models import (
+    ReembedTask,
+    Transcription,
+    UploadInfoBlob,
+    UploadInfoBlobs,
+)
 from intric.main.container.container import Container
-from intric.websites.crawl_dependencies.crawl_models import CrawlTask
+from intric.websites.crawl_dependencies.crawl_models import CrawlFetchTask, CrawlTask
 from intric.websites.domain.website import UpdateInterval
-from intric.worker.crawl_tasks import crawl_task, queue_website_crawls
-from intric.worker.upload_tasks import transcription_task, upload_info_blob_task
+from intric.worker.crawl_tasks import (
+    DISPATCH_INTERVAL,
+    crawl_fetch_task,
+    crawl_task,
+    dispatch_website_crawls,
+    queue_website_crawls,
+)
+from intric.worker.reembedding_tasks import reembed_task
+from intric.worker.upload_tasks import (
+    transcription_task,
+    upload_info_blob_task,
+    upload_info_blobs_task,
+)
 from intric.worker.worker import Worker
 
 worker = Worker()
@@ -14,6 +30,11 @@ async def upload_info_blob(job_id: str, params: UploadInfoBlob, container: Conta
     return await upload_info_blob_task(job_id=job_id, params=params, container=container)
 
 
+@worker.function()
+async def upload_info_blobs(job_id: str, params: UploadInfoBlobs, container: Container):
+    return await upload_info_blobs_task(job_id=job_id, params=params, container=container)
+
+
 @worker.function()
 async def transcription(job_id: str, params: Transcription, container: Container):
     return await transcription_task(job_id=job_id, params=params, container=container)
@@ -24,6 +45,22 @@ async def crawl(job_id: str, params: CrawlTask, container: Container):
     return await crawl_task(job_id=job_id, params=params, container=container)
 
 
+@worker.function(with_user=False)
+async def crawl_fetch(job_id: str, params: CrawlFetchTask, container: Container):
+    return await crawl_fetch_task(job_id=job_id, params=params, container=container)
+
+
+@worker.function()
+async def reembed(job_id: str, params: ReembedTask, container: Container):
+    return await reembed_task(job_id=job_id, params=params, container=container)
+
+
+# Starts the periodic crawls below that are due, a few at a time
+@worker.cron_job(minute=set(range(0, 60, DISPATCH_INTERVAL // 60)))
+async def dispatch_due_website_crawls(container: Container):
+    return await dispatch_website_crawls(container=container)
+
+
 # Daily crawl at 2 AM
 @worker.cron_job(hour=2, minute=0)
 async def crawl_daily_websites(container: Container):
@@ -43,7 +80,9 @@ async def crawl_weekly_websites(container: Container):
 
 
 # Every 2 weeks crawl on Friday at 11 PM (on days 1-7 and 15-21)
-@worker.cron_job(weekday="fri", day=(1, 2, 3, 4, 5, 6, 7, 15, 16, 17, 18, 19, 20, 21), hour=23, minute=0)
+@worker.cron_job(
+    weekday="fri", day=(1, 2, 3, 4, 5, 6, 7, 15, 16, 17, 18, 19, 20, 21), hour=23, minute=0
+)
 async def crawl_every_2_weeks_websites(container: Container):
     return await queue_website_crawls(container=container, interval=UpdateInterval.EVERY_2_WEEKS)
 
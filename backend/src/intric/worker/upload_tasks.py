@@ -3,9 +3,14 @@ import os
 from pathlib import Path
 from uuid import UUID
 
-from intric.jobs.task_models import Transcription, UploadInfoBlob
+from intric.info_blobs.text_processor import FILES_PER_BATCH
+from intric.jobs.task_models import Transcription, UploadInfoBlob, UploadInfoBlobs
 from intric.main.container.container import Container
 from intric.main.exceptions import BadRequestException
+from intric.main.logging import get_logger
+from intric.main.models import ChannelType, Status
+
+logger = get_logger(__name__)
 
 
 def _remove_file(filepath: Path):
@@ -80,8 +85,67 @@ async def upload_info_blob_task(
             mimetype=params.mimetype,
             group_id=params.group_id,
             embedding_model=group.embedding_model,
+            file_checksum=params.checksum,
         )
 
         task_manager.result_location = f"/api/v1/info-blobs/{info_blob.id}/"
 
     return task_manager.successful()
+
+
+async def upload_info_blobs_task(
+    *,
+    job_id: UUID,
+    params: UploadInfoBlobs,
+    container: Container,
+):
+    task_manager = container.task_manager(
+        job_id=job_id, resource_id=params.group_id, channel_type=ChannelType.UPLOAD_UPDATES
+    )
+    async with task_manager.set_status_on_exception():
+        filepaths = [Path(file.filepath) for file in params.files]
+
+        def _remove_files():
+            for filepath in filepaths:
+                _remove_file(filepath)
+
+        task_manager.cleanup_func = _remove_files
+
+        uploader = container.text_processor()
+        group_service = container.group_service()
+        group = await group_service.get_group(params.group_id)
+
+        file_statuses = [
+            {"filename": file.filename, "status": Status.QUEUED, "info_blob_id": None}
+            for file in params.files
+        ]
+        task_manager.additional_data = {"files": file_statuses}
+        await task_manager.set_status(Status.IN_PROGRESS)
+
+        failures = []
+        processed = uploader.iter_process_files(
+            files=params.files,
+            embedding_model=group.embedding_model,
+            group_id=params.group_id,
+        )
+        done = 0
+        async for file, result in processed:
+            file_status = file_statuses[done]
+            if isinstance(result, Exception):
+                logger.warning(f"Could not extract the text of {file.filename}: {result}")
+                file_status.update(status=Status.FAILED)
+                failures.append(result)
+            else:
+                file_status.update(status=Status.COMPLETE, info_blob_id=str(result.id))
+            done += 1
+
+            # Files are done a batch at a time, so report once per batch
+            if done % FILES_PER_BATCH == 0 or done == len(params.files):
+                await task_manager.set_status(Status.IN_PROGRESS)
+
+        if len(failures) == len(params.files):
+            raise failures[0]
+
+        task_manager.result_location = f"/api/v1/groups/{params.group_id}/info-blobs/"
+
+    return task_manager.successful()
@@ -61,3 +61,13 @@ async def test_add_blob_is_fine(
     gotten_size = await quota_service.add_text(text_to_add)
 
     assert gotten_size == size_of_text
+
+
+async def test_size_left_counts_the_freed_size(
+    quota_service: QuotaService, user: UserInDB, tenant: TenantInDB
+):
+    user.quota_limit = 20
+    tenant.quota_limit = 100
+
+    assert await quota_service.get_size_left() == 15
+    assert await quota_service.get_size_left(freed_size=5) == 20
@@ -0,0 +1,105 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import numpy as np
+
+from intric.embedding_models.infrastructure.chunk_embedding_cache import (
+    ChunkEmbeddingCache,
+)
+from intric.embedding_models.infrastructure.create_embeddings_service import (
+    CreateEmbeddingsService,
+)
+from intric.files.chunk_embedding_list import ChunkEmbeddingList
+from intric.info_blobs.info_blob import InfoBlobChunk
+from tests.fixtures import TEST_UUID
+
+MODEL_ID = uuid4()
+
+
+def _chunk(text: str):
+    return InfoBlobChunk(text=text, chunk_no=0, info_blob_id=TEST_UUID, tenant_id=TEST_UUID)
+
+
+async def test_get_many_keeps_order_and_normalizes_whitespace():
+    cache = ChunkEmbeddingCache(max_size=10, ttl=60)
+
+    await cache.set_many(MODEL_ID, ["a  footer\n", "b"], np.array([[1.0], [2.0]]))
+    embeddings = await cache.get_many(MODEL_ID, ["b", "c", "a footer"])
+
+    assert [e.tolist() if e is not None else None for e in embeddings] == [[2.0], None, [1.0]]
+    assert await cache.get_many(uuid4(), ["b"]) == [None]
+    assert cache.stats.local_hits == 2
+    assert cache.stats.misses == 2
+
+
+async def test_get_many_falls_back_to_redis():
+    redis = AsyncMock()
+    redis.mget.return_value = [None, np.asarray([3.0], dtype=np.float32).tobytes()]
+    cache = ChunkEmbeddingCache(max_size=10, ttl=60, redis=redis)
+
+    embeddings = await cache.get_many(MODEL_ID, ["a", "b"])
+
+    assert embeddings[0] is None
+    assert embeddings[1].tolist() == [3.0]
+    assert cache.stats.redis_hits == 1
+    assert (await cache.get_many(MODEL_ID, ["b"]))[0].tolist() == [3.0]
+    redis.mget.assert_awaited_once()
+
+
+async def test_create_embeddings_service_only_embeds_chunk_misses():
+    async def get_embeddings_for_batch(chunks):
+        chunk_embedding_list = ChunkEmbeddingList()
+        chunk_embedding_list.add(chunks, [[float(len(chunk.text))] for chunk in chunks])
+        return chunk_embedding_list
+
+    adapter = MagicMock()
+    adapter.get_batches = lambda chunks: [chunks]
+    adapter.get_embeddings_for_batch = AsyncMock(side_effect=get_embeddings_for_batch)
+    cache = ChunkEmbeddingCache(max_size=10, ttl=60)
+    await cache.set_many(MODEL_ID, ["bb"], np.array([[-1.0]]))
+
+    service = CreateEmbeddingsService(query_embedding_cache=None, chunk_embedding_cache=cache)
+    service._get_adapter = MagicMock(return_value=adapter)
+
+    chunks = [_chunk("a"), _chunk("bb"), _chunk("ccc")]
+    result = await service.get_embeddings(MagicMock(id=MODEL_ID), chunks)
+
+    assert [embedding.tolist() for _, embedding in result] == [[1.0], [-1.0], [3.0]]
+    (embedded,) = adapter.get_embeddings_for_batch.await_args.args
+    assert [chunk.text for chunk in embedded] == ["a", "ccc"]
+
+
+def _pipeline(results: list):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=results)
+    pipeline = MagicMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipe)
+    pipeline.__aexit__ = AsyncMock(return_value=None)
+
+    return pipeline, pipe
+
+
+async def test_set_many_evicts_the_least_recently_used_from_redis():
+    redis = AsyncMock()
+    pipeline, pipe = _pipeline([True, True, 2, 0, 12])
+    redis.pipeline = MagicMock(return_value=pipeline)
+    redis.zpopmin.return_value = [(b"chunk_embedding:old-1", 1.0), (b"chunk_embedding:old-2", 2.0)]
+    cache = ChunkEmbeddingCache(max_size=10, ttl=60, redis=redis, max_redis_entries=10)
+
+    await cache.set_many(MODEL_ID, ["a", "b"], np.array([[1.0], [2.0]]))
+
+    (added,) = pipe.zadd.call_args.args[1:]
+    assert set(added) == {cache._key(MODEL_ID, "a"), cache._key(MODEL_ID, "b")}
+    redis.zpopmin.assert_awaited_once_with(cache.index_key, 2)
+    redis.delete.assert_awaited_once_with(b"chunk_embedding:old-1", b"chunk_embedding:old-2")
+
+
+async def test_set_many_keeps_redis_within_its_limit_as_it_is():
+    redis = AsyncMock()
+    pipeline, _ = _pipeline([True, 1, 0, 10])
+    redis.pipeline = MagicMock(return_value=pipeline)
+    cache = ChunkEmbeddingCache(max_size=10, ttl=60, redis=redis, max_redis_entries=10)
+
+    await cache.set_many(MODEL_ID, ["a"], np.array([[1.0]]))
+
+    redis.zpopmin.assert_not_called()
@@ -0,0 +1,136 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from intric.embedding_models.infrastructure.create_embeddings_service import (
+    CreateEmbeddingsService,
+)
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    EmbeddingRequestLimiter,
+    parse_duration,
+)
+from intric.files.chunk_embedding_list import ChunkEmbeddingList
+from intric.main.exceptions import RateLimitException
+
+
+class SlowAdapter:
+    def __init__(self, delays: list[float]):
+        self.delays = delays
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get_batches(self, chunks):
+        return [[chunk] for chunk in chunks]
+
+    async def get_embeddings_for_batch(self, batch):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        (chunk,) = batch
+        await asyncio.sleep(self.delays[chunk])
+
+        self.in_flight -= 1
+        return _embedded(batch)
+
+
+def _embedded(chunks) -> ChunkEmbeddingList:
+    chunk_embedding_list = ChunkEmbeddingList()
+    chunk_embedding_list.add(chunks, [[float(chunk)] for chunk in chunks])
+    return chunk_embedding_list
+
+
+def _chunks_of(chunk_embedding_list: ChunkEmbeddingList):
+    return [chunk for chunk, _ in chunk_embedding_list]
+
+
+def _get_service(adapter: SlowAdapter, limit: int):
+    service = CreateEmbeddingsService(
+        query_embedding_cache=None,
+        chunk_embedding_cache=None,
+        request_limiter=EmbeddingRequestLimiter(default_limit=limit, limits={}),
+    )
+    service._get_adapter = MagicMock(return_value=adapter)
+
+    return service
+
+
+async def test_iter_embeddings_yields_batches_in_order():
+    # Later batches finish first
+    adapter = SlowAdapter(delays=[0.03, 0.02, 0.01, 0])
+    service = _get_service(adapter, limit=4)
+
+    results = [
+        _chunks_of(embeddings)
+        async for embeddings in service.iter_embeddings(MagicMock(), [0, 1, 2, 3])
+    ]
+
+    assert results == [[0], [1], [2], [3]]
+
+
+async def test_iter_embeddings_bounds_requests_in_flight():
+    adapter = SlowAdapter(delays=[0.01] * 10)
+    service = _get_service(adapter, limit=3)
+
+    results = [
+        embeddings
+        async for embeddings in service.iter_embeddings(MagicMock(), list(range(10)))
+    ]
+
+    assert len(results) == 10
+    assert adapter.max_in_flight == 3
+
+
+def test_request_limiter_uses_per_model_override():
+    limiter = EmbeddingRequestLimiter(default_limit=4, limits={"multilingual-e5-large": 1})
+
+    assert limiter.get_limit("multilingual-e5-large") == 1
+    assert limiter.get_limit("text-embedding-3-small") == 4
+
+
+async def test_rate_limited_requests_are_retried():
+    limiter = EmbeddingRequestLimiter(default_limit=4, limits={})
+    service = CreateEmbeddingsService(
+        query_embedding_cache=None, chunk_embedding_cache=None, request_limiter=limiter
+    )
+    model = MagicMock()
+    model.name = "model"
+
+    adapter = MagicMock()
+    adapter.get_batches = lambda chunks: [[chunk] for chunk in chunks]
+    requests = []
+
+    async def get_embeddings_for_batch(batch):
+        requests.append(batch)
+        if len(requests) == 2:
+            limiter.on_rate_limited(model.name, retry_after=0.01)
+            raise RateLimitException(retry_after=0.01)
+
+        return _embedded(batch)
+
+    adapter.get_embeddings_for_batch = get_embeddings_for_batch
+    service._get_adapter = MagicMock(return_value=adapter)
+
+    assert _chunks_of(await service.get_embeddings(model, [0, 1])) == [0, 1]
+    # Only the rate limited request is sent again
+    assert requests == [[0], [1], [1]]
+
+
+async def test_request_limiter_backs_off_and_recovers():
+    limiter = EmbeddingRequestLimiter(default_limit=4, limits={})
+
+    limiter.on_rate_limited("model", retry_after=0)
+    limiter.on_rate_limited("model", retry_after=0)
+    assert limiter.get_batch_scale("model") == 0.25
+
+    for _ in range(2):
+        limiter.on_success("model")
+    assert limiter.get_batch_scale("model") == 0.375
+
+
+@pytest.mark.parametrize(
+    ["value", "seconds"],
+    [("20", 20), ("20ms", 0.02), ("1.5s", 1.5), ("6m0s", 360), ("", None), ("soon", None)],
+)
+def test_parse_duration(value: str, seconds):
+    assert parse_duration(value) == seconds
@@ -1,7 +1,15 @@
+from uuid import uuid4
+
 import pytest
 
-from intric.embedding_models.infrastructure.datastore import autocut
-from intric.info_blobs.info_blob import InfoBlobChunkWithEmbedding
+from intric.embedding_models.infrastructure.datastore import (
+    autocut,
+    reciprocal_rank_fusion,
+)
+from intric.info_blobs.info_blob import (
+    InfoBlobChunkInDBWithScore,
+    InfoBlobChunkWithEmbedding,
+)
 from tests.fixtures import TEST_UUID
 
 
@@ -29,3 +37,32 @@ def test_chunk_size_calculation():
     size_embedding = len(embedding) * 4
 
     assert chunk.size == size_text + size_embedding
+
+
+def _chunk_with_score(id, score: float):
+    return InfoBlobChunkInDBWithScore(
+        id=id,
+        text="text",
+        chunk_no=0,
+        info_blob_id=TEST_UUID,
+        tenant_id=TEST_UUID,
+        info_blob_title="title",
+        score=score,
+    )
+
+
+def test_reciprocal_rank_fusion():
+    a, b, c, d = (uuid4() for _ in range(4))
+    semantic_results = [_chunk_with_score(a, 0.9), _chunk_with_score(b, 0.8)]
+    keyword_results = [
+        _chunk_with_score(c, 3.0),
+        _chunk_with_score(b, 2.0),
+        _chunk_with_score(d, 1.0),
+    ]
+
+    fused = reciprocal_rank_fusion([semantic_results, keyword_results], k=60)
+
+    assert [chunk.id for chunk, _ in fused] == [b, a, c, d]
+    assert [score for _, score in fused][:2] == [1 / 62 + 1 / 62, 1 / 61]
+    # The chunks keep the score of the first list they are in
+    assert [chunk.score for chunk, _ in fused] == [0.8, 0.9, 3.0, 1.0]
@@ -0,0 +1,110 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import numpy as np
+
+from intric.embedding_models.infrastructure.create_embeddings_service import (
+    CreateEmbeddingsService,
+)
+from intric.embedding_models.infrastructure.query_embedding_cache import (
+    QueryEmbeddingCache,
+)
+
+MODEL_ID = uuid4()
+
+
+async def test_get_returns_set_embedding():
+    cache = QueryEmbeddingCache(max_size=10, ttl=60)
+
+    await cache.set(MODEL_ID, "hello", [1.0, 2.0])
+
+    assert await cache.get(MODEL_ID, "hello") == [1.0, 2.0]
+    assert await cache.get(MODEL_ID, "hello there") is None
+    assert await cache.get(uuid4(), "hello") is None
+
+    assert cache.stats.local_hits == 1
+    assert cache.stats.misses == 2
+    assert cache.stats.hit_rate == 1 / 3
+
+
+async def test_least_recently_used_is_evicted():
+    cache = QueryEmbeddingCache(max_size=2, ttl=60)
+
+    await cache.set(MODEL_ID, "a", [1.0])
+    await cache.set(MODEL_ID, "b", [2.0])
+    await cache.get(MODEL_ID, "a")
+    await cache.set(MODEL_ID, "c", [3.0])
+
+    assert await cache.get(MODEL_ID, "a") == [1.0]
+    assert await cache.get(MODEL_ID, "b") is None
+    assert await cache.get(MODEL_ID, "c") == [3.0]
+
+
+async def test_entries_expire():
+    cache = QueryEmbeddingCache(max_size=10, ttl=60)
+
+    with patch(
+        "intric.embedding_models.infrastructure.query_embedding_cache.time.monotonic"
+    ) as monotonic:
+        monotonic.return_value = 0
+        await cache.set(MODEL_ID, "a", [1.0])
+
+        monotonic.return_value = 61
+        assert await cache.get(MODEL_ID, "a") is None
+
+
+async def test_redis_hit_populates_local_tier():
+    redis = AsyncMock()
+    redis.get.return_value = np.asarray([1.0, 2.0], dtype=np.float32).tobytes()
+    cache = QueryEmbeddingCache(max_size=10, ttl=60, redis=redis)
+
+    assert await cache.get(MODEL_ID, "a") == [1.0, 2.0]
+    assert await cache.get(MODEL_ID, "a") == [1.0, 2.0]
+
+    redis.get.assert_awaited_once()
+    assert cache.stats.redis_hits == 1
+    assert cache.stats.local_hits == 1
+
+
+async def test_redis_errors_are_treated_as_misses():
+    redis = AsyncMock()
+    redis.get.side_effect = ConnectionError()
+    redis.set.side_effect = ConnectionError()
+    cache = QueryEmbeddingCache(max_size=10, ttl=60, redis=redis)
+
+    assert await cache.get(MODEL_ID, "a") is None
+    await cache.set(MODEL_ID, "a", [1.0])
+
+    assert await cache.get(MODEL_ID, "a") == [1.0]
+
+
+async def test_create_embeddings_service_only_embeds_misses():
+    adapter = AsyncMock()
+    adapter.get_embedding_for_query.return_value = [1.0, 2.0]
+    service = CreateEmbeddingsService(
+        query_embedding_cache=QueryEmbeddingCache(max_size=10, ttl=60)
+    )
+    service._get_adapter = MagicMock(return_value=adapter)
+    model = MagicMock(id=MODEL_ID)
+
+    for _ in range(3):
+        assert await service.get_embedding_for_query(model=model, query="q") == [1.0, 2.0]
+
+    adapter.get_embedding_for_query.assert_awaited_once_with("q")
+
+
+async def test_both_tiers_return_the_same_precision():
+    redis = AsyncMock()
+    cache = QueryEmbeddingCache(max_size=10, ttl=60, redis=redis)
+    # Not exactly representable as a float32
+    embedding = [0.1, 1 / 3]
+
+    stored = await cache.set(MODEL_ID, "a", embedding)
+    from_local = await cache.get(MODEL_ID, "a")
+
+    cache.clear()
+    redis.get.return_value = redis.set.await_args.args[1]
+    from_redis = await cache.get(MODEL_ID, "a")
+
+    assert stored == from_local == from_redis
+    assert stored == np.asarray(embedding, dtype=np.float32).tolist()
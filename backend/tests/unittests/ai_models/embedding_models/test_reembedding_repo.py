@@ -0,0 +1,48 @@
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.embedding_models.infrastructure.reembedding_repo import ReembeddingRepo
+from tests.fixtures import TEST_UUID
+
+
+async def test_switch_skips_a_source_that_info_blobs_are_added_to():
+    session = AsyncMock()
+    session.scalar.return_value = None
+    repo = ReembeddingRepo(session=session)
+
+    switched = await repo.switch_embedding_model(KnowledgeSource(website_id=TEST_UUID), uuid4())
+
+    assert not switched
+    query = str(session.scalar.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in query
+    session.execute.assert_not_called()
+
+
+async def test_switch_skips_a_source_with_info_blobs_left_to_reembed():
+    session = AsyncMock()
+    session.scalar.return_value = TEST_UUID
+    session.scalars.return_value = [uuid4()]
+    repo = ReembeddingRepo(session=session)
+
+    switched = await repo.switch_embedding_model(KnowledgeSource(group_id=TEST_UUID), uuid4())
+
+    assert not switched
+    session.execute.assert_not_called()
+
+
+async def test_switch_moves_the_source_to_the_embedding_model():
+    session = AsyncMock()
+    session.scalar.return_value = TEST_UUID
+    session.scalars.return_value = []
+    repo = ReembeddingRepo(session=session)
+
+    switched = await repo.switch_embedding_model(
+        KnowledgeSource(integration_knowledge_id=TEST_UUID), uuid4()
+    )
+
+    assert switched
+    query = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert query.startswith("UPDATE integration_knowledge SET embedding_model_id=")
@@ -0,0 +1,138 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from intric.embedding_models.application.reembedding_service import ReembeddingService
+from intric.embedding_models.domain.knowledge_source import KnowledgeSource
+from intric.files.chunk_embedding_list import ChunkEmbeddingList
+from intric.info_blobs.info_blob import InfoBlobChunk
+from intric.jobs.job_models import Task
+from intric.main.exceptions import BadRequestException
+from tests.fixtures import TEST_UUID
+
+
+@pytest.fixture
+def service():
+    return ReembeddingService(
+        user=MagicMock(id=TEST_UUID),
+        space_service=AsyncMock(),
+        actor_manager=MagicMock(),
+        job_service=AsyncMock(),
+        embedding_model_repo=AsyncMock(),
+        integration_knowledge_repo=AsyncMock(),
+        reembedding_repo=AsyncMock(),
+        info_blob_chunk_repo=AsyncMock(),
+        create_embeddings_service=MagicMock(),
+        group_service=AsyncMock(),
+        update_website_size_service=AsyncMock(),
+    )
+
+
+def test_knowledge_source_needs_exactly_one_id():
+    with pytest.raises(ValueError):
+        KnowledgeSource()
+
+    with pytest.raises(ValueError):
+        KnowledgeSource(group_id=uuid4(), website_id=uuid4())
+
+    assert KnowledgeSource(website_id=TEST_UUID).id == TEST_UUID
+
+
+async def test_queue_reembedding_to_current_embedding_model_fails(service: ReembeddingService):
+    embedding_model = MagicMock(id=uuid4())
+    space = MagicMock()
+    space.get_collection.return_value.embedding_model = embedding_model
+    space.get_embedding_model.return_value = embedding_model
+    service.space_service.get_space_by_collection.return_value = space
+
+    with pytest.raises(BadRequestException):
+        await service.queue_reembedding(KnowledgeSource(group_id=TEST_UUID), embedding_model.id)
+
+    service.job_service.queue_job.assert_not_called()
+
+
+async def test_queue_reembedding_of_a_source_being_reembedded_fails(
+    service: ReembeddingService,
+):
+    space = MagicMock()
+    space.get_collection.return_value.embedding_model = MagicMock(id=uuid4())
+    space.get_embedding_model.return_value = MagicMock(id=uuid4())
+    service.space_service.get_space_by_collection.return_value = space
+    service.job_service.has_running_job.return_value = True
+
+    with pytest.raises(BadRequestException):
+        await service.queue_reembedding(KnowledgeSource(group_id=TEST_UUID), uuid4())
+
+    service.job_service.has_running_job.assert_awaited_once_with(
+        Task.REEMBED, resource_id=TEST_UUID
+    )
+    service.job_service.queue_job.assert_not_called()
+
+
+async def test_queue_reembedding_is_queued_for_the_source(service: ReembeddingService):
+    space = MagicMock()
+    space.get_collection.return_value.embedding_model = MagicMock(id=uuid4())
+    space.get_embedding_model.return_value = MagicMock(id=uuid4())
+    service.space_service.get_space_by_collection.return_value = space
+    service.job_service.has_running_job.return_value = False
+
+    await service.queue_reembedding(KnowledgeSource(group_id=TEST_UUID), uuid4())
+
+    assert service.job_service.queue_job.await_args.kwargs["resource_id"] == TEST_UUID
+
+
+async def test_reembed_next_info_blobs_stages_chunks(service: ReembeddingService):
+    embedding_model = MagicMock(id=uuid4())
+    source = KnowledgeSource(group_id=TEST_UUID)
+    chunks = [
+        InfoBlobChunk(text=text, chunk_no=i, info_blob_id=TEST_UUID, tenant_id=TEST_UUID)
+        for i, text in enumerate(["first", "second"])
+    ]
+    service.reembedding_repo.get_info_blob_ids_to_reembed.return_value = [TEST_UUID]
+    service.chunk_repo.get_by_info_blobs.return_value = chunks
+
+    async def iter_embeddings(model, chunks):
+        for chunk in chunks:
+            chunk_embedding_list = ChunkEmbeddingList()
+            chunk_embedding_list.add([chunk], [[0.1, 0.2]])
+            yield chunk_embedding_list
+
+    service.create_embeddings_service.iter_embeddings = iter_embeddings
+
+    reembedded = await service.reembed_next_info_blobs(source, embedding_model, limit=20)
+
+    assert reembedded == 1
+    assert service.chunk_repo.copy.await_count == 2
+    for call, chunk in zip(service.chunk_repo.copy.await_args_list, chunks):
+        assert call.args[0] == [chunk]
+        assert call.kwargs["staged_embedding_model_id"] == embedding_model.id
+
+
+async def test_reembed_next_info_blobs_stops_when_all_are_done(service: ReembeddingService):
+    service.reembedding_repo.get_info_blob_ids_to_reembed.return_value = []
+
+    reembedded = await service.reembed_next_info_blobs(
+        KnowledgeSource(website_id=TEST_UUID), MagicMock(id=uuid4()), limit=20
+    )
+
+    assert reembedded == 0
+    service.chunk_repo.copy.assert_not_called()
+
+
+async def test_switch_waits_for_info_blobs_being_added(service: ReembeddingService):
+    service.reembedding_repo.switch_embedding_model.return_value = False
+
+    switched = await service.switch(KnowledgeSource(group_id=TEST_UUID), MagicMock(id=uuid4()))
+
+    assert not switched
+    service.group_service.update_group_size.assert_not_called()
+
+
+async def test_switch_updates_the_size_of_the_source(service: ReembeddingService):
+    service.reembedding_repo.switch_embedding_model.return_value = True
+
+    switched = await service.switch(KnowledgeSource(group_id=TEST_UUID), MagicMock(id=uuid4()))
+
+    assert switched
+    service.group_service.update_group_size.assert_awaited_once_with(TEST_UUID)
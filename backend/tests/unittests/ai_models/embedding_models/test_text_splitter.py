@@ -0,0 +1,112 @@
+import random
+import re
+
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from intric.embedding_models.infrastructure.text_splitter import (
+    StreamingTextSplitter,
+    TokenTextSplitter,
+)
+
+
+class CharacterEncoding:
+    """Every character is a token, which makes token counts additive."""
+
+    def encode_ordinary(self, text: str):
+        return [ord(c) for c in text]
+
+    def decode_with_offsets(self, tokens: list[int]):
+        return "".join(chr(t) for t in tokens), list(range(len(tokens)))
+
+
+class WordEncoding:
+    """Every word, with the whitespace before it, is a token."""
+
+    def encode_ordinary(self, text: str):
+        self.words = re.findall(r"\s*\S+|\s+", text)
+        return list(range(len(self.words)))
+
+    def decode_with_offsets(self, tokens: list[int]):
+        offsets, offset = [], 0
+        for word in self.words:
+            offsets.append(offset)
+            offset += len(word)
+
+        return "".join(self.words), offsets
+
+
+def _random_text(seed: int) -> str:
+    rng = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "x" * 80, "consectetur"]
+    separators = [" ", " ", " ", "\n", "\n\n", "  "]
+
+    return "".join(rng.choice(words) + rng.choice(separators) for _ in range(400))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize(["chunk_size", "chunk_overlap"], [(200, 40), (50, 10), (100, 0)])
+def test_same_chunks_as_langchain(seed: int, chunk_size: int, chunk_overlap: int):
+    text = _random_text(seed)
+
+    expected = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
+    ).split_text(text)
+    chunks = TokenTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, encoding=CharacterEncoding()
+    ).split_text(text)
+
+    assert chunks == expected
+
+
+def test_chunks_are_measured_in_tokens():
+    text = _random_text(0)
+    encoding = WordEncoding()
+
+    chunks = TokenTextSplitter(chunk_size=20, chunk_overlap=5, encoding=encoding).split_text(text)
+
+    assert len(chunks) > 1
+    assert all(len(encoding.encode_ordinary(chunk)) <= 20 for chunk in chunks)
+
+
+def test_empty_text():
+    splitter = TokenTextSplitter(chunk_size=20, chunk_overlap=5, encoding=CharacterEncoding())
+
+    assert splitter.split_text("") == []
+    assert splitter.split_text("  \n\n ") == []
+
+
+def test_overlap_larger_than_chunk_size():
+    with pytest.raises(ValueError):
+        TokenTextSplitter(chunk_size=10, chunk_overlap=20)
+
+
+def _split_in_parts(splitter: StreamingTextSplitter, text: str, part_size: int) -> list[str]:
+    chunks = []
+    for i in range(0, len(text), part_size):
+        chunks.extend(splitter.add(text[i : i + part_size]))
+
+    return chunks + splitter.finish()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_splitter_gives_the_same_chunks_within_a_section(seed: int):
+    text = _random_text(seed)
+    splitter = TokenTextSplitter(chunk_size=100, chunk_overlap=20, encoding=CharacterEncoding())
+
+    streaming_splitter = StreamingTextSplitter(splitter, section_size=len(text) + 1)
+
+    assert _split_in_parts(streaming_splitter, text, part_size=300) == splitter.split_text(text)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_splitter_splits_sections_at_breaks(seed: int):
+    text = _random_text(seed)
+    splitter = TokenTextSplitter(chunk_size=100, chunk_overlap=0, encoding=CharacterEncoding())
+
+    streaming_splitter = StreamingTextSplitter(splitter, section_size=500)
+    chunks = _split_in_parts(streaming_splitter, text, part_size=300)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    # Without overlap, the chunks are all of the text, in order
+    assert re.sub(r"\s", "", "".join(chunks)) == re.sub(r"\s", "", text)
@@ -9,23 +9,33 @@ from intric.ai_models.embedding_models.embedding_model import (
 from intric.embedding_models.infrastructure.adapters.openai_embeddings import (
     OpenAIEmbeddingAdapter,
 )
+from intric.embedding_models.infrastructure.embedding_request_limiter import (
+    EmbeddingRequestLimiter,
+)
 from intric.info_blobs.info_blob import InfoBlobChunk
 from tests.fixtures import TEST_UUID
 
 
-def _get_adapter_with_max_limit(max_limit: int):
+def _get_adapter_with_max_limit(max_limit: int, request_limiter=None):
     model = EmbeddingModelLegacy(
         id=uuid4(),
         name="multilingual-e5-large",
         family=EmbeddingModelFamily.E5,
         open_source=True,
-        max_input=max_limit,
+        max_input=8191,
         stability=ModelStability.STABLE,
         hosting=ModelHostingLocation.USA,
         is_deprecated=False,
     )
 
-    adapter = OpenAIEmbeddingAdapter(model=model)
+    adapter = OpenAIEmbeddingAdapter(
+        model=model,
+        request_limiter=request_limiter or EmbeddingRequestLimiter(default_limit=4, limits={}),
+    )
+    adapter.max_batch_tokens = max_limit
+
+    # Count every character as a token
+    adapter._count_tokens = len
 
     return adapter
 
@@ -50,7 +60,7 @@ def test_chunking_is_one_chunk_if_sum_is_less_than_limit():
     texts = ["c" * i for i in range(1, 10)]
     chunks = _get_chunks(texts)
 
-    assert len(list(adapter._chunk_chunks(chunks))) == 1
+    assert len(list(adapter.get_batches(chunks))) == 1
 
 
 def test_chunking_is_two_chunks_if_sum_is_slightly_larger_than_limit():
@@ -59,7 +69,7 @@ def test_chunking_is_two_chunks_if_sum_is_slightly_larger_than_limit():
     texts = ["c" * 5, "c" * 5]
     chunks = _get_chunks(texts)
 
-    assert len(list(adapter._chunk_chunks(chunks))) == 2
+    assert len(list(adapter.get_batches(chunks))) == 2
 
 
 def test_chunking_with_three_chunks():
@@ -68,4 +78,34 @@ def test_chunking_with_three_chunks():
     texts = ["c" * 7, "c" * 5, "c" * 3, "c" * 6]
     chunks = _get_chunks(texts)
 
-    assert len(list(adapter._chunk_chunks(chunks))) == 3
+    assert len(list(adapter.get_batches(chunks))) == 3
+
+
+def test_chunking_counts_the_first_chunk_of_every_batch():
+    adapter = _get_adapter_with_max_limit(8)
+
+    texts = ["c" * 5, "c" * 5, "c" * 5, "c" * 5]
+    chunks = _get_chunks(texts)
+
+    assert [len(batch) for batch in adapter.get_batches(chunks)] == [1, 1, 1, 1]
+
+
+def test_chunking_respects_max_items():
+    adapter = _get_adapter_with_max_limit(8191)
+    adapter.max_batch_items = 2
+
+    chunks = _get_chunks(["c"] * 5)
+
+    assert [len(batch) for batch in adapter.get_batches(chunks)] == [2, 2, 1]
+
+
+async def test_chunking_shrinks_batches_when_rate_limited():
+    request_limiter = EmbeddingRequestLimiter(default_limit=4, limits={})
+    adapter = _get_adapter_with_max_limit(8, request_limiter=request_limiter)
+    chunks = _get_chunks(["c" * 2] * 4)
+
+    assert [len(batch) for batch in adapter.get_batches(chunks)] == [4]
+
+    request_limiter.on_rate_limited(adapter.model.name, retry_after=0)
+
+    assert [len(batch) for batch in adapter.get_batches(chunks)] == [2, 2]
@@ -94,3 +94,42 @@ def test_concatenate_session_is_null():
     service = ReferencesService(AsyncMock(), AsyncMock())
     concatenated_session = service._concatenate_conversation("next question", None)
     assert concatenated_session == "next question"
+
+
+async def test_info_blobs_are_fetched_in_one_batch_with_scores():
+    blob_1_id = uuid4()
+    blob_2_id = uuid4()
+
+    def _info_blob(id):
+        info_blob = MagicMock()
+        info_blob.id = id
+        info_blob.model_dump.return_value = dict(
+            id=id,
+            title="title",
+            embedding_model_id=TEST_UUID,
+            user_id=TEST_UUID,
+            tenant_id=TEST_UUID,
+            size=10,
+        )
+        return info_blob
+
+    info_blobs_repo = AsyncMock()
+    info_blobs_repo.get_many_without_text.return_value = [
+        _info_blob(blob_2_id),
+        _info_blob(blob_1_id),
+    ]
+    service = ReferencesService(info_blobs_repo, AsyncMock())
+
+    chunks = [
+        _create_chunk_with_score(0.9, blob_1_id),
+        _create_chunk_with_score(0.7, blob_2_id),
+        _create_chunk_with_score(0.5, uuid4()),
+    ]
+
+    info_blobs = await service._get_info_blobs_from_chunks(chunks)
+
+    info_blobs_repo.get_many_without_text.assert_awaited_once()
+    assert [(blob.id, blob.score) for blob in info_blobs] == [
+        (blob_1_id, 0.9),
+        (blob_2_id, 0.7),
+    ]
@@ -0,0 +1,76 @@
+from scrapy.http import HtmlResponse, Request
+
+from intric.crawler.middlewares import ConditionalRequestMiddleware
+from intric.crawler.parse_html import parse_response
+from intric.crawler.spiders.crawl_spider import CrawlSpider
+
+ETAG = '"abc123"'
+LAST_MODIFIED = "Wed, 21 May 2025 10:00:00 GMT"
+
+
+def _get_spider():
+    return CrawlSpider(
+        url="https://example.com/",
+        known_pages={
+            "https://example.com/a": (ETAG, LAST_MODIFIED),
+            "https://example.com/b": (None, None),
+        },
+    )
+
+
+def test_known_pages_are_requested_on_their_own():
+    spider = _get_spider()
+
+    assert spider.start_urls == [
+        "https://example.com/",
+        "https://example.com/a",
+        "https://example.com/b",
+    ]
+
+
+def test_requests_for_known_pages_are_conditional():
+    request = Request("https://example.com/a")
+
+    ConditionalRequestMiddleware().process_request(request, _get_spider())
+
+    assert request.headers[b"If-None-Match"] == ETAG.encode()
+    assert request.headers[b"If-Modified-Since"] == LAST_MODIFIED.encode()
+
+
+def test_requests_for_pages_without_validators_are_not_conditional():
+    for url in ["https://example.com/b", "https://example.com/new"]:
+        request = Request(url)
+
+        ConditionalRequestMiddleware().process_request(request, _get_spider())
+
+        assert b"If-None-Match" not in request.headers
+        assert b"If-Modified-Since" not in request.headers
+
+
+def test_parse_response_keeps_validators():
+    response = HtmlResponse(
+        url="https://example.com/a",
+        body=b"<html><head><title>A</title></head><body>Page A</body></html>",
+        headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED},
+        request=Request("https://example.com/a"),
+    )
+
+    page = parse_response(response)
+
+    assert not page.unchanged
+    assert "Page A" in page.content
+    assert (page.etag, page.last_modified) == (ETAG, LAST_MODIFIED)
+
+
+def test_parse_response_marks_not_modified_pages_as_unchanged():
+    response = HtmlResponse(
+        url="https://example.com/a",
+        status=304,
+        body=b"",
+        request=Request("https://example.com/a"),
+    )
+
+    page = parse_response(response)
+
+    assert page.unchanged
+    assert page.content == ""
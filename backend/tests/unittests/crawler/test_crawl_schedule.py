@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from arq.jobs import JobStatus
+
+from intric.main.config import SETTINGS
+from intric.websites.domain.crawl_run_repo import CrawlRunRepository
+from intric.worker.crawl_tasks import pick_crawls_to_start
+
+NOW = datetime(2025, 5, 23, 2, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def limits():
+    with (
+        patch.object(SETTINGS, "max_concurrent_crawls", 3),
+        patch.object(SETTINGS, "max_concurrent_crawls_per_tenant", 2),
+    ):
+        yield
+
+
+def _website(tenant_id=None, size: int = 0):
+    return MagicMock(id=uuid4(), tenant_id=tenant_id or uuid4(), size=size)
+
+
+def test_stalest_and_then_smallest_websites_go_first():
+    never_crawled = _website()
+    week_old_large = _website(size=1000)
+    week_old_small = _website(size=10)
+    fresh = _website()
+
+    picked = pick_crawls_to_start(
+        [
+            (fresh, NOW - timedelta(days=1)),
+            (week_old_large, NOW - timedelta(days=7, hours=3)),
+            (week_old_small, NOW - timedelta(days=7)),
+            (never_crawled, None),
+        ],
+        num_running_by_tenant={},
+        max_to_start=10,
+        now=NOW,
+    )
+
+    # Crawled on the same day, so the smaller one goes first
+    assert picked == [never_crawled, week_old_small, week_old_large]
+
+
+def test_running_crawls_count_towards_the_limits():
+    busy_tenant = uuid4()
+    of_busy_tenant = _website(tenant_id=busy_tenant)
+    of_other_tenants = [_website() for _ in range(3)]
+
+    picked = pick_crawls_to_start(
+        [(of_busy_tenant, None), *((website, NOW) for website in of_other_tenants)],
+        num_running_by_tenant={busy_tenant: 2},
+        max_to_start=10,
+    )
+
+    # The busy tenant is at its limit, and only one more crawl fits in all
+    assert picked == [of_other_tenants[0]]
+
+
+def test_no_more_than_the_share_of_this_dispatch_is_started():
+    websites = [(_website(), None) for _ in range(3)]
+
+    assert len(pick_crawls_to_start(websites, num_running_by_tenant={}, max_to_start=1)) == 1
+
+
+async def test_crawls_are_counted_while_their_jobs_are_known_to_the_queue():
+    tenant_id = uuid4()
+    running, queued, died = uuid4(), uuid4(), uuid4()
+    session = AsyncMock()
+    session.execute.return_value.all = MagicMock(
+        return_value=[(tenant_id, running), (tenant_id, queued), (tenant_id, died)]
+    )
+    repo = CrawlRunRepository(session=session)
+    repo._job_manager = AsyncMock()
+    repo._job_manager.get_job_statuses.return_value = {
+        running: JobStatus.in_progress,
+        queued: JobStatus.queued,
+        died: JobStatus.not_found,
+    }
+
+    assert await repo.get_num_running_by_tenant() == {tenant_id: 2}
@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from intric.crawler.crawler import Crawl
+from intric.crawler.parse_html import CrawledPage
+from intric.main.config import SETTINGS
+from intric.main.exceptions import CrawlerException
+from intric.websites.crawl_dependencies.crawl_models import CrawlTask
+from intric.websites.domain.crawl_run import CrawlType
+from intric.worker.crawl_tasks import crawl_task
+
+
+class _TaskManager:
+    def __init__(self):
+        self.success = None
+
+    @asynccontextmanager
+    async def set_status_on_exception(self):
+        try:
+            yield
+        except Exception:
+            self.success = False
+        else:
+            self.success = True
+
+    def successful(self):
+        return self.success
+
+
+def _get_container(pages):
+    async def _iter_pages():
+        for page in pages:
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+    @asynccontextmanager
+    async def _crawl(**kwargs):
+        container.crawl_kwargs = kwargs
+        yield Crawl(pages=_iter_pages(), files=[])
+
+    container = MagicMock()
+    container.task_manager.return_value = _TaskManager()
+    container.crawler.return_value.crawl = _crawl
+    container.text_processor.return_value = AsyncMock()
+    container.crawl_run_repo.return_value = AsyncMock()
+    container.info_blob_repo.return_value = AsyncMock()
+    container.info_blob_repo.return_value.get_titles_of_website.return_value = []
+    container.website_sparse_repo.return_value = AsyncMock()
+    container.website_sparse_repo.return_value.get_boilerplate_blocks.return_value = set()
+    container.update_website_size_service.return_value = AsyncMock()
+    container.website_crud_service.return_value = AsyncMock()
+    container.session.return_value.begin_nested = MagicMock(return_value=AsyncMock())
+
+    return container
+
+
+def _params(crawl_type: CrawlType = CrawlType.CRAWL):
+    return CrawlTask(
+        user_id=uuid4(),
+        website_id=uuid4(),
+        run_id=uuid4(),
+        url="https://example.com",
+        download_files=False,
+        crawl_type=crawl_type,
+    )
+
+
+async def test_website_size_is_updated_when_the_crawl_fails_partway():
+    page = CrawledPage(url="https://example.com", title="Example", content="Content")
+    container = _get_container([page, CrawlerException("Crawl took too long")])
+    params = _params()
+    container.website_crud_service.return_value.get_website.return_value = MagicMock(
+        id=params.website_id
+    )
+
+    success = await crawl_task(job_id=uuid4(), params=params, container=container)
+
+    assert success is False
+    container.text_processor.return_value.process_text.assert_awaited_once()
+    # The page processed before the crawl failed is counted
+    update_website_size = container.update_website_size_service.return_value.update_website_size
+    update_website_size.assert_awaited_once_with(website_id=params.website_id)
+
+
+@pytest.mark.parametrize(
+    ["crawl_type", "incremental_link_crawl", "requested_conditionally"],
+    [
+        (CrawlType.CRAWL, False, False),
+        (CrawlType.CRAWL, True, True),
+        (CrawlType.SITEMAP, False, True),
+    ],
+)
+async def test_known_pages_of_crawls_of_links_are_only_recrawled_when_turned_on(
+    crawl_type: CrawlType, incremental_link_crawl: bool, requested_conditionally: bool
+):
+    page = CrawledPage(url="https://example.com", title="Example", content="Content")
+    container = _get_container([page])
+    known_pages = {"https://example.com/old": ("etag", None)}
+    info_blob_repo = container.info_blob_repo.return_value
+    info_blob_repo.get_http_validators_of_website.return_value = known_pages
+    info_blob_repo.get_sitemap_lastmods_of_website.return_value = {}
+
+    with (
+        patch.object(SETTINGS, "incremental_crawl", True),
+        patch.object(SETTINGS, "incremental_link_crawl", incremental_link_crawl),
+    ):
+        await crawl_task(job_id=uuid4(), params=_params(crawl_type), container=container)
+
+    # Known pages that are not requested on their own are only kept if they
+    # are still linked to
+    assert container.crawl_kwargs["known_pages"] == (known_pages if requested_conditionally else {})
+
+
+@pytest.mark.parametrize(
+    ["incremental_link_crawl", "saved_blocks"],
+    [(False, {1, 2}), (True, {1, 2, 3})],
+)
+async def test_boilerplate_of_earlier_crawls_is_kept_by_incremental_crawls(
+    incremental_link_crawl: bool, saved_blocks: set[int]
+):
+    pages = [
+        CrawledPage(
+            url=f"https://example.com/{i}", title="Example", content="Content", blocks=[1, 2]
+        )
+        for i in range(3)
+    ]
+    container = _get_container(pages)
+    website_sparse_repo = container.website_sparse_repo.return_value
+    website_sparse_repo.get_boilerplate_blocks.return_value = {3}
+    params = _params()
+
+    with (
+        patch.object(SETTINGS, "incremental_crawl", True),
+        patch.object(SETTINGS, "incremental_link_crawl", incremental_link_crawl),
+    ):
+        await crawl_task(job_id=uuid4(), params=params, container=container)
+
+    # The pages are parsed without the boilerplate found by the earlier crawls
+    assert container.crawl_kwargs["boilerplate_blocks"] == {3}
+    website_sparse_repo.set_boilerplate_blocks.assert_awaited_once_with(
+        params.website_id, saved_blocks
+    )
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import crochet
+import pytest
+
+from intric.crawler.crawler import _CRAWL_DONE, Crawler, _QueueWaits
+from intric.crawler.parse_html import CrawledPage
+from intric.main.config import SETTINGS
+from intric.main.exceptions import CrawlerException
+
+
+def _page(url: str):
+    return CrawledPage(url=url, title="", content="content")
+
+
+async def _crawl_done(exception: Exception | None = None):
+    if exception is not None:
+        raise exception
+
+
+class _CrawlResult:
+    """Stands in for the eventual result of a crawl that takes `seconds`."""
+
+    def __init__(self, seconds: float):
+        self._done = threading.Event()
+        threading.Timer(seconds, self._done.set).start()
+
+    def wait(self, timeout: float):
+        if not self._done.wait(timeout):
+            raise crochet.TimeoutError()
+
+
+async def test_iter_pages_yields_pages_until_the_crawl_is_done():
+    queue = asyncio.Queue()
+    for item in [_page("a"), _page("b"), _CRAWL_DONE]:
+        queue.put_nowait(item)
+
+    pages = [page async for page in Crawler._iter_pages(queue, asyncio.create_task(_crawl_done()))]
+
+    assert [page.url for page in pages] == ["a", "b"]
+
+
+async def test_iter_pages_raises_what_stopped_the_crawl():
+    queue = asyncio.Queue()
+    for item in [_page("a"), _CRAWL_DONE]:
+        queue.put_nowait(item)
+    crawl_done = asyncio.create_task(_crawl_done(CrawlerException("Too long")))
+
+    pages = []
+    with pytest.raises(CrawlerException, match="Too long"):
+        async for page in Crawler._iter_pages(queue, crawl_done):
+            pages.append(page)
+
+    assert [page.url for page in pages] == ["a"]
+
+
+async def test_iter_pages_fails_a_crawl_without_pages():
+    queue = asyncio.Queue()
+    queue.put_nowait(_CRAWL_DONE)
+
+    with pytest.raises(CrawlerException):
+        async for _ in Crawler._iter_pages(queue, asyncio.create_task(_crawl_done())):
+            pass
+
+
+async def test_pages_are_only_done_once_they_are_in_the_queue():
+    queue = asyncio.Queue(maxsize=1)
+    queue.put_nowait(_page("waiting"))
+    on_item_scraped = Crawler._put_pages_in(queue, asyncio.get_running_loop(), _QueueWaits())
+
+    # Called from the reactor thread
+    page_put = await asyncio.to_thread(on_item_scraped, _page("next"))
+    await asyncio.sleep(0.05)
+
+    assert not page_put.called
+    assert queue.get_nowait().url == "waiting"
+    await asyncio.sleep(0.05)
+    assert queue.get_nowait().url == "next"
+
+
+async def test_items_that_are_not_pages_are_left_alone():
+    on_item_scraped = Crawler._put_pages_in(
+        asyncio.Queue(), asyncio.get_running_loop(), _QueueWaits()
+    )
+
+    assert on_item_scraped({"file_urls": ["https://example.com/a.pdf"]}) is None
+
+
+async def test_a_crawl_that_takes_too_long_is_stopped():
+    with (
+        patch.object(SETTINGS, "crawl_max_length", 0.2),
+        patch.object(Crawler, "_stop_crawl") as stop_crawl,
+    ):
+        with pytest.raises(CrawlerException):
+            await Crawler._wait_for_crawl(crawler=None, result=_CrawlResult(0.5))
+
+    stop_crawl.assert_called_once()
+
+
+async def test_a_slow_consumer_does_not_time_out_the_crawl():
+    queue = asyncio.Queue(maxsize=1)
+    queue.put_nowait(_page("waiting"))
+    waits = _QueueWaits()
+    on_item_scraped = Crawler._put_pages_in(queue, asyncio.get_running_loop(), waits)
+
+    async def _consume_slowly():
+        # The crawl is held up by the full queue for most of its time
+        await asyncio.to_thread(on_item_scraped, _page("next"))
+        await asyncio.sleep(0.4)
+        queue.get_nowait()
+
+    with (
+        patch.object(SETTINGS, "crawl_max_length", 0.2),
+        patch.object(Crawler, "_stop_crawl") as stop_crawl,
+    ):
+        await asyncio.gather(
+            Crawler._wait_for_crawl(crawler=None, result=_CrawlResult(0.5), waits=waits),
+            _consume_slowly(),
+        )
+
+    stop_crawl.assert_not_called()
+    assert waits.seconds() >= 0.4
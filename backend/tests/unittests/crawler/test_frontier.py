@@ -0,0 +1,154 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from scrapy.exceptions import DontCloseSpider
+from twisted.internet import defer
+
+from intric.crawler import crawler as crawler_module
+from intric.crawler.crawler import Crawler
+from intric.crawler.frontier import MAX_PAGES_WAITING, REQUESTS_PER_FETCH, FrontierScheduler
+from intric.crawler.parse_html import CrawledPage
+from intric.crawler.spiders.crawl_spider import CrawlSpider
+from intric.main.exceptions import CrawlerException
+
+
+class FakeFrontier:
+    def __init__(self, pages: list[CrawledPage], stopped_after: int):
+        self.pages = pages
+        self.num_checks = 0
+        self.stopped_after = stopped_after
+        self.closed = False
+
+    def seed(self, urls, known_pages, boilerplate_blocks=()):
+        self.seeded = urls
+        self.boilerplate_blocks = set(boilerplate_blocks)
+
+    def is_stopped(self):
+        self.num_checks += 1
+        return self.num_checks > self.stopped_after
+
+    def pop_page(self, timeout=None):
+        return self.pages.pop(0) if self.pages else None
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def in_thread():
+    # Run the calls to the frontier right away, instead of in the thread pool
+    with patch(
+        "intric.crawler.frontier.threads.deferToThread",
+        lambda func, *args: defer.maybeDeferred(func, *args),
+    ):
+        yield
+
+
+def _get_scheduler(frontier):
+    scheduler = FrontierScheduler(crawler=MagicMock())
+    scheduler.open(MagicMock(frontier=frontier))
+
+    return scheduler
+
+
+def test_fetchers_take_their_start_from_the_frontier():
+    spider = CrawlSpider(url="https://example.com/", frontier=MagicMock())
+
+    assert spider.start_urls == []
+
+
+def test_scheduler_takes_requests_ahead_of_when_they_are_needed():
+    requests = [MagicMock() for _ in range(REQUESTS_PER_FETCH)]
+    frontier = MagicMock()
+    frontier.num_pages_waiting.return_value = 0
+    frontier.pop.side_effect = [*requests, None]
+    scheduler = _get_scheduler(frontier)
+    calls = []
+
+    def _defer_to_thread(func, *args):
+        calls.append((func, args, d := defer.Deferred()))
+        return d
+
+    with patch("intric.crawler.frontier.threads.deferToThread", _defer_to_thread):
+        # Not handed out until they are back from the frontier
+        assert scheduler.next_request() is None
+        assert scheduler.has_pending_requests()
+
+        func, args, d = calls.pop()
+        d.callback(func(*args))
+
+        assert frontier.pop.call_count == REQUESTS_PER_FETCH
+        assert [scheduler.next_request() for _ in range(REQUESTS_PER_FETCH // 2)] == (
+            requests[: REQUESTS_PER_FETCH // 2]
+        )
+        # Only taken again once half of them are used
+        assert not calls
+        scheduler.next_request()
+        assert calls
+
+
+def test_scheduler_holds_back_while_the_crawl_job_is_behind(in_thread):
+    frontier = MagicMock()
+    frontier.num_pages_waiting.return_value = MAX_PAGES_WAITING
+    scheduler = _get_scheduler(frontier)
+
+    assert scheduler.next_request() is None
+    assert scheduler.next_request() is None
+    assert not scheduler.has_pending_requests()
+    frontier.pop.assert_not_called()
+
+
+def test_scheduler_keeps_the_spider_open_until_the_crawl_is_done(in_thread):
+    frontier = MagicMock()
+    scheduler = _get_scheduler(frontier)
+
+    frontier.is_done.return_value = False
+    with pytest.raises(DontCloseSpider):
+        scheduler._on_spider_idle(scheduler.spider)
+
+    # Found to be done by this check, and closed on the next
+    frontier.is_done.return_value = True
+    with pytest.raises(DontCloseSpider):
+        scheduler._on_spider_idle(scheduler.spider)
+    scheduler._on_spider_idle(scheduler.spider)
+
+    frontier.is_done.assert_called_with(scheduler.fetcher_id)
+
+
+async def test_crawl_shared_takes_the_pages_left_once_stopped():
+    pages = [CrawledPage(url=f"https://example.com/{i}", title="", content="") for i in range(3)]
+    # Stopped before the last page is taken
+    frontier = FakeFrontier(pages=list(pages), stopped_after=2)
+
+    fetch = AsyncMock()
+
+    with (
+        patch.object(crawler_module.RedisFrontier, "for_run", return_value=frontier),
+        patch.object(Crawler, "fetch", fetch),
+    ):
+        async with Crawler().crawl_shared(
+            url="https://example.com/", run_id=uuid4(), boilerplate_blocks={1}
+        ) as crawl:
+            crawled = [page async for page in crawl.pages]
+
+    assert crawled == pages
+    # For the fetchers to leave out of the pages
+    assert frontier.boilerplate_blocks == {1}
+    assert frontier.closed
+    # The crawl job fetches too, so the crawl does not wait on other jobs
+    fetch.assert_awaited_once()
+
+
+async def test_crawl_shared_fails_without_pages():
+    frontier = FakeFrontier(pages=[], stopped_after=0)
+
+    with (
+        patch.object(crawler_module.RedisFrontier, "for_run", return_value=frontier),
+        patch.object(Crawler, "fetch", AsyncMock()),
+    ):
+        with pytest.raises(CrawlerException):
+            async with Crawler().crawl_shared(url="https://example.com/", run_id=uuid4()) as crawl:
+                [page async for page in crawl.pages]
+
+    assert frontier.closed
@@ -0,0 +1,97 @@
+from scrapy.http import HtmlResponse, Request
+
+from intric.crawler.parse_html import Boilerplate, BoilerplateCounter, parse_response
+
+NAV = '<nav><a href="/">Home</a> <a href="about">About</a></nav>'
+FOOTER = "<footer><p>Copyright Example</p></footer>"
+
+
+def _response(path: str, body: str, title: str = "Page"):
+    url = f"https://example.com/docs/{path}"
+    page = (
+        f"<html><head><title>{title}</title><style>p {{ color: red; }}</style></head>"
+        f"<body>{body}<script>track();</script></body></html>"
+    )
+
+    return HtmlResponse(url=url, body=page.encode(), encoding="utf-8", request=Request(url))
+
+
+def test_parse_response_writes_markdown_with_absolute_links():
+    body = (
+        "<h2>Heading</h2>"
+        '<p>Some <strong>bold</strong> text with <a href="../other">a link</a>.</p>'
+        "<ul><li>First</li><li>Second</li></ul>"
+    )
+
+    page = parse_response(_response("page", body, title="The title"))
+
+    assert page.title == "The title"
+    assert page.content == (
+        "## Heading\n"
+        "\n"
+        "Some **bold** text with [a link](https://example.com/other).\n"
+        "\n"
+        "* First\n"
+        "* Second\n"
+    )
+
+
+def test_parse_response_leaves_out_scripts_and_styles():
+    page = parse_response(_response("page", "<p>Text</p>"))
+
+    assert page.content == "Text\n"
+
+
+def _pages(boilerplate: Boilerplate, bodies: list[str]):
+    return [
+        parse_response(_response(str(i), body), boilerplate=boilerplate)
+        for i, body in enumerate(bodies)
+    ]
+
+
+def _learn_boilerplate(bodies: list[str], min_pages: int = 2) -> Boilerplate:
+    counter = BoilerplateCounter(min_pages=min_pages)
+    for page in _pages(Boilerplate(), bodies):
+        counter.add(page.blocks)
+
+    return Boilerplate(counter.get_blocks())
+
+
+def _bodies(num_pages: int):
+    return [f"{NAV}<main><p>Content of page {i}</p></main>{FOOTER}" for i in range(num_pages)]
+
+
+def test_blocks_repeated_across_pages_of_an_earlier_crawl_are_left_out():
+    boilerplate = _learn_boilerplate(_bodies(3))
+
+    pages = _pages(boilerplate, _bodies(3))
+
+    assert [page.content for page in pages] == [f"Content of page {i}\n" for i in range(3)]
+
+
+def test_blocks_are_only_left_out_once_an_earlier_crawl_found_them():
+    # The text of a page does not depend on the pages crawled before it
+    pages = _pages(Boilerplate(), _bodies(3))
+
+    for page in pages:
+        assert "Home" in page.content
+        assert "Copyright Example" in page.content
+
+
+def test_a_page_gets_the_same_text_whatever_else_is_crawled():
+    boilerplate = _learn_boilerplate(_bodies(3))
+    body = _bodies(1)[0]
+
+    (alone,) = _pages(boilerplate, [body])
+    *_, last = _pages(boilerplate, [*reversed(_bodies(3)), body])
+
+    assert alone.content == last.content == "Content of page 0\n"
+
+
+def test_pages_repeated_in_full_are_kept():
+    bodies = ["<div><p>The same content on every page</p></div>"] * 3
+    boilerplate = _learn_boilerplate(bodies)
+
+    pages = _pages(boilerplate, bodies)
+
+    assert all(page.content == "The same content on every page\n" for page in pages)
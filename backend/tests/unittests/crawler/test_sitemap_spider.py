@@ -0,0 +1,70 @@
+from scrapy import Request
+from scrapy.http import HtmlResponse, XmlResponse
+
+from intric.crawler.parse_html import CrawledPage
+from intric.crawler.spiders.sitemap_spider import SitemapSpider
+
+SITEMAP_URL = "https://example.com/sitemap.xml"
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/same</loc><lastmod>2025-05-01</lastmod></url>
+  <url><loc>https://example.com/changed</loc><lastmod>2025-05-20</lastmod></url>
+  <url><loc>https://example.com/new</loc><lastmod>2025-05-21</lastmod></url>
+  <url><loc>https://example.com/no-lastmod</loc></url>
+</urlset>
+"""
+
+
+def _get_spider():
+    return SitemapSpider(
+        sitemap_url=SITEMAP_URL,
+        sitemap_lastmods={
+            "https://example.com/same": "2025-05-01",
+            "https://example.com/changed": "2025-05-01",
+        },
+    )
+
+
+def _parse_sitemap(spider: SitemapSpider):
+    response = XmlResponse(url=SITEMAP_URL, body=SITEMAP, request=Request(SITEMAP_URL))
+
+    return list(spider._parse_sitemap(response))
+
+
+def test_pages_with_the_same_lastmod_are_not_requested():
+    results = _parse_sitemap(_get_spider())
+
+    requests = [result for result in results if isinstance(result, Request)]
+    pages = [result for result in results if isinstance(result, CrawledPage)]
+
+    assert [request.url for request in requests] == [
+        "https://example.com/changed",
+        "https://example.com/new",
+        "https://example.com/no-lastmod",
+    ]
+    assert pages == [
+        CrawledPage(
+            url="https://example.com/same",
+            title="",
+            content="",
+            unchanged=True,
+            sitemap_lastmod="2025-05-01",
+        )
+    ]
+
+
+def test_requested_pages_keep_their_lastmod():
+    spider = _get_spider()
+    _parse_sitemap(spider)
+
+    def _parse(url: str):
+        response = HtmlResponse(
+            url=url,
+            body=b"<html><head><title>Page</title></head><body>Content</body></html>",
+            request=Request(url),
+        )
+        return spider.parse(response)
+
+    assert _parse("https://example.com/changed").sitemap_lastmod == "2025-05-20"
+    assert _parse("https://example.com/no-lastmod").sitemap_lastmod is None
@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from intric.embedding_models.infrastructure.datastore import Datastore
+from intric.embedding_models.infrastructure.text_splitter import (
+    StreamingTextSplitter,
+    TokenTextSplitter,
+)
+from intric.files.chunk_embedding_list import ChunkEmbeddingList
+from tests.fixtures import TEST_UUID
+
+
+class CharacterEncoding:
+    def encode_ordinary(self, text: str):
+        return [ord(c) for c in text]
+
+    def decode_with_offsets(self, tokens: list[int]):
+        return "".join(chr(t) for t in tokens), list(range(len(tokens)))
+
+
+class FakeCreateEmbeddingsService:
+    async def iter_embeddings(self, model, chunks):
+        chunk_embedding_list = ChunkEmbeddingList()
+        chunk_embedding_list.add(chunks, [[float(chunk.chunk_no)] for chunk in chunks])
+        yield chunk_embedding_list
+
+
+async def _iter(parts: list[str]):
+    for part in parts:
+        yield part
+
+
+async def test_embed_stream_numbers_the_chunks_across_parts():
+    datastore = Datastore(
+        user=MagicMock(tenant_id=TEST_UUID),
+        info_blob_chunk_repo=AsyncMock(),
+        create_embeddings_service=FakeCreateEmbeddingsService(),
+    )
+    info_blob_id = uuid4()
+    parts = [f"Page {i} " + "word " * 500 for i in range(20)]
+
+    splitter = TokenTextSplitter(chunk_size=200, chunk_overlap=40, encoding=CharacterEncoding())
+
+    with (
+        patch.object(datastore, "_get_splitter", return_value=splitter),
+        patch(
+            "intric.embedding_models.infrastructure.datastore.StreamingTextSplitter",
+            lambda splitter: StreamingTextSplitter(splitter, section_size=2000),
+        ),
+    ):
+        chunk_embedding_list = await datastore.embed_stream(
+            _iter(parts), info_blob_id=info_blob_id, embedding_model=MagicMock()
+        )
+
+    assert len(chunk_embedding_list) > len(parts)
+    chunk_nos = [chunk.chunk_no for chunk, _ in chunk_embedding_list]
+    assert chunk_nos == list(range(len(chunk_embedding_list)))
+    assert [int(embedding[0]) for _, embedding in chunk_embedding_list] == chunk_nos
+    assert all(chunk.info_blob_id == info_blob_id for chunk, _ in chunk_embedding_list)
+
+    await datastore.add_embeddings(chunk_embedding_list)
+    datastore.chunk_repo.copy.assert_awaited()
@@ -1,9 +1,11 @@
 from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 import pytest
 
 from intric.embedding_models.infrastructure.datastore import Datastore
-from tests.fixtures import TEST_COLLECTION
+from intric.info_blobs.info_blob import InfoBlobChunkInDBWithScore
+from tests.fixtures import TEST_COLLECTION, TEST_UUID
 
 
 @pytest.fixture(name="datastore")
@@ -33,3 +35,53 @@ async def test_semantic_search(datastore: Datastore):
             embedding_model=TEST_COLLECTION.embedding_model,
         )
         autocut_mock.assert_called_once()
+
+
+async def test_hybrid_search_fuses_semantic_and_keyword_results(datastore: Datastore):
+    datastore.chunk_repo.semantic_search.return_value = []
+    datastore.chunk_repo.keyword_search.return_value = []
+
+    await datastore.hybrid_search(
+        search_string="case 2023-1234",
+        collections=[TEST_COLLECTION],
+        embedding_model=TEST_COLLECTION.embedding_model,
+        num_chunks=10,
+    )
+
+    datastore.chunk_repo.keyword_search.assert_awaited_once()
+    datastore.chunk_repo.semantic_search.assert_awaited_once()
+    assert datastore.chunk_repo.keyword_search.call_args.args == ("case 2023-1234",)
+    assert datastore.chunk_repo.keyword_search.call_args.kwargs["limit"] == 10
+
+
+def _chunk_with_score(score: float):
+    return InfoBlobChunkInDBWithScore(
+        id=uuid4(),
+        text="text",
+        chunk_no=0,
+        info_blob_id=TEST_UUID,
+        tenant_id=TEST_UUID,
+        info_blob_title="title",
+        score=score,
+    )
+
+
+async def test_hybrid_search_scores_chunks_by_similarity(datastore: Datastore):
+    semantic_chunk = _chunk_with_score(0.8)
+    keyword_chunk = _chunk_with_score(3.0)
+    datastore.chunk_repo.semantic_search.return_value = [semantic_chunk]
+    datastore.chunk_repo.keyword_search.return_value = [keyword_chunk]
+    datastore.chunk_repo.get_similarities.return_value = {keyword_chunk.id: 0.4}
+
+    results = await datastore.hybrid_search(
+        search_string="case 2023-1234",
+        collections=[TEST_COLLECTION],
+        embedding_model=TEST_COLLECTION.embedding_model,
+    )
+
+    # Not the fused scores, nor the rank of the keyword search
+    assert [(chunk.id, chunk.score) for chunk in results] == [
+        (semantic_chunk.id, 0.8),
+        (keyword_chunk.id, 0.4),
+    ]
+    assert datastore.chunk_repo.get_similarities.call_args.args[1] == [keyword_chunk.id]
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from intric.files.chunk_embedding_list import ChunkEmbeddingList
@@ -41,3 +42,45 @@ def test_fails_when_the_lengths_dont_match():
 
     with pytest.raises(ChunkEmbeddingMisMatchException):
         chunk_embedding_list.add([1, 2], [[1]])
+
+
+def test_embeddings_are_stored_as_float32():
+    chunk_embedding_list = ChunkEmbeddingList()
+
+    chunk_embedding_list.add(["hello"], [[0.1, 0.2, 0.3]])
+
+    ((_, embedding),) = chunk_embedding_list
+    assert embedding.dtype == np.float32
+
+
+def test_memory_maps_large_lists():
+    # Small enough that a few embeddings go past it
+    chunk_embedding_list = ChunkEmbeddingList(memory_map_threshold=1024)
+
+    chunks_list = [f"chunk {i}" for i in range(200)]
+    embeddings = [[i, 2, 3, 4] for i in range(len(chunks_list))]
+
+    for i in range(0, len(chunks_list), 7):
+        chunk_embedding_list.add(chunks_list[i : i + 7], embeddings[i : i + 7])
+
+    assert isinstance(chunk_embedding_list.embeddings, np.memmap)
+    assert len(chunk_embedding_list) == len(chunks_list)
+    for (chunk, embedding), (expected_chunk, expected_embedding) in zip(
+        chunk_embedding_list, zip(chunks_list, embeddings)
+    ):
+        assert chunk == expected_chunk
+        assert list(embedding) == expected_embedding
+
+
+def test_batches():
+    chunk_embedding_list = ChunkEmbeddingList()
+
+    chunks_list = ["hello", "there", "I", "am", "Henry"]
+    embeddings = [[i, 2, 3, 4] for i in range(len(chunks_list))]
+    chunk_embedding_list.add(chunks_list, embeddings)
+
+    batches = list(chunk_embedding_list.batches(2))
+
+    assert [chunks for chunks, _ in batches] == [["hello", "there"], ["I", "am"], ["Henry"]]
+    assert [embeddings.shape for _, embeddings in batches] == [(2, 4), (2, 4), (1, 4)]
+    assert batches[2][1].tolist() == [embeddings[4]]
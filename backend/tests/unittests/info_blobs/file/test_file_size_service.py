@@ -0,0 +1,77 @@
+import hashlib
+import os
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from intric.files import file_size_service
+from intric.files.file_protocol import text_size
+from intric.files.file_size_service import FileSizeService
+from intric.main.exceptions import FileTooLargeException
+
+
+class CountingFile(BytesIO):
+    def __init__(self, content: bytes):
+        super().__init__(content)
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+async def test_save_file_to_disk_measures_and_checksums_in_one_pass(tmp_path: Path):
+    content = os.urandom(3 * 1024 + 17)
+    file = CountingFile(content)
+
+    with (
+        patch.object(file_size_service, "TMP_DIR", str(tmp_path)),
+        patch.object(file_size_service, "CHUNK_SIZE", 1024),
+    ):
+        saved_file = await FileSizeService.save_file_to_disk(file, max_size=len(content))
+
+    assert file.bytes_read == len(content)
+    assert file.closed
+    assert Path(saved_file.filepath).read_bytes() == content
+    assert saved_file.size == len(content)
+    assert saved_file.checksum == hashlib.sha256(content).hexdigest()
+
+
+async def test_save_file_to_disk_stops_when_too_large(tmp_path: Path):
+    file = CountingFile(b"x" * 10 * 1024)
+
+    with (
+        patch.object(file_size_service, "TMP_DIR", str(tmp_path)),
+        patch.object(file_size_service, "CHUNK_SIZE", 1024),
+    ):
+        with pytest.raises(FileTooLargeException):
+            await FileSizeService.save_file_to_disk(file, max_size=2 * 1024)
+
+    assert file.bytes_read == 3 * 1024
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_read_file_reads_at_most_one_byte_too_many():
+    file = CountingFile(b"x" * 100)
+
+    with pytest.raises(FileTooLargeException):
+        await FileSizeService.read_file(file, max_size=10)
+
+    assert file.bytes_read == 11
+
+
+async def test_read_file_returns_content_and_checksum():
+    content = b"image bytes"
+
+    blob, checksum = await FileSizeService.read_file(BytesIO(content), max_size=len(content))
+
+    assert blob == content
+    assert checksum == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.parametrize("text", ["plain ascii", "åäö and emoji 🙂", ""])
+def test_text_size_is_size_of_utf_8(text: str):
+    assert text_size(text) == len(text.encode("utf-8"))
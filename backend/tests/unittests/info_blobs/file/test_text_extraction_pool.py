@@ -0,0 +1,101 @@
+import time
+
+import pytest
+from pypdf import PdfWriter
+
+from intric.files import text
+from intric.files.text import TextExtractor
+from intric.files.text_extraction_pool import TextExtractionPool
+from intric.main.exceptions import FileExtractionTimeoutException
+
+
+@pytest.fixture
+def pool():
+    pool = TextExtractionPool(max_workers=1, timeout=10)
+    yield pool
+    pool.shutdown()
+
+
+async def test_extract_async_gives_the_same_text_as_extract(tmp_path):
+    filepath = tmp_path / "file.txt"
+    filepath.write_text("  Some text\n\nin a file  ")
+
+    extractor = TextExtractor()
+
+    assert await extractor.extract_async(filepath, "text/plain") == extractor.extract(
+        filepath, "text/plain"
+    )
+
+
+async def test_run_times_out_and_the_pool_recovers(pool: TextExtractionPool):
+    # Start the worker before timing anything
+    assert await pool.run(abs, -1) == 1
+
+    pool.timeout = 1
+    with pytest.raises(FileExtractionTimeoutException):
+        await pool.run(time.sleep, 5)
+
+    pool.timeout = 10
+    assert await pool.run(abs, -3) == 3
+
+
+async def test_iter_extract_adds_up_to_extract(tmp_path):
+    filepath = tmp_path / "file.txt"
+    filepath.write_text("  Some text\n\nin a file  ")
+
+    extractor = TextExtractor()
+    parts = [part async for part in extractor.iter_extract(filepath, "text/plain")]
+
+    assert "".join(parts).strip() == extractor.extract(filepath, "text/plain")
+
+
+def _write_pdf(filepath, num_pages: int):
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(width=100, height=100)
+    writer.write(filepath)
+
+
+async def test_iter_extract_extracts_every_page_of_a_pdf(tmp_path):
+    filepath = tmp_path / "file.pdf"
+    _write_pdf(filepath, 25)
+
+    extractor = TextExtractor()
+    parts = [part async for part in extractor.iter_extract(filepath, "application/pdf")]
+
+    assert len(parts) == 25
+    assert "".join(parts).strip() == extractor.extract(filepath, "application/pdf")
+
+
+def test_pdf_is_parsed_once_for_all_its_pages(tmp_path):
+    filepath = tmp_path / "file.pdf"
+    _write_pdf(filepath, 25)
+    text._open_pdf.cache_clear()
+
+    text._count_pdf_pages(filepath)
+    for start in range(0, 25, text.PDF_PAGES_PER_TASK):
+        text._extract_pdf_pages(filepath, start, start + text.PDF_PAGES_PER_TASK)
+
+    assert text._open_pdf.cache_info().misses == 1
+
+
+async def test_iter_extract_times_out_on_the_total_time_of_a_pdf(tmp_path, monkeypatch):
+    filepath = tmp_path / "file.pdf"
+    _write_pdf(filepath, 25)
+
+    class SlowPool:
+        timeout = 10
+
+        async def run(self, func, *args, timeout=None):
+            result, _ = func(*args)
+            # Every task takes less than the timeout, but not all of them
+            return result, 4
+
+    monkeypatch.setattr(text, "text_extraction_pool", SlowPool())
+
+    parts = []
+    with pytest.raises(FileExtractionTimeoutException):
+        async for part in TextExtractor().iter_extract(filepath, "application/pdf"):
+            parts.append(part)
+
+    assert len(parts) == text.PDF_PAGES_PER_TASK
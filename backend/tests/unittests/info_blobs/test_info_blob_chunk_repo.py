@@ -0,0 +1,199 @@
+import collections.abc
+import struct
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import numpy as np
+from pgvector.utils import from_db_binary
+from sqlalchemy.dialects import postgresql
+
+from intric.info_blobs.info_blob import InfoBlobChunk
+from intric.info_blobs.info_blob_chunk_repo import (
+    COPY_BUFFER_SIZE,
+    COPY_COLUMNS,
+    InfoBlobChunkRepo,
+)
+from tests.fixtures import TEST_UUID
+
+
+def _get_repo():
+    session = AsyncMock()
+    session.execute.return_value = MagicMock()
+    return InfoBlobChunkRepo(session=session), session
+
+
+async def _read_source(source) -> bytes:
+    # The same check asyncpg makes before it reads from the source
+    assert isinstance(source, collections.abc.AsyncIterable)
+    return b"".join([data async for data in source])
+
+
+def _executed_sql(session: AsyncMock) -> list[str]:
+    return [
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in session.execute.call_args_list
+    ]
+
+
+async def test_semantic_search_uses_hnsw_index_of_dimension():
+    repo, session = _get_repo()
+
+    await repo.semantic_search([0.1] * 512, group_ids=[TEST_UUID])
+
+    *settings, query = _executed_sql(session)
+    assert "SET LOCAL hnsw.iterative_scan = strict_order;" in settings
+    assert "CAST(info_blob_chunks.embedding AS VECTOR(512))" in query
+    assert "vector_dims(info_blob_chunks.embedding) = 512" in query
+
+
+async def test_semantic_search_falls_back_on_unindexed_dimension():
+    repo, session = _get_repo()
+
+    await repo.semantic_search([0.1] * 3, group_ids=[TEST_UUID])
+
+    *settings, query = _executed_sql(session)
+    assert "SET LOCAL enable_seqscan = off;" in settings
+    assert "CAST(" not in query
+    assert "vector_dims" not in query
+
+
+async def test_keyword_search_uses_text_search_index_expression():
+    repo, session = _get_repo()
+
+    await repo.keyword_search("case 2023-1234", group_ids=[TEST_UUID])
+
+    (query,) = _executed_sql(session)
+    assert "info_blob_chunks.text_search @@" in query
+    assert "to_tsvector('keyword_search'::regconfig, info_blob_chunks.text)" not in query
+    assert "info_blobs.group_id IN" in query
+
+
+async def test_keyword_search_ranks_every_match_on_its_stored_vector():
+    repo, session = _get_repo()
+
+    await repo.keyword_search("case 2023-1234", group_ids=[TEST_UUID], limit=5)
+
+    (query,) = _executed_sql(session)
+    start, end = query.index("(SELECT info_blob_chunks.id"), query.index(") AS ranked")
+    ranked_query = query[start:end]
+    assert "info_blob_chunks.text," not in ranked_query
+    assert "ts_rank_cd(info_blob_chunks.text_search" in ranked_query
+    # Only the ranked matches are limited
+    assert ranked_query.count("LIMIT") == 1
+    assert ranked_query.index("ORDER BY") < ranked_query.index("LIMIT")
+    # The query is an OR of the lexemes of the search string
+    assert "string_agg(" in query
+    assert "tsvector_to_array(to_tsvector('keyword_search'::regconfig" in query
+
+
+async def test_get_similarities_only_reads_the_chunks_asked_for():
+    repo, session = _get_repo()
+    chunk_id = uuid4()
+    session.execute.return_value = [(chunk_id, 0.25)]
+
+    similarities = await repo.get_similarities([0.1] * 3, [chunk_id])
+
+    assert similarities == {chunk_id: 0.75}
+    (query,) = _executed_sql(session)
+    assert "info_blob_chunks.id IN" in query
+
+
+async def test_semantic_search_only_fetches_text_of_top_k():
+    repo, session = _get_repo()
+
+    await repo.semantic_search([0.1] * 512, group_ids=[TEST_UUID], limit=5)
+
+    *_, query = _executed_sql(session)
+    ranked_query = query[query.index("(SELECT") : query.index(") AS ranked")]
+    assert "info_blob_chunks.text" not in ranked_query
+    assert "LIMIT" in ranked_query
+    assert query.startswith("SELECT info_blob_chunks.text")
+
+
+async def test_copy_streams_binary_rows():
+    repo, session = _get_repo()
+    raw_connection = session.connection.return_value.get_raw_connection.return_value
+    copy_to_table = raw_connection.driver_connection.copy_to_table = AsyncMock()
+
+    chunks = [
+        InfoBlobChunk(text=text, chunk_no=i, info_blob_id=TEST_UUID, tenant_id=TEST_UUID)
+        for i, text in enumerate(["hello", "wörld"])
+    ]
+    embeddings = np.array([[0.5, 1.0, -2.0], [1.5, 0.0, 3.0]], dtype=np.float32)
+
+    await repo.copy(chunks, embeddings)
+
+    copy_to_table.assert_awaited_once()
+    kwargs = copy_to_table.call_args.kwargs
+    assert kwargs["format"] == "binary"
+    assert kwargs["columns"] == COPY_COLUMNS
+
+    stream = await _read_source(kwargs["source"])
+    assert stream.startswith(b"PGCOPY\n\xff\r\n\x00")
+    assert stream.endswith(struct.pack("!h", -1))
+
+    # Second row, with the fields in the order of the columns
+    row = stream[stream.index("wörld".encode()) - 4 - 2 :]
+    assert struct.unpack_from("!h", row) == (len(COPY_COLUMNS),)
+    text = "wörld".encode()
+    offset = 2 + 4 + len(text)
+    assert struct.unpack_from("!iiii", row, offset) == (4, 1, 4, len(text) + 3 * 4)
+    offset += 16
+    assert struct.unpack_from("!ihh", row, offset) == (4 + 3 * 4, 3, 0)
+    offset += 8
+    assert from_db_binary(row[offset - 4 : offset + 3 * 4]).tolist() == [1.5, 0.0, 3.0]
+    offset += 3 * 4
+    assert row[offset + 4 : offset + 20] == TEST_UUID.bytes
+    offset += 20 * 2
+    # Not staged for a re-embedding
+    assert struct.unpack_from("!i", row, offset) == (-1,)
+
+
+async def test_copy_stages_chunks_of_a_reembedding():
+    repo, session = _get_repo()
+    raw_connection = session.connection.return_value.get_raw_connection.return_value
+    copy_to_table = raw_connection.driver_connection.copy_to_table = AsyncMock()
+    embedding_model_id = uuid4()
+
+    chunks = [InfoBlobChunk(text="hello", chunk_no=0, info_blob_id=TEST_UUID, tenant_id=TEST_UUID)]
+    embeddings = np.array([[0.5, 1.0, -2.0]], dtype=np.float32)
+
+    await repo.copy(chunks, embeddings, staged_embedding_model_id=embedding_model_id)
+
+    stream = await _read_source(copy_to_table.call_args.kwargs["source"])
+    assert stream.endswith(struct.pack("!i", 16) + embedding_model_id.bytes + struct.pack("!h", -1))
+
+
+async def test_copy_hands_rows_over_in_buffers():
+    repo, session = _get_repo()
+    raw_connection = session.connection.return_value.get_raw_connection.return_value
+    copy_to_table = raw_connection.driver_connection.copy_to_table = AsyncMock()
+
+    text = "x" * 1000
+    chunks = [
+        InfoBlobChunk(text=text, chunk_no=i, info_blob_id=TEST_UUID, tenant_id=TEST_UUID)
+        for i in range(2 * COPY_BUFFER_SIZE // len(text))
+    ]
+    embeddings = np.zeros((len(chunks), 3), dtype=np.float32)
+
+    await repo.copy(chunks, embeddings)
+
+    buffers = [data async for data in copy_to_table.call_args.kwargs["source"]]
+    assert all(isinstance(data, bytes) for data in buffers)
+    assert 2 <= len(buffers) <= 3
+    assert b"".join(buffers).count(text.encode()) == len(chunks)
+
+
+async def test_searches_skip_staged_chunks():
+    semantic_repo, semantic_session = _get_repo()
+    keyword_repo, keyword_session = _get_repo()
+
+    await semantic_repo.semantic_search([0.1] * 512, group_ids=[TEST_UUID])
+    await keyword_repo.keyword_search("case 2023-1234", group_ids=[TEST_UUID])
+
+    (*_, semantic_query), (keyword_query,) = (
+        _executed_sql(semantic_session),
+        _executed_sql(keyword_session),
+    )
+    assert "info_blob_chunks.staged_embedding_model_id IS NULL" in semantic_query
+    assert "info_blob_chunks.staged_embedding_model_id IS NULL" in keyword_query
@@ -0,0 +1,61 @@
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from intric.info_blobs.info_blob import InfoBlobAdd
+from intric.info_blobs.info_blob_repo import InfoBlobRepository
+from intric.main.exceptions import BadRequestException
+from tests.fixtures import TEST_UUID
+
+
+async def test_get_by_content_hash_does_not_read_the_text():
+    session = AsyncMock()
+    session.scalar.return_value = None
+    repo = InfoBlobRepository(session=session)
+
+    info_blob = await repo.get_by_content_hash(
+        title="title",
+        content_hash="hash",
+        url=None,
+        embedding_model_id=TEST_UUID,
+        website_id=TEST_UUID,
+    )
+
+    assert info_blob is None
+    query = str(session.scalar.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "info_blobs.text" not in query
+    assert "info_blobs.content_hash = " in query
+    assert "info_blobs.group_id IS NULL" in query
+
+
+async def test_add_locks_the_source():
+    session = AsyncMock()
+    session.scalar.return_value = TEST_UUID
+    repo = InfoBlobRepository(session=session)
+    repo.delegate = AsyncMock()
+
+    await repo.add(
+        InfoBlobAdd(text="text", user_id=TEST_UUID, tenant_id=TEST_UUID, group_id=TEST_UUID),
+        embedding_model_id=TEST_UUID,
+    )
+
+    query = str(session.scalar.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "FOR KEY SHARE" in query
+    assert repo.delegate.add.call_args.args[0].embedding_model_id == TEST_UUID
+
+
+async def test_add_fails_if_the_source_was_moved_to_another_embedding_model():
+    session = AsyncMock()
+    session.scalar.return_value = uuid4()
+    repo = InfoBlobRepository(session=session)
+    repo.delegate = AsyncMock()
+
+    with pytest.raises(BadRequestException):
+        await repo.add(
+            InfoBlobAdd(text="text", user_id=TEST_UUID, tenant_id=TEST_UUID, website_id=TEST_UUID),
+            embedding_model_id=TEST_UUID,
+        )
+
+    repo.delegate.add.assert_not_called()
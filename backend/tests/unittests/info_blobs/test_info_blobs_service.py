@@ -1,12 +1,15 @@
+import hashlib
 from dataclasses import dataclass
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from intric.groups_legacy.group_service import GroupService
+from intric.info_blobs.info_blob import InfoBlobAdd
 from intric.info_blobs.info_blob_repo import InfoBlobRepository
 from intric.info_blobs.info_blob_service import InfoBlobService
 from intric.main.exceptions import NameCollisionException, NotFoundException
+from tests.fixtures import TEST_UUID
 
 
 @dataclass
@@ -70,3 +73,30 @@ async def test_update_fails_if_info_blob_with_same_name_exists(setup: Setup):
 
     with pytest.raises(NameCollisionException):
         await setup.service.update_info_blob(MagicMock())
+
+
+async def test_get_unchanged_info_blob_looks_up_content_hash(setup: Setup):
+    info_blob = InfoBlobAdd(
+        title="page", text="hello", user_id=TEST_UUID, tenant_id=TEST_UUID, website_id=TEST_UUID
+    )
+
+    unchanged = await setup.service.get_unchanged_info_blob(
+        info_blob, embedding_model_id=TEST_UUID
+    )
+
+    assert unchanged is setup.repo.get_by_content_hash.return_value
+    setup.repo.get_by_content_hash.assert_awaited_once_with(
+        title="page",
+        content_hash=hashlib.sha256(b"hello").hexdigest(),
+        url=None,
+        embedding_model_id=TEST_UUID,
+        group_id=None,
+        website_id=TEST_UUID,
+    )
+
+
+async def test_get_unchanged_info_blob_without_title(setup: Setup):
+    info_blob = InfoBlobAdd(text="hello", user_id=TEST_UUID, tenant_id=TEST_UUID, group_id=TEST_UUID)
+
+    assert await setup.service.get_unchanged_info_blob(info_blob, TEST_UUID) is None
+    setup.repo.get_by_content_hash.assert_not_called()
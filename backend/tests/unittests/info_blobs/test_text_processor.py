@@ -0,0 +1,334 @@
+import hashlib
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from intric.info_blobs.text_processor import FILES_PER_BATCH, TextProcessor
+from intric.jobs.task_models import UploadedFile
+from intric.main.exceptions import FileExtractionTimeoutException, QuotaExceededException
+from tests.fixtures import TEST_UUID
+
+
+@asynccontextmanager
+async def _savepoint():
+    yield
+
+
+@pytest.fixture
+def processor():
+    processor = TextProcessor(
+        user=MagicMock(id=TEST_UUID, tenant_id=TEST_UUID),
+        extractor=AsyncMock(),
+        datastore=AsyncMock(),
+        info_blob_service=AsyncMock(),
+        session=MagicMock(),
+    )
+    processor.session.begin_nested.side_effect = _savepoint
+    processor.info_blob_service.get_info_blob_of_same_file.return_value = None
+    processor.info_blob_service.get_unchanged_info_blob.return_value = None
+    processor.info_blob_service.get_size_left.return_value = 1_000_000
+    processor.info_blob_service.add_info_blob_without_validation.side_effect = (
+        lambda info_blob, embedding_model_id: MagicMock(id=uuid4(), title=info_blob.title)
+    )
+
+    return processor
+
+
+def _files(count: int):
+    return [
+        UploadedFile(
+            filepath=f"/tmp/{i}",
+            filename=f"file-{i}.txt",
+            mimetype="text/plain",
+            checksum=f"checksum-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+async def test_iter_process_files_embeds_each_batch_together(processor: TextProcessor):
+    files = _files(FILES_PER_BATCH + 1)
+    processor.extractor.extract_async.side_effect = lambda filepath, mimetype: f"text of {filepath}"
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=files, embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert [file for file, _ in results] == files
+    assert [info_blob.title for _, info_blob in results] == [file.filename for file in files]
+
+    first_batch, second_batch = processor.datastore.add_many.await_args_list
+    assert len(first_batch.args[0]) == FILES_PER_BATCH
+    assert len(second_batch.args[0]) == 1
+
+    # Sizes are updated once, for every file
+    processor.info_blob_service.update_info_blob_size.assert_not_called()
+    (sizes_call,) = processor.info_blob_service.update_info_blob_sizes.await_args_list
+    assert sizes_call.args[0] == [info_blob.id for _, info_blob in results]
+
+
+async def test_iter_process_files_reports_files_that_fail(processor: TextProcessor):
+    files = _files(3)
+    error = FileExtractionTimeoutException()
+
+    async def extract_async(filepath, mimetype):
+        if str(filepath) == files[1].filepath:
+            raise error
+        return "text"
+
+    processor.extractor.extract_async.side_effect = extract_async
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=files, embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert results[1] == (files[1], error)
+    (added,) = processor.datastore.add_many.await_args.args
+    assert [info_blob.title for info_blob in added] == [files[0].filename, files[2].filename]
+
+
+async def test_iter_process_files_fails_a_file_over_the_quota_on_its_own(
+    processor: TextProcessor,
+):
+    files = _files(3)
+    error = QuotaExceededException("Quota limit exceeded.")
+    processor.extractor.extract_async.side_effect = lambda filepath, mimetype: str(filepath)
+
+    def add_info_blob_without_validation(info_blob, embedding_model_id):
+        if info_blob.title == files[1].filename:
+            raise error
+        return MagicMock(id=uuid4(), title=info_blob.title)
+
+    processor.info_blob_service.add_info_blob_without_validation.side_effect = (
+        add_info_blob_without_validation
+    )
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=files, embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert [file for file, _ in results] == files
+    assert results[1] == (files[1], error)
+    (added,) = processor.datastore.add_many.await_args.args
+    assert [info_blob.title for info_blob in added] == [files[0].filename, files[2].filename]
+    processor.info_blob_service.update_info_blob_sizes.assert_awaited_once_with(
+        [results[0][1].id, results[2][1].id]
+    )
+
+
+async def test_iter_process_files_fails_every_added_file_of_a_batch_that_is_not_embedded(
+    processor: TextProcessor,
+):
+    files = _files(FILES_PER_BATCH + 1)
+    error = Exception("Embedding failed")
+    processor.extractor.extract_async.return_value = "text"
+    processor.datastore.add_many.side_effect = [error, None]
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=files, embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert [file for file, _ in results] == files
+    assert all(result is error for _, result in results[:FILES_PER_BATCH])
+    # Only the batch that was embedded is counted
+    processor.info_blob_service.update_info_blob_sizes.assert_awaited_once_with(
+        [results[-1][1].id]
+    )
+
+
+async def test_iter_process_files_skips_unchanged_files(processor: TextProcessor):
+    unchanged_info_blob = MagicMock(id=uuid4())
+    processor.extractor.extract_async.return_value = "text"
+    processor.info_blob_service.get_unchanged_info_blob.return_value = unchanged_info_blob
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=_files(1), embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert results[0][1] is unchanged_info_blob
+    processor.info_blob_service.add_info_blob_without_validation.assert_not_called()
+    processor.info_blob_service.update_info_blob_sizes.assert_awaited_once_with([])
+
+
+async def test_iter_process_files_skips_the_same_files_before_extracting_them(
+    processor: TextProcessor,
+):
+    files = _files(2)
+    same_file_info_blob = MagicMock(id=uuid4())
+    processor.extractor.extract_async.return_value = "text"
+
+    async def get_info_blob_of_same_file(*, file_checksum, **kwargs):
+        return same_file_info_blob if file_checksum == files[0].checksum else None
+
+    processor.info_blob_service.get_info_blob_of_same_file.side_effect = (
+        get_info_blob_of_same_file
+    )
+
+    results = [
+        result
+        async for result in processor.iter_process_files(
+            files=files, embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+    ]
+
+    assert results[0] == (files[0], same_file_info_blob)
+    processor.extractor.extract_async.assert_awaited_once()
+    (info_blob_add,) = processor.info_blob_service.add_info_blob_without_validation.await_args.args
+    assert info_blob_add.file_checksum == files[1].checksum
+
+
+async def test_process_text_can_leave_the_source_size_for_later(processor: TextProcessor):
+    await processor.process_text(
+        text="text",
+        title="page",
+        embedding_model=MagicMock(),
+        website_id=TEST_UUID,
+        update_source_size=False,
+    )
+
+    processor.info_blob_service.update_info_blob_size.assert_awaited_once()
+    assert (
+        processor.info_blob_service.update_info_blob_size.await_args.kwargs["update_source_size"]
+        is False
+    )
+
+
+async def test_process_file_skips_the_same_file_before_extracting_it(
+    processor: TextProcessor, tmp_path
+):
+    filepath = tmp_path / "file.txt"
+    filepath.write_bytes(b"text")
+    unchanged_info_blob = MagicMock(id=uuid4())
+    processor.info_blob_service.get_info_blob_of_same_file.return_value = unchanged_info_blob
+
+    info_blob = await processor.process_file(
+        filepath=filepath, filename="file.txt", embedding_model=MagicMock(), group_id=TEST_UUID
+    )
+
+    assert info_blob is unchanged_info_blob
+    assert (
+        processor.info_blob_service.get_info_blob_of_same_file.await_args.kwargs["file_checksum"]
+        == hashlib.sha256(b"text").hexdigest()
+    )
+    processor.extractor.iter_extract.assert_not_called()
+    processor.datastore.embed_stream.assert_not_called()
+
+
+async def test_process_file_stores_the_checksum_of_a_new_file(processor: TextProcessor, tmp_path):
+    filepath = tmp_path / "file.txt"
+    filepath.write_bytes(b"text")
+    processor.info_blob_service.get_info_blob_of_same_file.return_value = None
+
+    async def iter_extract(filepath, mimetype):
+        yield "text"
+
+    async def embed_stream(parts, **kwargs):
+        return [part async for part in parts]
+
+    processor.extractor.iter_extract = iter_extract
+    processor.datastore.embed_stream.side_effect = embed_stream
+
+    await processor.process_file(
+        filepath=filepath, filename="file.txt", embedding_model=MagicMock(), group_id=TEST_UUID
+    )
+
+    (info_blob_add,) = processor.info_blob_service.add_info_blob_without_validation.await_args.args
+    assert info_blob_add.text == "text"
+    assert info_blob_add.file_checksum == hashlib.sha256(b"text").hexdigest()
+
+
+async def test_process_file_keeps_the_info_blob_of_a_different_file_with_the_same_text(
+    processor: TextProcessor,
+):
+    unchanged_info_blob = MagicMock(id=uuid4())
+    processor.info_blob_service.get_unchanged_info_blob.return_value = unchanged_info_blob
+
+    async def iter_extract(filepath, mimetype):
+        yield "text"
+
+    async def embed_stream(parts, **kwargs):
+        return [part async for part in parts]
+
+    processor.extractor.iter_extract = iter_extract
+    processor.datastore.embed_stream.side_effect = embed_stream
+
+    info_blob = await processor.process_file(
+        filepath=Path("/tmp/file.txt"),
+        filename="file.txt",
+        embedding_model=MagicMock(),
+        group_id=TEST_UUID,
+        file_checksum="checksum",
+    )
+
+    assert info_blob is unchanged_info_blob
+    processor.info_blob_service.add_info_blob_without_validation.assert_not_called()
+    processor.datastore.add_embeddings.assert_not_called()
+    # So that the same file is not extracted the next time
+    processor.info_blob_service.update_file_checksum.assert_awaited_once_with(
+        unchanged_info_blob, file_checksum="checksum"
+    )
+
+
+async def test_process_file_uses_the_checksum_of_the_saved_file(processor: TextProcessor):
+    processor.info_blob_service.get_info_blob_of_same_file.return_value = MagicMock()
+
+    # Not read again, so it does not have to exist
+    await processor.process_file(
+        filepath=Path("/tmp/missing"),
+        filename="file.txt",
+        embedding_model=MagicMock(),
+        group_id=TEST_UUID,
+        file_checksum="checksum",
+    )
+
+    assert (
+        processor.info_blob_service.get_info_blob_of_same_file.await_args.kwargs["file_checksum"]
+        == "checksum"
+    )
+
+
+async def test_process_file_stops_embedding_a_file_over_the_quota(
+    processor: TextProcessor, tmp_path
+):
+    filepath = tmp_path / "file.txt"
+    filepath.write_bytes(b"text")
+    processor.info_blob_service.get_info_blob_of_same_file.return_value = None
+    processor.info_blob_service.get_size_left.return_value = 10
+    embedded = []
+
+    async def iter_extract(filepath, mimetype):
+        for _ in range(3):
+            yield "page!"
+
+    async def embed_stream(parts, **kwargs):
+        async for part in parts:
+            embedded.append(part)
+
+    processor.extractor.iter_extract = iter_extract
+    processor.datastore.embed_stream.side_effect = embed_stream
+
+    with pytest.raises(QuotaExceededException):
+        await processor.process_file(
+            filepath=filepath, filename="file.txt", embedding_model=MagicMock(), group_id=TEST_UUID
+        )
+
+    assert embedded == ["page!", "page!"]
+    processor.info_blob_service.add_info_blob_without_validation.assert_not_called()
@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from arq.constants import in_progress_key_prefix, result_key_prefix
+from arq.jobs import JobStatus
+from arq.utils import timestamp_ms
+
+from intric.jobs.job_manager import JobManager
+
+
+class FakePipeline:
+    def __init__(self, keys: set[str], scores: dict[str, int]):
+        self.keys = keys
+        self.scores = scores
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def exists(self, key: str):
+        self.commands.append(int(key in self.keys))
+
+    def zscore(self, _queue_name: str, job_id: str):
+        self.commands.append(self.scores.get(job_id))
+
+    async def execute(self):
+        return self.commands
+
+
+async def test_get_job_statuses_uses_one_pipeline():
+    complete, in_progress, queued, deferred, not_found = (uuid4() for _ in range(5))
+    pipeline = FakePipeline(
+        keys={result_key_prefix + str(complete), in_progress_key_prefix + str(in_progress)},
+        scores={str(queued): timestamp_ms() - 1000, str(deferred): timestamp_ms() + 60_000},
+    )
+    job_manager = JobManager()
+    job_manager._redis = MagicMock()
+    job_manager._redis.pipeline.return_value = pipeline
+
+    statuses = await job_manager.get_job_statuses(
+        [complete, in_progress, queued, deferred, not_found]
+    )
+
+    job_manager._redis.pipeline.assert_called_once()
+    assert statuses == {
+        complete: JobStatus.complete,
+        in_progress: JobStatus.in_progress,
+        queued: JobStatus.queued,
+        deferred: JobStatus.deferred,
+        not_found: JobStatus.not_found,
+    }
+
+
+async def test_get_job_statuses_of_no_jobs_skips_redis():
+    job_manager = JobManager()
+    job_manager._redis = AsyncMock()
+
+    assert await job_manager.get_job_statuses([]) == {}
+    job_manager._redis.pipeline.assert_not_called()
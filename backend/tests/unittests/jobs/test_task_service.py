@@ -0,0 +1,41 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from intric.files.file_size_service import SavedFile
+from intric.jobs.task_service import TaskService
+from intric.main.exceptions import BadRequestException
+
+
+async def test_queue_upload_files_rejects_files_with_the_same_name():
+    task_service = TaskService(
+        user=MagicMock(), file_size_service=AsyncMock(), job_service=AsyncMock()
+    )
+    files = [
+        MagicMock(filename="file.txt", content_type="text/plain"),
+        MagicMock(filename="file.txt", content_type="text/plain"),
+    ]
+
+    with pytest.raises(BadRequestException):
+        await task_service.queue_upload_files(
+            group_id=MagicMock(), space_id=MagicMock(), files=files
+        )
+
+    task_service.file_size_service.save_file_to_disk.assert_not_called()
+    task_service.job_service.queue_job.assert_not_called()
+
+
+async def test_queue_upload_files_passes_on_the_checksums_of_the_saved_files():
+    task_service = TaskService(
+        user=MagicMock(id=uuid4()), file_size_service=AsyncMock(), job_service=AsyncMock()
+    )
+    task_service.file_size_service.save_file_to_disk.return_value = SavedFile(
+        filepath="/tmp/file", size=4, checksum="checksum"
+    )
+    files = [MagicMock(filename="file.txt", content_type="text/plain")]
+
+    await task_service.queue_upload_files(group_id=uuid4(), space_id=uuid4(), files=files)
+
+    params = task_service.job_service.queue_job.await_args.kwargs["task_params"]
+    assert [file.checksum for file in params.files] == ["checksum"]